@@ -2,17 +2,28 @@
 Streamlit 메인 앱: 코인 투자 AI 대시보드
 """
 
+import json
+import math
+import altair as alt
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
 from config import QWEN_MODEL_PATH, USE_LMSTUDIO_API, LM_STUDIO_MODEL_NAME
-from models.qwen_local import QwenModel
+from config import INFERENCE_OUT_OF_PROCESS, PROMPT_TOKEN_BUDGET, WATCHED_CURRENCIES
+from config import MARKET_REFRESH_SECONDS, DASHBOARD_READ_ONLY, WATCHLIST_PAGE_SIZE, PAPER_TRADING
+from models.model_registry import lease_model
+from models.inference_service import get_inference_service
 from data.coinone_api import CoinoneAPI
+from data.market_feed import build_market_frame, get_market_feed, resolve_watchlist
+from data.paper_exchange import PaperExchange
 from config import COINONE_ACCESS_TOKEN, COINONE_SECRET_KEY
 from db.database import TradingDatabase
 from utils.news_scraper import NewsScraper
+from utils.indicators import refresh_candles
+from utils.prompt_builder import prepare_currency_prompt
+from utils.recommendation import generate_recommendation
 
 # 로깅 설정
 logging.basicConfig(
@@ -28,21 +39,437 @@ st.set_page_config(
     layout="wide"
 )
 
+# 시세표 정렬 기준 (표시 이름: 컬럼)
+WATCHLIST_SORT_COLUMNS = {
+    "거래대금": "quote_volume",
+    "변동률": "change_rate",
+    "현재가": "last",
+    "통화": "currency",
+}
+
+# 히트맵 한 줄당 종목 수
+HEATMAP_COLUMNS = 10
+
+# 거래 내역 정렬 기준 (표시 이름: 컬럼) 및 페이지당 행 수
+TRADE_SORT_LABELS = {
+    "시각": "timestamp",
+    "통화": "currency",
+    "가격": "price",
+    "수량": "quantity",
+    "금액": "total_amount",
+}
+TRADE_PAGE_SIZE = 50
+
 # 세션 상태 초기화
 if "model" not in st.session_state:
     st.session_state.model = None
+if "model_lease" not in st.session_state:
+    # 공유 모델 참조 (세션이 정리되면 자동 반환)
+    st.session_state.model_lease = None
 if "api" not in st.session_state:
     st.session_state.api = None
 if "db" not in st.session_state:
     st.session_state.db = None
 
 
+@st.cache_resource
+def get_database() -> TradingDatabase:
+    """프로세스 공용 데이터베이스 (세션/탭마다 스키마 초기화를 반복하지 않음)"""
+    return TradingDatabase()
+
+
+@st.cache_resource
+def get_api() -> CoinoneAPI:
+    """프로세스 공용 코인원 API 클라이언트 (연결 풀 공유)"""
+    return CoinoneAPI()
+
+
+@st.cache_resource
+def get_news_scraper() -> NewsScraper:
+    """프로세스 공용 뉴스 수집기 (저장된 뉴스와 수집된 뉴스 색인을 세션 간 공유)"""
+    scraper = NewsScraper()
+    scraper.load_stored_news(get_database())
+    return scraper
+
+
+@st.cache_resource
+def get_paper_exchange() -> PaperExchange:
+    """프로세스 공용 모의 체결 엔진 (미체결 주문은 시세 수집 스레드의 현재가로 체결)"""
+    exchange = PaperExchange(get_database(), api=get_api())
+    get_market_feed().subscribe(exchange.on_tickers)
+    return exchange
+
+
 def init_components():
     """컴포넌트 초기화"""
     if st.session_state.db is None:
-        st.session_state.db = TradingDatabase()
+        st.session_state.db = get_database()
     if st.session_state.api is None:
-        st.session_state.api = CoinoneAPI()
+        st.session_state.api = get_api()
+
+
+def get_watchlist() -> list:
+    """관심 종목 목록 (WATCHLIST="ALL"이면 시세가 조회된 원화 마켓 전체)"""
+    if DASHBOARD_READ_ONLY:
+        return resolve_watchlist(list(st.session_state.db.get_latest_tickers()))
+    return resolve_watchlist(get_market_feed().markets())
+
+
+def prepare_analysis_prompt(currency: str, scraper: NewsScraper, news_list: list,
+                            structured: bool = False) -> tuple:
+    """
+    통화별 AI 분석 프롬프트 구성 (현재가, 기술적 지표, 관련 뉴스, 뉴스 감성 요약)
+    
+    Args:
+        structured: JSON 추천(action, confidence, reasons) 형식 요청 여부
+    
+    Returns:
+        (프롬프트, 프롬프트 토큰 수) 튜플
+    """
+    # 현재가 가져오기 (시세 수집 스레드 스냅샷 우선, 아직 없으면 직접 조회)
+    feed = get_market_feed()
+    feed.watch([currency])
+    ticker = feed.get_ticker(currency) or st.session_state.api.get_ticker(currency)
+    current_price = ticker.get("last", "N/A") if ticker else "N/A"
+    
+    # 지표 계산용 캔들 갱신 (읽기 전용 모드는 데몬이 저장한 캔들 사용)
+    if not DASHBOARD_READ_ONLY:
+        refresh_candles(st.session_state.api, st.session_state.db, currency)
+    
+    return prepare_currency_prompt(
+        currency, current_price, scraper, news_list,
+        db=st.session_state.db,
+        model=st.session_state.model,
+        structured=structured
+    )
+
+
+def format_generation_metrics(metrics: dict) -> str:
+    """생성 지표 한 줄 요약 (첫 토큰/전체 시간, 토큰 수, 생성 속도)"""
+    parts = []
+    if metrics.get("ttft") is not None:
+        parts.append(f"첫 토큰 {metrics['ttft']:.2f}초")
+    parts.append(f"전체 {metrics['latency']:.2f}초")
+    if metrics.get("queue_wait"):
+        parts.append(f"대기 {metrics['queue_wait']:.2f}초")
+    if metrics.get("prompt_tokens") is not None:
+        parts.append(f"프롬프트 {metrics['prompt_tokens']:,} / 생성 {metrics.get('completion_tokens') or 0:,} 토큰")
+    if metrics.get("tokens_per_sec"):
+        parts.append(f"{metrics['tokens_per_sec']:.1f} tokens/sec")
+    return ", ".join(parts)
+
+
+def render_watchlist(frame: pd.DataFrame):
+    """
+    관심 종목 시세표/히트맵 (정렬과 페이지 나누기를 DataFrame에서 처리해 보이는 행만 그림)
+    
+    Args:
+        frame: build_market_frame 결과 (전체 마켓)
+    """
+    watchlist = resolve_watchlist(list(frame.index))
+    table = frame.reindex(watchlist)
+    table.index.name = "currency"
+    
+    st.subheader(f"관심 종목 ({len(table)}개)")
+    col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+    with col1:
+        view = st.radio("보기", ["표", "히트맵"], horizontal=True, key="watchlist_view")
+    with col2:
+        sort_label = st.selectbox("정렬", list(WATCHLIST_SORT_COLUMNS), key="watchlist_sort")
+    with col3:
+        descending = st.toggle("내림차순", value=True, key="watchlist_desc")
+    with col4:
+        pages = max(1, math.ceil(len(table) / WATCHLIST_PAGE_SIZE))
+        page = st.selectbox("페이지", range(1, pages + 1), key="watchlist_page")
+    
+    table = table.reset_index().sort_values(
+        WATCHLIST_SORT_COLUMNS[sort_label], ascending=not descending, na_position="last"
+    )
+    start = (page - 1) * WATCHLIST_PAGE_SIZE
+    page_table = table.iloc[start:start + WATCHLIST_PAGE_SIZE].reset_index(drop=True)
+    page_table["change_rate"] = page_table["change_rate"] * 100
+    
+    if view == "표":
+        st.dataframe(
+            page_table,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "currency": "통화",
+                "last": st.column_config.NumberColumn("현재가(원)", format="%.0f"),
+                "change_rate": st.column_config.NumberColumn("변동률(%)", format="%+.2f"),
+                "high": st.column_config.NumberColumn("고가", format="%.0f"),
+                "low": st.column_config.NumberColumn("저가", format="%.0f"),
+                "volume": st.column_config.NumberColumn("거래량", format="%.2f"),
+                "quote_volume": st.column_config.NumberColumn("거래대금(원)", format="%.0f"),
+            }
+        )
+    else:
+        # 상승은 빨강, 하락은 파랑
+        tiles = page_table.assign(
+            row=page_table.index // HEATMAP_COLUMNS,
+            col=page_table.index % HEATMAP_COLUMNS,
+            label=page_table["currency"] + "\n" + page_table["change_rate"].map("{:+.2f}%".format)
+        )
+        base = alt.Chart(tiles).encode(
+            x=alt.X("col:O", axis=None),
+            y=alt.Y("row:O", axis=None)
+        )
+        heatmap = base.mark_rect().encode(
+            color=alt.Color(
+                "change_rate:Q", title="변동률(%)",
+                scale=alt.Scale(scheme="redblue", reverse=True, domainMid=0)
+            ),
+            tooltip=["currency", "last", "change_rate", "quote_volume"]
+        ) + base.mark_text(lineBreak="\n", fontSize=11).encode(text="label:N")
+        st.altair_chart(
+            heatmap.properties(height=48 * (tiles["row"].max() + 1 if len(tiles) else 1)),
+            use_container_width=True
+        )
+
+
+@st.fragment(run_every=MARKET_REFRESH_SECONDS)
+def render_market_metrics(currencies: list):
+    """시세 카드와 관심 종목 시세표 (시세 수집 스레드 스냅샷 또는 데몬이 저장한 시세만 읽어 주기적으로 부분 재실행)"""
+    if DASHBOARD_READ_ONLY:
+        tickers = st.session_state.db.get_latest_tickers()
+        frame = build_market_frame(tickers)
+    else:
+        feed = get_market_feed()
+        feed.watch(currencies)
+        tickers = feed.snapshot()
+        frame = feed.frame()
+    
+    for column, currency in zip(st.columns(len(currencies)), currencies):
+        with column:
+            ticker = tickers.get(currency)
+            if ticker and "last" in ticker:
+                st.metric(
+                    label=currency,
+                    value=f"{float(ticker['last']):,.0f}원",
+                    delta=f"{float(ticker.get('change_rate') or 0) * 100:.2f}%"
+                )
+            else:
+                st.metric(label=currency, value="-")
+    
+    if DASHBOARD_READ_ONLY:
+        timestamps = [t["timestamp"] for t in tickers.values()]
+        if timestamps:
+            st.caption(f"데몬 저장 시세: {max(timestamps)[:19].replace('T', ' ')}")
+        else:
+            st.caption("저장된 시세가 없습니다. 데몬(daemon.py)이 실행 중인지 확인하세요.")
+    else:
+        if feed.last_updated:
+            st.caption(f"마지막 갱신: {feed.last_updated:%H:%M:%S} ({feed.interval}초마다 자동 갱신)")
+        else:
+            st.caption("시세 수집 중...")
+        if feed.last_error:
+            st.caption(f"⚠️ {feed.last_error}")
+    
+    render_watchlist(frame)
+
+
+def submit_order(currency: str, action: str, price: float, quantity: float) -> str:
+    """
+    주문 처리 (PAPER_TRADING이면 현재 호가 스냅샷에 모의 체결, 아니면 미체결로 기록)
+    
+    Args:
+        currency: 통화 코드
+        action: "buy" 또는 "sell"
+        price: 지정가 (모의 체결에서 0이면 시장가)
+        quantity: 수량
+    
+    Returns:
+        결과 메시지
+    """
+    label = "매수" if action == "buy" else "매도"
+    
+    if PAPER_TRADING:
+        exchange = get_paper_exchange()
+        exchange.seed_orderbook(currency)
+        order = exchange.submit(currency, action, quantity, price=price or None, notes="Streamlit 앱 모의 주문")
+        exchange.flush()
+        if order["status"] == "completed":
+            return f"{label} 주문이 모의 체결되었습니다. (평균 {order['price']:,.0f}원, 수량 {order['quantity']})"
+        if order["status"] == "cancelled":
+            return f"{label} 시장가 주문 중 {order['filled_quantity']}개만 체결되고 나머지는 취소되었습니다."
+        return f"{label} 주문이 모의 호가창에 등록되었습니다. (체결 {order['filled_quantity']}/{order['quantity']})"
+    
+    # 실제 주문은 주석 처리 (테스트용)
+    # result = st.session_state.api.place_order(
+    #     price=int(price),
+    #     qty=quantity,
+    #     currency=currency,
+    #     order_type="bid" if action == "buy" else "ask"
+    # )
+    
+    # 데이터베이스에 기록
+    trade_id = st.session_state.db.add_trade(
+        currency=currency,
+        action=action,
+        price=price,
+        quantity=quantity,
+        status="pending",
+        notes="Streamlit 앱에서 주문"
+    )
+    return f"{label} 주문이 기록되었습니다. (ID: {trade_id})"
+
+
+def render_order_form():
+    """매수/매도 주문 입력"""
+    st.header("모의 매매 주문" if PAPER_TRADING else "매매 주문")
+    watchlist = get_watchlist()
+    price_help = "0이면 시장가로 모의 체결" if PAPER_TRADING else None
+    
+    for column, action, label in zip(st.columns(2), ("buy", "sell"), ("매수", "매도")):
+        with column:
+            st.subheader(label)
+            currency = st.selectbox("통화 선택", watchlist, key=f"{action}_currency")
+            price = st.number_input("가격 (원)", min_value=0.0, key=f"{action}_price", help=price_help)
+            quantity = st.number_input("수량", min_value=0.0, key=f"{action}_quantity")
+            
+            if st.button(f"{label} 주문", type="primary"):
+                try:
+                    st.success(submit_order(currency, action, price, quantity))
+                except Exception as e:
+                    st.error(f"주문 실패: {e}")
+    
+    if PAPER_TRADING:
+        render_paper_orders()
+
+
+def render_paper_orders():
+    """모의 미체결 주문 목록 및 취소"""
+    exchange = get_paper_exchange()
+    orders = exchange.open_orders()
+    if not orders:
+        return
+    
+    st.subheader("모의 미체결 주문")
+    st.dataframe(
+        pd.DataFrame(orders)[["order_id", "currency", "action", "price", "quantity", "filled_quantity", "timestamp"]],
+        use_container_width=True,
+        hide_index=True
+    )
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        order_id = st.selectbox("취소할 주문", [order["order_id"] for order in orders], key="cancel_order_id")
+    with col2:
+        if st.button("주문 취소"):
+            if exchange.cancel(order_id):
+                exchange.flush()
+                st.success(f"주문이 취소되었습니다. ({order_id})")
+            else:
+                st.warning("이미 체결되었거나 취소된 주문입니다.")
+
+
+@st.fragment
+def render_trade_tab():
+    """거래 탭 (가격/수량 입력이 전체 페이지를 다시 실행하지 않도록 부분 재실행)"""
+    if DASHBOARD_READ_ONLY:
+        st.info("조회 전용 모드입니다. 주문 상태는 데몬이 거래소와 동기화합니다.")
+    else:
+        render_order_form()
+    
+    render_trade_history()
+
+
+def render_trade_history():
+    """거래 내역 (필터/정렬/페이지 나누기는 DB에서 처리하고 현재 페이지만 Arrow로 전송)"""
+    st.subheader("거래 내역")
+    db = st.session_state.db
+    
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+    with col1:
+        currency = st.selectbox("통화", ["전체"] + db.get_trade_currencies(), key="history_currency")
+    with col2:
+        action = st.selectbox("구분", ["전체", "매수", "매도"], key="history_action")
+    with col3:
+        period = st.date_input("기간", value=(), key="history_period")
+    with col4:
+        sort_label = st.selectbox("정렬", list(TRADE_SORT_LABELS), key="history_sort")
+    with col5:
+        descending = st.toggle("내림차순", value=True, key="history_desc")
+    
+    # 기간은 시작일 0시부터 종료일 다음 날 0시 전까지 (하루만 고르면 그날 하루)
+    filters = dict(
+        currency=None if currency == "전체" else currency,
+        action={"매수": "buy", "매도": "sell"}.get(action),
+        start=period[0].isoformat() if period else None,
+        end=(period[-1] + timedelta(days=1)).isoformat() if period else None
+    )
+    total = db.count_trades(**filters)
+    if total == 0:
+        st.info("거래 내역이 없습니다.")
+        return
+    
+    pages = math.ceil(total / TRADE_PAGE_SIZE)
+    page = min(st.number_input(f"페이지 (전체 {pages:,})", min_value=1, step=1, key="history_page"), pages)
+    offset = (page - 1) * TRADE_PAGE_SIZE
+    
+    df = db.get_trades_page(
+        **filters,
+        sort_by=TRADE_SORT_LABELS[sort_label],
+        descending=descending,
+        limit=TRADE_PAGE_SIZE,
+        offset=offset
+    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.caption(f"전체 {total:,}건 중 {offset + 1:,}-{offset + len(df):,}번째")
+
+
+def render_recent_recommendations():
+    """데몬이 저장한 최근 AI 추천 (조회 전용 모드)"""
+    st.subheader("최근 AI 추천")
+    analyses = st.session_state.db.get_latest_analyses(analysis_type="ai_recommendation", limit=30)
+    if not analyses:
+        st.info("저장된 추천이 없습니다. 데몬(daemon.py)이 실행 중인지 확인하세요.")
+        return
+    
+    action_labels = {"buy": "매수", "sell": "매도", "hold": "보유"}
+    df = pd.DataFrame(analyses)
+    df = pd.DataFrame({
+        "시각": df["timestamp"].str[:19].str.replace("T", " "),
+        "통화": df["currency"],
+        "추천": df["action"].map(action_labels),
+        "확신도": df["confidence"],
+        "근거": df["reasons"].map(lambda r: " / ".join(json.loads(r)) if r else "")
+    })
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"확신도": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.2f")}
+    )
+
+
+def render_generation_metrics():
+    """생성 지표 분포 (프롬프트 변경 전후 지연 시간 비교용)"""
+    with st.expander("생성 지표 (최근 분석)"):
+        metrics_rows = st.session_state.db.get_generation_metrics(limit=500)
+        if not metrics_rows:
+            st.info("기록된 생성 지표가 없습니다.")
+        else:
+            metrics_df = pd.DataFrame(metrics_rows)
+            percentiles = metrics_df[["ttft", "latency", "tokens_per_sec"]].quantile([0.5, 0.9, 0.99])
+            percentiles.index = ["p50", "p90", "p99"]
+            
+            st.caption(f"최근 {len(metrics_df)}건 기준")
+            st.markdown("**지연 시간 백분위 (초)**")
+            st.bar_chart(percentiles[["ttft", "latency"]].rename(
+                columns={"ttft": "첫 토큰", "latency": "전체"}
+            ))
+            st.markdown("**생성 속도 백분위 (tokens/sec)**")
+            st.bar_chart(percentiles[["tokens_per_sec"]].rename(
+                columns={"tokens_per_sec": "tokens/sec"}
+            ))
+            st.markdown("**프롬프트 토큰 수별 지연 시간**")
+            st.line_chart(
+                metrics_df.dropna(subset=["prompt_tokens"])
+                .sort_values("prompt_tokens")
+                .set_index("prompt_tokens")[["ttft", "latency"]]
+                .rename(columns={"ttft": "첫 토큰", "latency": "전체"})
+            )
 
 
 def main():
@@ -56,19 +483,52 @@ def main():
     with st.sidebar:
         st.header("⚙️ 설정")
         
-        # 모델 로딩
+        # 모델 로딩 (프로세스당 하나의 모델을 모든 세션이 공유)
         if st.button("모델 로드", type="primary"):
             with st.spinner("모델 로딩 중..."):
                 try:
-                    st.session_state.model = QwenModel(use_lmstudio=USE_LMSTUDIO_API)
-                    st.session_state.model.load_model()
+                    if st.session_state.model is None:
+                        if INFERENCE_OUT_OF_PROCESS:
+                            # 별도 프로세스 워커 풀에서 생성 (모델은 워커가 로드)
+                            st.session_state.model = get_inference_service(use_lmstudio=USE_LMSTUDIO_API)
+                        else:
+                            st.session_state.model_lease = lease_model(use_lmstudio=USE_LMSTUDIO_API)
+                            st.session_state.model = st.session_state.model_lease.model
                     if USE_LMSTUDIO_API:
                         st.success("LM Studio API 연결 완료!")
                     else:
                         st.success("로컬 모델 로딩 완료!")
+                        if not INFERENCE_OUT_OF_PROCESS:
+                            st.caption(st.session_state.model.cold_start_report())
                 except Exception as e:
                     st.error(f"모델 로딩 실패: {e}")
         
+        if st.session_state.model is not None and INFERENCE_OUT_OF_PROCESS:
+            st.caption(
+                f"추론 워커 준비: {st.session_state.model.ready_workers}/{st.session_state.model.num_workers}개, "
+                f"대기 작업: {st.session_state.model.pending}개"
+            )
+        elif st.session_state.model is not None:
+            st.caption(
+                f"공유 모델 사용 세션: {st.session_state.model.ref_count}개, "
+                f"대기 요청: {st.session_state.model.pending}개"
+            )
+            router = st.session_state.model.router
+            if USE_LMSTUDIO_API and len(router.endpoints) > 1:
+                with st.expander("LLM 엔드포인트 상태"):
+                    endpoint_df = pd.DataFrame(router.stats())
+                    endpoint_df = endpoint_df.rename(columns={
+                        'url': 'URL', 'healthy': '정상', 'outstanding': '진행 중',
+                        'requests': '요청', 'failures': '실패', 'mean_latency': '평균(초)',
+                        'p50_latency': 'p50(초)', 'p95_latency': 'p95(초)', 'last_error': '최근 오류'
+                    })
+                    st.dataframe(endpoint_df, use_container_width=True, hide_index=True)
+            if st.button("모델 해제"):
+                st.session_state.model_lease.release()
+                st.session_state.model_lease = None
+                st.session_state.model = None
+                st.rerun()
+        
         # API 연결 테스트
         if st.button("API 연결 테스트"):
             try:
@@ -87,28 +547,20 @@ def main():
     with tab1:
         st.header("시장 현황")
         
-        col1, col2, col3 = st.columns(3)
-        
-        currencies = ["BTC", "ETH", "XRP"]
-        
-        for i, currency in enumerate(currencies):
-            with col1 if i == 0 else col2 if i == 1 else col3:
-                try:
-                    ticker = st.session_state.api.get_ticker(currency)
-                    if ticker and "last" in ticker:
-                        st.metric(
-                            label=currency,
-                            value=f"{float(ticker['last']):,.0f}원",
-                            delta=f"{float(ticker.get('change_rate', 0)) * 100:.2f}%"
-                        )
-                except Exception as e:
-                    st.error(f"{currency} 데이터 로드 실패: {e}")
+        render_market_metrics(WATCHED_CURRENCIES)
         
         # 뉴스 섹션
         st.subheader("최근 뉴스")
-        if st.button("뉴스 새로고침"):
+        if DASHBOARD_READ_ONLY:
+            # 데몬이 수집해 저장한 뉴스
+            for news in st.session_state.db.get_recent_news(limit=10):
+                with st.expander(news['title']):
+                    st.write(news.get('description') or '')
+                    st.write(f"출처: {news.get('source') or 'Unknown'}")
+                    st.write(f"링크: {news.get('url') or ''}")
+        elif st.button("뉴스 새로고침"):
             with st.spinner("뉴스 수집 중..."):
-                scraper = NewsScraper()
+                scraper = get_news_scraper()
                 news_list = scraper.get_crypto_news(method="rss", max_results=5)
                 
                 for news in news_list:
@@ -117,78 +569,9 @@ def main():
                         st.write(f"출처: {news.get('source', 'Unknown')}")
                         st.write(f"링크: {news.get('url', '')}")
     
-    # 탭 2: 거래
+    # 탭 2: 거래 (입력값 변경 시 이 탭만 다시 실행)
     with tab2:
-        st.header("매매 주문")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("매수")
-            buy_currency = st.selectbox("통화 선택", ["BTC", "ETH", "XRP"], key="buy_currency")
-            buy_price = st.number_input("가격 (원)", min_value=0.0, key="buy_price")
-            buy_quantity = st.number_input("수량", min_value=0.0, key="buy_quantity")
-            
-            if st.button("매수 주문", type="primary"):
-                try:
-                    # 실제 주문은 주석 처리 (테스트용)
-                    # result = st.session_state.api.place_order(
-                    #     price=int(buy_price),
-                    #     qty=buy_quantity,
-                    #     currency=buy_currency,
-                    #     order_type="bid"
-                    # )
-                    
-                    # 데이터베이스에 기록
-                    trade_id = st.session_state.db.add_trade(
-                        currency=buy_currency,
-                        action="buy",
-                        price=buy_price,
-                        quantity=buy_quantity,
-                        status="pending",
-                        notes="Streamlit 앱에서 주문"
-                    )
-                    st.success(f"매수 주문이 기록되었습니다. (ID: {trade_id})")
-                except Exception as e:
-                    st.error(f"주문 실패: {e}")
-        
-        with col2:
-            st.subheader("매도")
-            sell_currency = st.selectbox("통화 선택", ["BTC", "ETH", "XRP"], key="sell_currency")
-            sell_price = st.number_input("가격 (원)", min_value=0.0, key="sell_price")
-            sell_quantity = st.number_input("수량", min_value=0.0, key="sell_quantity")
-            
-            if st.button("매도 주문", type="primary"):
-                try:
-                    # 실제 주문은 주석 처리 (테스트용)
-                    # result = st.session_state.api.place_order(
-                    #     price=int(sell_price),
-                    #     qty=sell_quantity,
-                    #     currency=sell_currency,
-                    #     order_type="ask"
-                    # )
-                    
-                    # 데이터베이스에 기록
-                    trade_id = st.session_state.db.add_trade(
-                        currency=sell_currency,
-                        action="sell",
-                        price=sell_price,
-                        quantity=sell_quantity,
-                        status="pending",
-                        notes="Streamlit 앱에서 주문"
-                    )
-                    st.success(f"매도 주문이 기록되었습니다. (ID: {trade_id})")
-                except Exception as e:
-                    st.error(f"주문 실패: {e}")
-        
-        # 거래 내역
-        st.subheader("거래 내역")
-        trades = st.session_state.db.get_trades(limit=50)
-        if trades:
-            df = pd.DataFrame(trades)
-            st.dataframe(df, use_container_width=True)
-        else:
-            st.info("거래 내역이 없습니다.")
+        render_trade_tab()
     
     # 탭 3: 포트폴리오
     with tab3:
@@ -214,62 +597,169 @@ def main():
     with tab4:
         st.header("AI 투자 분석")
         
-        if st.session_state.model is None:
+        if DASHBOARD_READ_ONLY:
+            render_recent_recommendations()
+        elif st.session_state.model is None:
             st.warning("먼저 사이드바에서 모델을 로드하세요.")
         else:
-            analysis_currency = st.selectbox("분석할 통화", ["BTC", "ETH", "XRP"], key="analysis_currency")
+            analysis_currency = st.selectbox("분석할 통화", get_watchlist(), key="analysis_currency")
+            use_cache = st.checkbox("캐시된 분석 결과 사용", value=True, key="use_llm_cache")
+            
+            # 이전 실행에서 제출한 작업이 아직 진행 중이면 진행 상황 표시
+            running_job_id = st.session_state.get("inference_job_id")
+            if INFERENCE_OUT_OF_PROCESS and running_job_id:
+                running_job = st.session_state.model.get(running_job_id)
+                if running_job is not None and not running_job.finished:
+                    st.info(f"진행 중인 분석 작업이 있습니다 (상태: {running_job.status})")
+                    st.markdown(running_job.text)
+                    if st.button("분석 작업 취소"):
+                        st.session_state.model.cancel(running_job_id)
+                        st.rerun()
             
             if st.button("AI 분석 실행", type="primary"):
                 with st.spinner("AI 분석 중..."):
                     try:
-                        # 현재가 가져오기
-                        ticker = st.session_state.api.get_ticker(analysis_currency)
-                        current_price = ticker.get("last", "N/A") if ticker else "N/A"
-                        
-                        # 뉴스 수집
-                        scraper = NewsScraper()
-                        news_list = scraper.get_crypto_news(method="rss", max_results=5)
-                        news_text = scraper.format_news_for_ai(news_list)
+                        # 뉴스 수집 후 프롬프트 구성
+                        scraper = get_news_scraper()
+                        news_list = scraper.get_crypto_news(method="rss", max_results=20)
+                        prompt, prompt_tokens = prepare_analysis_prompt(analysis_currency, scraper, news_list)
+                        st.caption(f"프롬프트 토큰 수: {prompt_tokens:,} / {PROMPT_TOKEN_BUDGET:,}")
                         
-                        # AI 분석 프롬프트 구성
-                        prompt = f"""
-당신은 암호화폐 투자 분석가입니다. 다음 정보를 바탕으로 {analysis_currency}에 대한 투자 의견을 제시해주세요.
-
-현재 가격: {current_price}원
-
-{news_text}
-
-분석 요청사항:
-1. 현재 시장 상황 분석
-2. 기술적 분석
-3. 투자 추천 (매수/매도/보유)
-4. 이유 설명
-
-분석 결과를 한국어로 작성해주세요.
-"""
-                        
-                        # AI 분석 실행
-                        analysis_result = st.session_state.model.generate(
-                            prompt=prompt,
+                        # AI 분석 실행 (생성되는 토큰을 바로 표시)
+                        st.subheader("AI 분석 결과")
+                        result_placeholder = st.empty()
+                        generation_metrics = {}
+                        generation_kwargs = dict(
                             max_length=1024,
                             temperature=0.7,
-                            model_name=LM_STUDIO_MODEL_NAME if USE_LMSTUDIO_API else None
+                            model_name=LM_STUDIO_MODEL_NAME if USE_LMSTUDIO_API else None,
+                            use_cache=use_cache,
+                            metrics=generation_metrics
                         )
+                        if INFERENCE_OUT_OF_PROCESS:
+                            # 워커 프로세스에 작업 제출 후 결과 폴링
+                            job = st.session_state.model.submit(prompt, **generation_kwargs)
+                            st.session_state.inference_job_id = job.job_id
+                            stream = job.stream()
+                        else:
+                            stream = st.session_state.model.generate_stream(prompt=prompt, **generation_kwargs)
                         
-                        st.subheader("AI 분석 결과")
-                        st.write(analysis_result)
+                        chunks = []
+                        for chunk in stream:
+                            chunks.append(chunk)
+                            result_placeholder.markdown("".join(chunks))
+                        analysis_result = "".join(chunks)
+                        
+                        if INFERENCE_OUT_OF_PROCESS and job.status == "cancelled":
+                            raise RuntimeError("분석 작업이 취소되었습니다")
                         
-                        # 분석 결과 저장
+                        if generation_metrics.get("latency") is not None:
+                            st.caption(format_generation_metrics(generation_metrics))
+                        
+                        # 분석 결과 저장 (캐시 응답은 지표 없이 저장)
                         st.session_state.db.add_analysis(
                             currency=analysis_currency,
                             analysis_type="ai_analysis",
-                            content=analysis_result
+                            content=analysis_result,
+                            metrics=None if generation_metrics.get("cached") else generation_metrics
                         )
                         
                         st.success("분석 완료 및 저장됨")
                         
+                        if st.session_state.model.cache is not None:
+                            cache_stats = st.session_state.model.cache.stats()
+                            st.caption(
+                                f"LLM 캐시 적중률: {cache_stats['hit_rate']:.0%} "
+                                f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+                                f"저장된 응답 {cache_stats['entries']}개"
+                            )
+                        
                     except Exception as e:
                         st.error(f"AI 분석 실패: {e}")
+            
+            # 구조화된 추천 (짧은 JSON 응답, 필드별로 DB에 저장)
+            if st.button("빠른 추천 (매수/매도/보유)"):
+                with st.spinner("추천 생성 중..."):
+                    try:
+                        scraper = get_news_scraper()
+                        news_list = scraper.get_crypto_news(method="rss", max_results=20)
+                        prompt, _ = prepare_analysis_prompt(
+                            analysis_currency, scraper, news_list, structured=True
+                        )
+                        recommendation_metrics = {}
+                        recommendation = generate_recommendation(
+                            st.session_state.model,
+                            prompt,
+                            model_name=LM_STUDIO_MODEL_NAME if USE_LMSTUDIO_API else None,
+                            use_cache=use_cache,
+                            metrics=recommendation_metrics
+                        )
+                        
+                        action_labels = {"buy": "매수", "sell": "매도", "hold": "보유"}
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric("추천", action_labels[recommendation["action"]])
+                        with col2:
+                            st.metric("확신도", f"{recommendation['confidence']:.0%}")
+                        for reason in recommendation["reasons"]:
+                            st.markdown(f"- {reason}")
+                        if recommendation_metrics.get("latency") is not None:
+                            st.caption(format_generation_metrics(recommendation_metrics))
+                        
+                        st.session_state.db.add_analysis(
+                            currency=analysis_currency,
+                            analysis_type="ai_recommendation",
+                            content=recommendation["raw"],
+                            action=recommendation["action"],
+                            confidence=recommendation["confidence"],
+                            reasons=recommendation["reasons"],
+                            metrics=None if recommendation_metrics.get("cached") else recommendation_metrics
+                        )
+                        st.success("추천 저장됨")
+                        
+                    except Exception as e:
+                        st.error(f"추천 생성 실패: {e}")
+            
+            # 관심 코인 전체 분석 (한 번의 배치 생성)
+            st.markdown("---")
+            if st.button(f"관심 코인 전체 분석 ({', '.join(WATCHED_CURRENCIES)})"):
+                with st.spinner("관심 코인 일괄 분석 중..."):
+                    try:
+                        scraper = get_news_scraper()
+                        news_list = scraper.get_crypto_news(method="rss", max_results=20)
+                        prompts = [
+                            prepare_analysis_prompt(currency, scraper, news_list)[0]
+                            for currency in WATCHED_CURRENCIES
+                        ]
+                        
+                        results = st.session_state.model.generate_batch(
+                            prompts,
+                            max_length=1024,
+                            temperature=0.7,
+                            model_name=LM_STUDIO_MODEL_NAME if USE_LMSTUDIO_API else None,
+                            use_cache=use_cache
+                        )
+                        
+                        for currency, result in zip(WATCHED_CURRENCIES, results):
+                            label = "캐시" if result["cached"] else f"{result['elapsed']:.1f}초"
+                            with st.expander(f"{currency} 분석 결과 ({label})", expanded=True):
+                                if result["error"]:
+                                    st.error(f"{currency} 분석 실패: {result['error']}")
+                                    continue
+                                st.markdown(result["text"])
+                                st.session_state.db.add_analysis(
+                                    currency=currency,
+                                    analysis_type="ai_analysis",
+                                    content=result["text"],
+                                    metrics=None if result["cached"] else {"latency": result["elapsed"]}
+                                )
+                        
+                        st.success("관심 코인 분석 완료 및 저장됨")
+                        
+                    except Exception as e:
+                        st.error(f"일괄 분석 실패: {e}")
+        
+        render_generation_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""
+저장된 캔들 이력으로 규칙 전략과 AI 추천(analysis 테이블)의 성과 비교
+
+사용법:
+    python backtest.py [통화 ...]              # 기본: WATCHED_CURRENCIES
+    python backtest.py BTC --sweep              # 전략별 파라미터 탐색 (여러 프로세스)
+    python backtest.py BTC --no-refresh         # 거래소 조회 없이 DB에 저장된 캔들만 사용 (슬리피지 0)
+"""
+
+import argparse
+import logging
+import time
+from config import BACKTEST_CAPITAL, INDICATOR_INTERVAL, WATCHED_CURRENCIES
+from data.coinone_api import CoinoneAPI
+from db.database import TradingDatabase
+from utils.backtest import (
+    DEFAULT_GRIDS, MIN_COMBOS_PER_WORKER, STRATEGIES, attach_recommendations, depth_slippage, run_backtest, sweep
+)
+from utils.indicators import refresh_candles
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def format_row(name: str, metrics: dict) -> str:
+    return (
+        f"{name:<28}{metrics['total_return']:>10.1%}{metrics['benchmark_return']:>10.1%}"
+        f"{metrics['max_drawdown']:>10.1%}{metrics['sharpe']:>8.2f}{int(metrics['trades']):>8}"
+        f"{metrics['exposure']:>8.0%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캔들 이력 백테스트")
+    parser.add_argument("currencies", nargs="*", default=WATCHED_CURRENCIES)
+    parser.add_argument("--interval", default=INDICATOR_INTERVAL)
+    parser.add_argument("--candles", type=int, default=500, help="거래소에서 받아 저장할 최근 봉 개수")
+    parser.add_argument("--sweep", action="store_true", help="DEFAULT_GRIDS 파라미터 탐색")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="파라미터 탐색 프로세스 수 (기본값: BACKTEST_WORKERS, 0이면 CPU 수 안에서 "
+             f"프로세스당 조합이 {MIN_COMBOS_PER_WORKER}개 이상이 되도록 자동, 1이면 현재 프로세스)"
+    )
+    parser.add_argument("--no-refresh", action="store_true")
+    args = parser.parse_args()
+
+    db = TradingDatabase()
+    api = None if args.no_refresh else CoinoneAPI()
+
+    for currency in (c.upper() for c in args.currencies):
+        slippage = 0.0
+        if api is not None:
+            refresh_candles(api, db, currency, interval=args.interval, size=args.candles)
+            slippage = depth_slippage(api.get_orderbook(currency), BACKTEST_CAPITAL)
+
+        candles = db.get_candles(currency, args.interval)
+        if len(candles["close"]) < 2:
+            print(f"\n[{currency}] 저장된 {args.interval} 캔들이 부족합니다.")
+            continue
+        data = attach_recommendations(candles, db.get_recommendations(currency), args.interval)
+
+        print(f"\n[{currency}] {args.interval}봉 {len(candles['close'])}개, "
+              f"AI 추천 {len(data['rec_index'])}건, 슬리피지 {slippage:.3%} (주문 {BACKTEST_CAPITAL:,.0f}원 기준)")
+        print("=" * 82)
+        print(f"{'전략':<26}{'수익률':>8}{'보유 수익률':>7}{'최대 낙폭':>7}{'샤프':>7}{'거래':>6}{'보유 비중':>6}")
+        print("=" * 82)
+        for strategy in STRATEGIES:
+            metrics, _ = run_backtest(data, strategy, slippage=slippage, interval=args.interval)
+            print(format_row(strategy, metrics))
+
+        if args.sweep:
+            for strategy in STRATEGIES:
+                started = time.perf_counter()
+                results = sweep(data, strategy, slippage=slippage, interval=args.interval, workers=args.workers)
+                elapsed = time.perf_counter() - started
+                print(f"\n{strategy}: {len(results)}개 조합, {elapsed:.1f}초 "
+                      f"({len(results) / elapsed * 60:,.0f}회/분), 샤프 상위 5개")
+                for _, row in results.head(5).iterrows():
+                    params = ", ".join(f"{key}={row[key]:g}" for key in DEFAULT_GRIDS[strategy])
+                    print(format_row(params, row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+CPU 추론 모드별 생성 속도 비교 스크립트 (fp32 / int8 / bf16)
+
+사용법:
+    python bench_cpu_modes.py [모드 ...]    # 기본: fp32 int8
+"""
+
+import sys
+import logging
+from config import QWEN_MODEL_PATH
+from models.qwen_local import QwenModel
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    modes = sys.argv[1:] or ["fp32", "int8"]
+    results = []
+
+    for mode in modes:
+        print(f"\n[{mode}] 모델 로드 중: {QWEN_MODEL_PATH}")
+        model = QwenModel(use_lmstudio=False, cpu_mode=mode)
+        model.load_model()
+        if model.device != "cpu":
+            print("CUDA가 감지되어 CPU 모드 비교를 건너뜁니다.")
+            return
+        # 첫 실행은 워밍업으로 버림
+        model.benchmark(max_new_tokens=8)
+        results.append(model.benchmark())
+        model.model = None
+
+    print("\n" + "=" * 50)
+    print(f"{'모드':<8}{'토큰':>8}{'시간(초)':>12}{'tokens/sec':>14}")
+    print("=" * 50)
+    baseline = results[0]["tokens_per_sec"]
+    for result in results:
+        speedup = result["tokens_per_sec"] / baseline if baseline else 0.0
+        print(
+            f"{result['mode']:<8}{result['new_tokens']:>8}{result['seconds']:>12.2f}"
+            f"{result['tokens_per_sec']:>14.2f}  (x{speedup:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
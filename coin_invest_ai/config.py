@@ -18,14 +18,106 @@ COINONE_SECRET_KEY = os.getenv("COINONE_SECRET_KEY", "78df0684-d7a8-4044-882b-e7
 # Qwen 모델 경로 (로컬 모델 사용 시)
 QWEN_MODEL_PATH = os.getenv("QWEN_MODEL_PATH", "/Users/eddie/.lmstudio/hub/models/qwen/qwen3-vl-8b")
 
+# CPU 추론 설정 (로컬 모델, CUDA가 없을 때)
+# QWEN_CPU_MODE: "fp32" (기본), "int8" (Linear 레이어 동적 양자화), "bf16"
+QWEN_CPU_MODE = os.getenv("QWEN_CPU_MODE", "fp32").lower()
+QWEN_INTRA_OP_THREADS = int(os.getenv("QWEN_INTRA_OP_THREADS", "0"))  # 0이면 torch 기본값
+QWEN_INTER_OP_THREADS = int(os.getenv("QWEN_INTER_OP_THREADS", "0"))
+# 보조(speculative) 디코딩용 소형 초안 모델 경로 (예: Qwen2.5-0.5B-Instruct, 비우면 사용 안 함)
+# 본 모델과 같은 토크나이저를 써야 함
+QWEN_DRAFT_MODEL_PATH = os.getenv("QWEN_DRAFT_MODEL_PATH", "")
+
+# 모델 로드 직후 짧은 생성으로 워밍업 (첫 요청 지연 감소)
+QWEN_WARMUP = os.getenv("QWEN_WARMUP", "true").lower() == "true"
+# 양자화된 모델 저장 위치 (다음 로드부터 변환 생략)
+QWEN_QUANTIZED_DIR = Path(os.getenv("QWEN_QUANTIZED_DIR", str(ROOT_DIR / "models" / "quantized")))
+
 # LM Studio API 설정
 USE_LMSTUDIO_API = os.getenv("USE_LMSTUDIO_API", "true").lower() == "true"
 LM_STUDIO_API_URL = os.getenv("LM_STUDIO_API_URL", "http://localhost:1234/v1")
 LM_STUDIO_MODEL_NAME = os.getenv("LM_STUDIO_MODEL_NAME", "local-model")  # 또는 "qwen/qwen3-vl-8b"
+# 여러 OpenAI 호환 서버에 분산할 경우 쉼표로 구분 (비우면 LM_STUDIO_API_URL 하나만 사용)
+LM_STUDIO_API_URLS = [
+    u.strip() for u in os.getenv("LM_STUDIO_API_URLS", LM_STUDIO_API_URL).split(",") if u.strip()
+]
+# 엔드포인트 헬스 체크 주기 (초, 0이면 사용 안 함) 및 실패한 엔드포인트 재시도 대기 시간 (초)
+LLM_HEALTH_CHECK_INTERVAL = int(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "30"))
+LLM_ENDPOINT_COOLDOWN_SECONDS = int(os.getenv("LLM_ENDPOINT_COOLDOWN_SECONDS", "15"))
+# 배치 생성 시 LM Studio로 동시에 보낼 최대 요청 수
+LM_STUDIO_MAX_IN_FLIGHT = int(os.getenv("LM_STUDIO_MAX_IN_FLIGHT", "3"))
+
+# 대시보드 시세 자동 갱신 주기 (초, 백그라운드 스레드가 조회)
+MARKET_REFRESH_SECONDS = int(os.getenv("MARKET_REFRESH_SECONDS", "5"))
+
+# 거래소/뉴스 HTTP 클라이언트 호스트당 유지 연결 수 (세션 간 공유)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# 기술적 지표 계산용 캔들 (봉 간격: 1m, 5m, 15m, 30m, 1h, 4h, 1d 등) 및 조회할 봉 개수
+INDICATOR_INTERVAL = os.getenv("INDICATOR_INTERVAL", "1h")
+INDICATOR_CANDLES = int(os.getenv("INDICATOR_CANDLES", "200"))
+
+# 모의 체결 (대시보드 주문을 거래소 대신 모의 호가창에서 체결) 및 현재가로 만든 호가의 잔량 (기본값: 무제한)
+PAPER_TRADING = os.getenv("PAPER_TRADING", "true").lower() == "true"
+PAPER_TICK_QUANTITY = float(os.getenv("PAPER_TICK_QUANTITY", "inf"))
+
+# 백테스트 (backtest.py): 초기 자금 (원), 거래 수수료율, 파라미터 탐색 프로세스 수 (0이면 CPU 수)
+BACKTEST_CAPITAL = float(os.getenv("BACKTEST_CAPITAL", "1000000"))
+BACKTEST_FEE_RATE = float(os.getenv("BACKTEST_FEE_RATE", "0.002"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "0"))
+
+# 헤드리스 데몬(daemon.py) 작업 주기 (초, 0이면 해당 작업 사용 안 함)
+DAEMON_MARKET_INTERVAL = int(os.getenv("DAEMON_MARKET_INTERVAL", str(MARKET_REFRESH_SECONDS)))
+DAEMON_CANDLE_INTERVAL = int(os.getenv("DAEMON_CANDLE_INTERVAL", "300"))
+DAEMON_NEWS_INTERVAL = int(os.getenv("DAEMON_NEWS_INTERVAL", "600"))
+DAEMON_ANALYSIS_INTERVAL = int(os.getenv("DAEMON_ANALYSIS_INTERVAL", "3600"))
+DAEMON_RECONCILE_INTERVAL = int(os.getenv("DAEMON_RECONCILE_INTERVAL", "5"))
+# 종료 신호 후 진행 중인 작업을 기다리는 최대 시간 (초)
+DAEMON_SHUTDOWN_TIMEOUT = int(os.getenv("DAEMON_SHUTDOWN_TIMEOUT", "30"))
+
+# 대시보드를 DB 조회 전용으로 실행 (수집/분석/주문 동기화는 데몬이 담당)
+DASHBOARD_READ_ONLY = os.getenv("DASHBOARD_READ_ONLY", "false").lower() == "true"
+
+# 구조화된 추천(JSON) 모드 최대 생성 토큰 수
+RECOMMENDATION_MAX_NEW_TOKENS = int(os.getenv("RECOMMENDATION_MAX_NEW_TOKENS", "160"))
+
+# 관심 코인 (전체 분석 대상)
+WATCHED_CURRENCIES = [
+    c.strip().upper() for c in os.getenv("WATCHED_CURRENCIES", "BTC,ETH,XRP").split(",") if c.strip()
+]
+
+# 대시보드 관심 종목 (쉼표로 구분, "ALL"이면 코인원 원화 마켓 전체) 및 시세표 페이지당 행 수
+WATCHLIST = [
+    c.strip().upper() for c in os.getenv("WATCHLIST", ",".join(WATCHED_CURRENCIES)).split(",") if c.strip()
+]
+WATCHLIST_PAGE_SIZE = int(os.getenv("WATCHLIST_PAGE_SIZE", "50"))
+
+# 공유 모델 요청 처리 스레드 수 (LM Studio API 모드, 로컬 모델은 항상 1)
+SHARED_MODEL_API_WORKERS = int(os.getenv("SHARED_MODEL_API_WORKERS", "4"))
+
+# 별도 프로세스 추론 워커 (Streamlit 스크립트 스레드에서 생성하지 않음)
+INFERENCE_OUT_OF_PROCESS = os.getenv("INFERENCE_OUT_OF_PROCESS", "false").lower() == "true"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_TORCH_THREADS = int(
+    os.getenv("INFERENCE_TORCH_THREADS", str(max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)))
+)
+# 추론 작업 최대 대기 시간 (초, 큐 대기 포함)
+INFERENCE_JOB_TIMEOUT = float(os.getenv("INFERENCE_JOB_TIMEOUT", "600"))
+
+# 프롬프트 토큰 예산 (뉴스/시장 정보를 이 크기에 맞춰 채움)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2048"))
+
+# 분석 프롬프트 고정 지시문의 KV 캐시 재사용 (로컬 모델)
+PREFIX_KV_CACHE_ENABLED = os.getenv("PREFIX_KV_CACHE_ENABLED", "true").lower() == "true"
 
 # 데이터베이스 경로
 DB_PATH = ROOT_DIR / "db" / "trading.db"
 
+# LLM 응답 캐시 (모델/프롬프트/샘플링 파라미터가 같으면 저장된 응답 재사용)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(ROOT_DIR / "db" / "llm_cache.db"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "1800"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
 # 뉴스 API 설정 (옵션)
 NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
 RSS_FEED_URLS = [
@@ -33,6 +125,26 @@ RSS_FEED_URLS = [
     # 추가 RSS 피드 URL
 ]
 
+# 통화별 뉴스 검색 별칭 (뉴스 관련도 색인에 사용)
+CURRENCY_ALIASES = {
+    "BTC": ["bitcoin", "비트코인"],
+    "ETH": ["ethereum", "ether", "이더리움"],
+    "XRP": ["ripple", "리플"],
+}
+
+# 관련 뉴스 색인에 유지할 최대 기사 수 (초과 시 오래 색인된 기사부터 제거, 시작 시 DB에서 이만큼 불러옴)
+NEWS_INDEX_MAX_ARTICLES = int(os.getenv("NEWS_INDEX_MAX_ARTICLES", "5000"))
+
+# 뉴스 벡터 색인 설정 (해시 임베딩 차원, 중복 판단 코사인 유사도)
+NEWS_VECTOR_DIM = int(os.getenv("NEWS_VECTOR_DIM", "512"))
+NEWS_DEDUP_THRESHOLD = float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.85"))
+
+# 뉴스 감성 채점 방식 ("lexicon": 로컬 감성 사전, "llm": 로드된 모델로 일괄 채점)
+SENTIMENT_SCORER = os.getenv("SENTIMENT_SCORER", "lexicon")
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "20"))
+# 감성 요약이 있을 때 프롬프트에 원문 뉴스를 넣을 최대 토큰 수 (요약이 뉴스를 대신함, 0이면 요약만)
+SENTIMENT_NEWS_BUDGET = int(os.getenv("SENTIMENT_NEWS_BUDGET", "256"))
+
 # 로깅 설정
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
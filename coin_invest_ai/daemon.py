@@ -0,0 +1,234 @@
+"""
+헤드리스 트레이딩 데몬: asyncio 이벤트 루프에서 시세/캔들 수집, 뉴스 수집, 관심 코인 AI 분석,
+미체결 주문 상태 동기화를 주기적으로 실행하고 결과를 DB에 저장
+
+대시보드는 DASHBOARD_READ_ONLY=true로 실행하면 데몬이 저장한 DB만 읽는다.
+
+사용법:
+    python -m coin_invest_ai.daemon    # 저장소 루트에서
+    python daemon.py                   # coin_invest_ai 디렉토리에서
+"""
+
+import sys
+from pathlib import Path
+
+# 패키지 경로(-m coin_invest_ai.daemon)로 실행해도 기존 모듈 import가 동작하도록
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import asyncio
+import logging
+import signal
+import threading
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    DAEMON_ANALYSIS_INTERVAL, DAEMON_CANDLE_INTERVAL, DAEMON_MARKET_INTERVAL, DAEMON_NEWS_INTERVAL,
+    DAEMON_RECONCILE_INTERVAL, DAEMON_SHUTDOWN_TIMEOUT, LM_STUDIO_MODEL_NAME, LOG_LEVEL,
+    USE_LMSTUDIO_API, WATCHED_CURRENCIES
+)
+from data.coinone_api import CoinoneAPI
+from data.market_feed import resolve_watchlist
+from data.order_reconciler import OrderReconciler
+from db.database import TradingDatabase
+from models.model_registry import acquire_model, release_model
+from utils.indicators import refresh_candles
+from utils.news_scraper import NewsScraper
+from utils.prompt_builder import prepare_currency_prompt
+from utils.recommendation import generate_recommendation
+
+logger = logging.getLogger(__name__)
+
+
+class TradingDaemon:
+    """주기 작업 스케줄러 (네트워크/DB/모델 호출은 스레드에서 실행)"""
+
+    def __init__(self, currencies: List[str] = None, db: TradingDatabase = None,
+                 api: CoinoneAPI = None, scraper: NewsScraper = None,
+                 use_lmstudio: bool = None, intervals: Dict[str, int] = None):
+        """
+        Args:
+            currencies: 대상 통화 코드 목록 (기본값: WATCHED_CURRENCIES)
+            db: TradingDatabase 인스턴스 (기본값: 새 인스턴스)
+            api: CoinoneAPI 인스턴스 (기본값: 새 인스턴스)
+            scraper: NewsScraper 인스턴스 (기본값: 새 인스턴스)
+            use_lmstudio: LM Studio API 사용 여부 (기본값: USE_LMSTUDIO_API)
+            intervals: 작업별 주기 (초, "market", "candles", "news", "analysis", "reconcile", 0이면 사용 안 함)
+        """
+        self.currencies = [c.upper() for c in (currencies or WATCHED_CURRENCIES)]
+        self.db = db or TradingDatabase()
+        self.api = api or CoinoneAPI()
+        self.scraper = scraper or NewsScraper()
+        self.scraper.load_stored_news(self.db)
+        self.use_lmstudio = USE_LMSTUDIO_API if use_lmstudio is None else use_lmstudio
+        self.intervals = {
+            "market": DAEMON_MARKET_INTERVAL,
+            "candles": DAEMON_CANDLE_INTERVAL,
+            "news": DAEMON_NEWS_INTERVAL,
+            "analysis": DAEMON_ANALYSIS_INTERVAL,
+            "reconcile": DAEMON_RECONCILE_INTERVAL,
+        }
+        self.intervals.update(intervals or {})
+        self.reconciler = OrderReconciler(self.db, self.api)
+        self.model = None
+        self._news_list: List[Dict] = []
+        self._stop: Optional[asyncio.Event] = None
+        # 스레드에서 실행 중인 작업도 통화 단위로 종료 요청을 확인
+        self._stopping = threading.Event()
+
+    def poll_market(self):
+        """원화 마켓 현재가를 한 번에 조회하여 대상 통화와 관심 종목 시세 저장 (실패 시 대상 통화별 조회)"""
+        all_tickers = self.api.get_all_tickers()
+        if all_tickers:
+            targets = set(self.currencies) | set(resolve_watchlist(list(all_tickers)))
+            tickers = {c: all_tickers[c] for c in targets if c in all_tickers}
+        else:
+            tickers = {}
+            for currency in self.currencies:
+                ticker = self.api.get_ticker(currency)
+                if ticker and "last" in ticker:
+                    tickers[currency] = ticker
+
+        self.db.add_tickers(tickers)
+        missing = [c for c in self.currencies if c not in tickers]
+        if missing:
+            logger.warning(f"시세 조회 실패: {', '.join(missing)}")
+
+    def poll_candles(self):
+        """대상 통화별 완성된 캔들 저장 (지표는 분석 시 새 봉만 증분 반영)"""
+        for currency in self.currencies:
+            if self._stopping.is_set():
+                return
+            refresh_candles(self.api, self.db, currency)
+
+    def ingest_news(self):
+        """뉴스를 수집하여 색인하고 저장"""
+        news_list = self.scraper.get_crypto_news(method="rss", max_results=20)
+        self.db.add_news(news_list)
+        if news_list:
+            self._news_list = news_list
+
+    def analyze(self):
+        """대상 통화별 구조화된 추천을 생성하여 저장 (모델은 처음 실행 시 로드)"""
+        if self.model is None:
+            self.model = acquire_model(use_lmstudio=self.use_lmstudio)
+
+        news_list = self._news_list or self.scraper.get_crypto_news(method="rss", max_results=20)
+        tickers = self.db.get_latest_tickers()
+
+        for currency in self.currencies:
+            if self._stopping.is_set():
+                return
+            ticker = tickers.get(currency) or self.api.get_ticker(currency)
+            current_price = ticker.get("last", "N/A") if ticker else "N/A"
+
+            prompt, _ = prepare_currency_prompt(
+                currency, current_price, self.scraper, news_list,
+                db=self.db, model=self.model, structured=True
+            )
+            metrics = {}
+            try:
+                recommendation = generate_recommendation(
+                    self.model,
+                    prompt,
+                    model_name=LM_STUDIO_MODEL_NAME if self.use_lmstudio else None,
+                    metrics=metrics
+                )
+            except ValueError:
+                # 형식 오류는 generate_recommendation에서 기록, 다음 주기에 다시 시도
+                continue
+
+            self.db.add_analysis(
+                currency=currency,
+                analysis_type="ai_recommendation",
+                content=recommendation["raw"],
+                action=recommendation["action"],
+                confidence=recommendation["confidence"],
+                reasons=recommendation["reasons"],
+                metrics=None if metrics.get("cached") else metrics
+            )
+            logger.info(f"{currency} 추천: {recommendation['action']} ({recommendation['confidence']:.0%})")
+
+    def reconcile_orders(self):
+        """거래소 미체결/체결 내역을 로컬 매매 기록에 증분 반영 (미체결 주문이 없으면 API 호출 없음)"""
+        self.reconciler.reconcile()
+
+    async def _every(self, name: str, interval: int, job: Callable[[], None]):
+        """종료 요청 전까지 interval 초마다 job 실행 (실행 시간은 주기에서 뺌)"""
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            started = loop.time()
+            try:
+                await asyncio.to_thread(job)
+            except Exception as e:
+                logger.error(f"{name} 작업 실패: {e}")
+
+            wait = max(0.0, interval - (loop.time() - started))
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        """종료 요청 (이벤트 루프 스레드에서 호출)"""
+        self._stopping.set()
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self):
+        """모든 주기 작업을 시작하고 종료 신호(SIGINT/SIGTERM)까지 실행"""
+        self._stop = asyncio.Event()
+        self._stopping.clear()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows 또는 메인 스레드가 아닌 경우 (KeyboardInterrupt로 종료)
+                pass
+
+        jobs = {
+            "market": self.poll_market,
+            "candles": self.poll_candles,
+            "news": self.ingest_news,
+            "analysis": self.analyze,
+            "reconcile": self.reconcile_orders,
+        }
+        tasks = [
+            asyncio.create_task(self._every(name, self.intervals[name], job), name=f"daemon-{name}")
+            for name, job in jobs.items()
+            if self.intervals[name] > 0
+        ]
+        logger.info(
+            f"데몬 시작: {', '.join(self.currencies)} "
+            f"({', '.join(f'{name} {self.intervals[name]}초' for name in jobs if self.intervals[name] > 0)})"
+        )
+
+        try:
+            await self._stop.wait()
+        finally:
+            self.stop()
+            logger.info("데몬 종료 중: 진행 중인 작업 대기")
+            if tasks:
+                _, unfinished = await asyncio.wait(tasks, timeout=DAEMON_SHUTDOWN_TIMEOUT)
+                for task in unfinished:
+                    logger.warning(f"종료 대기 시간 초과, 작업 취소: {task.get_name()}")
+                    task.cancel()
+            if self.model is not None:
+                release_model(self.model)
+                self.model = None
+            logger.info("데몬 종료")
+
+
+def main():
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(TradingDaemon().run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
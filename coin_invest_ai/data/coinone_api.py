@@ -2,14 +2,16 @@
 코인원 API 연동 모듈
 """
 
-import requests
 import hashlib
 import hmac
 import time
 import json
 import base64
-from typing import Dict, List, Optional
+import uuid
+import itertools
+from typing import Dict, List, Optional, Tuple
 from config import COINONE_ACCESS_TOKEN, COINONE_SECRET_KEY
+from utils.http_session import create_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,17 +30,20 @@ class CoinoneAPI:
         """
         self.access_token = access_token or COINONE_ACCESS_TOKEN
         self.secret_key = secret_key or COINONE_SECRET_KEY
+        # 연결 재사용 (앱에서는 프로세스당 하나의 인스턴스를 공유)
+        self.session = create_session()
         
         if not self.access_token or not self.secret_key:
             logger.warning("Access Token 또는 Secret Key가 설정되지 않았습니다.")
     
-    def _prepare_private_api_request(self, payload: Dict) -> tuple:
+    def _prepare_private_api_request(self, payload: Dict, version: str = "v2") -> tuple:
         """
         Private API 요청을 위한 페이로드 및 헤더 준비
         코인원 API 문서에 따른 정확한 인증 방식 구현
         
         Args:
             payload: 요청 페이로드 딕셔너리
+            version: API 버전 ("v2" 또는 "v2.1", nonce 형식이 다름)
             
         Returns:
             (encoded_payload, headers) 튜플
@@ -47,7 +52,10 @@ class CoinoneAPI:
         """
         # 페이로드에 기본 필드 추가
         payload['access_token'] = self.access_token
-        payload['nonce'] = int(time.time() * 1000)  # V2.0 API: 정수 형태의 타임스탬프
+        if version == "v2.1":
+            payload['nonce'] = str(uuid.uuid4())  # V2.1 API: 요청마다 새 UUID
+        else:
+            payload['nonce'] = int(time.time() * 1000)  # V2.0 API: 정수 형태의 타임스탬프
         
         # JSON 문자열로 변환
         json_payload = json.dumps(payload, separators=(',', ':'))
@@ -86,7 +94,7 @@ class CoinoneAPI:
             url = f"{BASE_URL}/ticker"
             params = {"currency": currency}
             
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             return response.json()
@@ -95,6 +103,88 @@ class CoinoneAPI:
             logger.error(f"현재가 조회 실패: {e}")
             return {}
     
+    def get_all_tickers(self, quote_currency: str = "KRW") -> Dict[str, Dict]:
+        """
+        마켓 전체 현재가 일괄 조회 (요청 한 번)
+        
+        Args:
+            quote_currency: 기준 통화 (기본값: KRW)
+            
+        Returns:
+            {통화 코드: {"last", "first", "high", "low", "volume", "quote_volume",
+             "change_rate", "timestamp"}} 딕셔너리 (가격/거래량은 float)
+        """
+        try:
+            url = f"{BASE_URL}/public/v2/ticker_new/{quote_currency.upper()}"
+            
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("result") != "success":
+                raise ValueError(f"응답 오류: {data.get('error_code')}")
+            
+            tickers = {}
+            for item in data.get("tickers", []):
+                last = float(item["last"])
+                # 전일 종가 대비 변동률 (전일 값이 없으면 당일 시가 대비)
+                base = float(item.get("yesterday_last") or item.get("first") or 0)
+                tickers[item["target_currency"].upper()] = {
+                    "last": last,
+                    "first": float(item.get("first") or 0),
+                    "high": float(item.get("high") or 0),
+                    "low": float(item.get("low") or 0),
+                    "volume": float(item.get("target_volume") or 0),
+                    "quote_volume": float(item.get("quote_volume") or 0),
+                    "change_rate": (last - base) / base if base else 0.0,
+                    "timestamp": item.get("timestamp")
+                }
+            return tickers
+            
+        except Exception as e:
+            logger.error(f"전체 현재가 조회 실패: {e}")
+            return {}
+    
+    def get_candles(self, currency: str = "BTC", interval: str = "1h", size: int = 200,
+                    quote_currency: str = "KRW") -> List[Dict]:
+        """
+        캔들(봉) 조회
+        
+        Args:
+            currency: 통화 코드
+            interval: 봉 간격 (1m, 3m, 5m, 10m, 15m, 30m, 1h, 2h, 4h, 6h, 1d, 1w, 1mon)
+            size: 조회할 봉 개수 (최대 500)
+            quote_currency: 기준 통화 (기본값: KRW)
+            
+        Returns:
+            {"timestamp"(ms), "open", "high", "low", "close", "volume"} 딕셔너리 목록 (오래된 순)
+        """
+        try:
+            url = f"{BASE_URL}/public/v2/chart/{quote_currency.upper()}/{currency.upper()}"
+            params = {"interval": interval, "size": size}
+            
+            response = self.session.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("result") != "success":
+                raise ValueError(f"응답 오류: {data.get('error_code')}")
+            
+            candles = [
+                {
+                    "timestamp": int(item["timestamp"]),
+                    "open": float(item["open"]),
+                    "high": float(item["high"]),
+                    "low": float(item["low"]),
+                    "close": float(item["close"]),
+                    "volume": float(item.get("target_volume") or 0)
+                }
+                for item in data.get("chart", [])
+            ]
+            return sorted(candles, key=lambda candle: candle["timestamp"])
+            
+        except Exception as e:
+            logger.error(f"캔들 조회 실패: {e}")
+            return []
+    
     def get_orderbook(self, currency: str = "BTC") -> Dict:
         """
         호가 조회
@@ -109,7 +199,7 @@ class CoinoneAPI:
             url = f"{BASE_URL}/orderbook"
             params = {"currency": currency}
             
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             return response.json()
@@ -132,7 +222,7 @@ class CoinoneAPI:
             encoded_payload, headers = self._prepare_private_api_request({})
             
             # Request Body에 Base64 인코딩된 페이로드 전송
-            response = requests.post(url, data=encoded_payload, headers=headers, timeout=10)
+            response = self.session.post(url, data=encoded_payload, headers=headers, timeout=10)
             response.raise_for_status()
             
             result = response.json()
@@ -176,7 +266,7 @@ class CoinoneAPI:
             })
             
             # Request Body에 Base64 인코딩된 페이로드 전송
-            response = requests.post(url, data=encoded_payload, headers=headers, timeout=10)
+            response = self.session.post(url, data=encoded_payload, headers=headers, timeout=10)
             response.raise_for_status()
             
             return response.json()
@@ -204,7 +294,7 @@ class CoinoneAPI:
             })
             
             # Request Body에 Base64 인코딩된 페이로드 전송
-            response = requests.post(url, data=encoded_payload, headers=headers, timeout=10)
+            response = self.session.post(url, data=encoded_payload, headers=headers, timeout=10)
             response.raise_for_status()
             
             return response.json()
@@ -212,4 +302,78 @@ class CoinoneAPI:
         except Exception as e:
             logger.error(f"주문 내역 조회 실패: {e}")
             return {}
-
+    
+    def get_completed_orders(self, currency: str = "BTC", from_ts: int = None,
+                             quote_currency: str = "KRW", size: int = 100,
+                             max_pages: int = None) -> Optional[Tuple[List[Dict], bool]]:
+        """
+        체결 내역 조회 (인증 필요, from_ts 이후 체결만 서버에서 걸러 받음)
+        
+        최신 체결부터 페이지를 이어 받으며 from_ts까지 모두 받으면 완료로 본다.
+        
+        Args:
+            currency: 통화 코드
+            from_ts: 이 시각(ms) 이후 체결만 조회 (None이면 전체)
+            quote_currency: 기준 통화 (기본값: KRW)
+            size: 페이지당 조회 개수 (최대 100)
+            max_pages: 최대 페이지 수 (None이면 from_ts까지 모두 조회)
+            
+        Returns:
+            ({"trade_id", "order_id", "price", "qty", "is_ask", "timestamp"(ms)} 목록,
+             from_ts까지 빠짐없이 받았는지 여부) 튜플 (조회 실패 시 None)
+        """
+        try:
+            url = f"{BASE_URL}/v2.1/order/completed_orders"
+            to_ts = int(time.time() * 1000)
+            to_trade_id = None
+            fills = []
+            seen = set()
+            
+            for _ in (range(max_pages) if max_pages else itertools.count()):
+                payload = {
+                    "quote_currency": quote_currency.upper(),
+                    "target_currency": currency.upper(),
+                    "size": size,
+                    "from_ts": from_ts or 0,
+                    "to_ts": to_ts
+                }
+                if to_trade_id:
+                    payload["to_trade_id"] = to_trade_id
+                encoded_payload, headers = self._prepare_private_api_request(payload, version="v2.1")
+                
+                response = self.session.post(url, data=encoded_payload, headers=headers, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                if data.get("result") != "success":
+                    raise ValueError(f"응답 오류: {data.get('error_code')}")
+                
+                page = [
+                    {
+                        "trade_id": str(item["trade_id"]),
+                        "order_id": str(item["order_id"]),
+                        "price": float(item["price"]),
+                        "qty": float(item["qty"]),
+                        "is_ask": bool(item.get("is_ask")),
+                        "timestamp": int(item["timestamp"])
+                    }
+                    for item in data.get("completed_orders", [])
+                ]
+                # 페이지 경계(같은 시각)에서 다시 받은 체결은 제외
+                new = [fill for fill in page if fill["trade_id"] not in seen]
+                seen.update(fill["trade_id"] for fill in new)
+                fills.extend(new)
+                if len(page) < size:
+                    return fills, True
+                if not new:
+                    logger.warning(f"{currency} 체결 내역 페이지가 진행되지 않아 조회를 중단합니다")
+                    return fills, False
+                # 최신순 응답: 가장 오래된 체결 이전 페이지를 이어서 조회
+                oldest = min(new, key=lambda fill: fill["timestamp"])
+                to_ts, to_trade_id = oldest["timestamp"], oldest["trade_id"]
+            
+            logger.warning(f"{currency} 체결 내역이 {max_pages}페이지를 넘어 일부만 조회했습니다")
+            return fills, False
+            
+        except Exception as e:
+            logger.error(f"체결 내역 조회 실패: {e}")
+            return None
@@ -0,0 +1,233 @@
+"""
+시세 수집 스레드 모듈: 백그라운드에서 현재가를 주기적으로 조회하고 최신 스냅샷 보관
+
+Streamlit 스크립트는 네트워크를 직접 호출하지 않고 snapshot()/frame()만 읽는다.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from config import MARKET_REFRESH_SECONDS, WATCHED_CURRENCIES, WATCHLIST
+from data.coinone_api import CoinoneAPI
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 조회가 모두 실패할 때 최대 대기 시간 (초)
+MAX_BACKOFF_SECONDS = 60
+
+# 시세표 컬럼 (CoinoneAPI.get_all_tickers 필드)
+MARKET_COLUMNS = ["last", "change_rate", "high", "low", "volume", "quote_volume"]
+
+
+def resolve_watchlist(markets: List[str]) -> List[str]:
+    """
+    관심 종목 목록 (WATCHLIST가 "ALL"이면 조회된 마켓 전체, 아직 없으면 WATCHED_CURRENCIES)
+
+    Args:
+        markets: 시세가 조회된 통화 코드 목록
+
+    Returns:
+        통화 코드 목록
+    """
+    if WATCHLIST == ["ALL"]:
+        return sorted(markets) or list(WATCHED_CURRENCIES)
+    return list(WATCHLIST)
+
+
+def build_market_frame(tickers: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    현재가 딕셔너리를 통화 코드 인덱스의 숫자 DataFrame으로 변환 (시세표/히트맵 공용)
+
+    Args:
+        tickers: {통화 코드: 현재가 정보}
+
+    Returns:
+        MARKET_COLUMNS 컬럼의 DataFrame (없는 값은 NaN)
+    """
+    frame = pd.DataFrame.from_dict(tickers, orient="index").reindex(columns=MARKET_COLUMNS)
+    frame = frame.apply(pd.to_numeric, errors="coerce")
+    frame.index.name = "currency"
+    return frame.sort_index()
+
+
+class MarketFeed:
+    """현재가 폴링 스레드와 최신 시세 스냅샷"""
+
+    def __init__(self, api: CoinoneAPI = None, currencies: List[str] = None,
+                 interval: float = None):
+        """
+        Args:
+            api: CoinoneAPI 인스턴스 (기본값: 새 인스턴스)
+            currencies: 일괄 조회 실패 시 개별 조회할 통화 코드 목록
+                (기본값: WATCHED_CURRENCIES와 WATCHLIST)
+            interval: 조회 주기 (초, 기본값: MARKET_REFRESH_SECONDS)
+        """
+        self.api = api or CoinoneAPI()
+        if currencies is None:
+            currencies = WATCHED_CURRENCIES + [c for c in WATCHLIST if c != "ALL" and c not in WATCHED_CURRENCIES]
+        self.currencies = [c.upper() for c in currencies]
+        self.interval = interval or MARKET_REFRESH_SECONDS
+        self.last_updated: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._tickers: Dict[str, Dict] = {}
+        self._frame = build_market_frame({})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Dict[str, Dict]], None]] = []
+
+    def subscribe(self, listener: Callable[[Dict[str, Dict]], None]):
+        """
+        조회할 때마다 호출할 함수 등록 (폴링 스레드에서 새로 조회한 시세로 호출)
+
+        Args:
+            listener: {통화 코드: 현재가 정보}를 받는 함수
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def start(self):
+        """폴링 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-feed", daemon=True)
+        self._thread.start()
+        logger.info(f"시세 수집 시작: {', '.join(self.currencies)} ({self.interval}초 주기)")
+
+    def stop(self):
+        """폴링 스레드 종료"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def watch(self, currencies: List[str]):
+        """
+        조회 대상 통화 추가 (다음 주기부터 반영)
+
+        Args:
+            currencies: 통화 코드 목록
+        """
+        with self._lock:
+            for currency in currencies:
+                if currency.upper() not in self.currencies:
+                    self.currencies.append(currency.upper())
+
+    def refresh(self) -> bool:
+        """
+        원화 마켓 전체 현재가를 한 번에 조회하여 스냅샷 갱신 (실패 시 통화별 조회)
+
+        Returns:
+            하나 이상 조회에 성공했는지 여부
+        """
+        with self._lock:
+            currencies = list(self.currencies)
+
+        tickers = self.api.get_all_tickers()
+        if not tickers:
+            for currency in currencies:
+                ticker = self.api.get_ticker(currency)
+                if ticker and "last" in ticker:
+                    tickers[currency] = ticker
+
+        with self._lock:
+            self._tickers.update(tickers)
+            merged = dict(self._tickers)
+        # 시세표는 갱신할 때 한 번만 만들어 모든 세션이 같은 DataFrame을 읽음
+        frame = build_market_frame(merged)
+
+        with self._lock:
+            self._frame = frame
+            if tickers:
+                self.last_updated = datetime.now()
+            missing = len([c for c in currencies if c not in tickers])
+            self.last_error = f"{missing}개 통화 조회 실패" if missing else None
+            listeners = list(self._listeners)
+
+        for listener in listeners if tickers else []:
+            try:
+                listener(tickers)
+            except Exception as e:
+                logger.error(f"시세 구독 처리 실패: {e}")
+        return bool(tickers)
+
+    def _run(self):
+        wait = self.interval
+        while not self._stop.is_set():
+            try:
+                ok = self.refresh()
+            except Exception as e:
+                logger.error(f"시세 수집 실패: {e}")
+                ok = False
+            # 전부 실패하면(네트워크 단절 등) 조회 간격을 늘림
+            wait = self.interval if ok else min(wait * 2, MAX_BACKOFF_SECONDS)
+            self._stop.wait(wait)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        최신 시세 스냅샷 (네트워크 호출 없음)
+
+        Returns:
+            {통화 코드: 현재가 정보} 딕셔너리 복사본
+        """
+        with self._lock:
+            return dict(self._tickers)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        최신 시세표 (네트워크 호출 없음, 공유 객체이므로 수정하지 말 것)
+
+        Returns:
+            build_market_frame 결과
+        """
+        with self._lock:
+            return self._frame
+
+    def markets(self) -> List[str]:
+        """
+        시세가 조회된 통화 코드 목록
+
+        Returns:
+            정렬된 통화 코드 목록
+        """
+        with self._lock:
+            return sorted(self._tickers)
+
+    def get_ticker(self, currency: str) -> Dict:
+        """
+        스냅샷의 현재가 조회 (아직 수집되지 않은 통화면 빈 딕셔너리)
+
+        Args:
+            currency: 통화 코드
+
+        Returns:
+            현재가 정보
+        """
+        with self._lock:
+            return dict(self._tickers.get(currency.upper(), {}))
+
+
+_feed: Optional[MarketFeed] = None
+_feed_lock = threading.Lock()
+
+
+def get_market_feed() -> MarketFeed:
+    """
+    프로세스 공용 시세 수집기 (처음 호출 시 스레드 시작)
+
+    Returns:
+        MarketFeed 인스턴스
+    """
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = MarketFeed()
+            _feed.start()
+            atexit.register(_feed.stop)
+        return _feed
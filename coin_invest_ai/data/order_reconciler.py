@@ -0,0 +1,125 @@
+"""
+주문 동기화 모듈: 거래소 미체결/체결 내역을 로컬 trades에 증분 반영
+
+- 로컬 미체결(pending) 거래소 주문이 없으면 API를 호출하지 않는다.
+- 체결 내역은 통화별 기준점(sync_state의 마지막 체결 시각)과 가장 오래된 미체결 주문 시각 이후만 받는다.
+  기준점과 같은 시각의 체결은 다시 받지만 체결 ID로 중복을 거른다.
+- 체결 내역을 기준점까지 빠짐없이 받았을 때만 기준점을 올리고 취소 여부를 판단한다.
+- 받은 목록과 로컬 상태의 비교/반영은 TradingDatabase.sync_exchange_orders의 한 트랜잭션에서 처리한다.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+from data.coinone_api import CoinoneAPI
+from data.paper_exchange import PAPER_ORDER_PREFIX
+from db.database import TradingDatabase
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 로컬 시각과 거래소 시각 차이 허용 범위 (ms, 체결 조회 시작 시각을 이만큼 앞당김)
+CLOCK_SKEW_MS = 60_000
+
+
+def sync_key(currency: str) -> str:
+    """통화별 주문 동기화 기준점 키"""
+    return f"orders:{currency.upper()}"
+
+
+class OrderReconciler:
+    """거래소 주문 상태를 로컬 매매 기록에 반영"""
+
+    def __init__(self, db: TradingDatabase = None, api: CoinoneAPI = None, max_pages: int = None):
+        """
+        Args:
+            db: TradingDatabase 인스턴스 (기본값: 새 인스턴스)
+            api: CoinoneAPI 인스턴스 (기본값: 새 인스턴스)
+            max_pages: 동기화 한 번에 받을 체결 내역 최대 페이지 수 (기본값: None, 기준점까지 모두 조회)
+        """
+        self.db = db or TradingDatabase()
+        self.api = api or CoinoneAPI()
+        self.max_pages = max_pages
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        미체결 거래소 주문이 있는 통화만 동기화
+
+        Returns:
+            {"fills", "filled", "cancelled"} 합계
+        """
+        by_currency: Dict[str, List[Dict]] = {}
+        for trade in self.db.get_pending_orders():
+            # 모의 주문은 모의 체결 엔진이 처리
+            if str(trade["order_id"]).startswith(PAPER_ORDER_PREFIX):
+                continue
+            by_currency.setdefault(trade["currency"].upper(), []).append(trade)
+
+        totals = {"fills": 0, "filled": 0, "cancelled": 0}
+        for currency, trades in by_currency.items():
+            result = self.reconcile_currency(currency, trades)
+            for name in totals:
+                totals[name] += result.get(name, 0)
+        return totals
+
+    def reconcile_currency(self, currency: str, trades: List[Dict]) -> Dict[str, int]:
+        """
+        한 통화의 미체결 주문 동기화
+
+        미체결 목록을 먼저 조회하고 체결 내역을 나중에 조회하여, 미체결 목록에서 빠진 주문의
+        체결은 반드시 함께 받는다. 미체결 목록 조회 이후 접수된 주문은 취소 판단에서 제외한다.
+        체결 내역을 페이지 한도 때문에 일부만 받았으면 받은 체결만 반영하고,
+        기준점은 유지하며 취소 판단은 다음 동기화로 미룬다.
+
+        Args:
+            currency: 통화 코드
+            trades: 해당 통화의 로컬 미체결 주문 목록
+
+        Returns:
+            sync_exchange_orders 결과 (조회 실패 시 빈 딕셔너리)
+        """
+        checked_at = datetime.now().isoformat()
+        response = self.api.get_orders(currency)
+        if response.get("result") != "success":
+            logger.warning(f"{currency} 미체결 주문 조회 실패, 동기화 건너뜀")
+            return {}
+        open_ids = [str(order.get("orderId")) for order in response.get("limitOrders", [])]
+
+        key = sync_key(currency)
+        state = self.db.get_sync_state(key)
+        oldest = min(int(datetime.fromisoformat(t["timestamp"]).timestamp() * 1000) for t in trades)
+        from_ts = max(state.get("last_timestamp") or 0, oldest - CLOCK_SKEW_MS)
+
+        response = self.api.get_completed_orders(currency, from_ts=from_ts, max_pages=self.max_pages)
+        if response is None:
+            logger.warning(f"{currency} 체결 내역 조회 실패, 동기화 건너뜀")
+            return {}
+        completed, complete = response
+
+        local = {str(trade["order_id"]): trade for trade in trades}
+        fills = [
+            {
+                "trade_id": fill["trade_id"],
+                "order_id": fill["order_id"],
+                "currency": currency,
+                "action": local[fill["order_id"]]["action"],
+                "price": fill["price"],
+                "quantity": fill["qty"],
+                "timestamp": fill["timestamp"],
+            }
+            for fill in completed
+            if fill["order_id"] in local
+        ]
+        if complete:
+            checked = [order_id for order_id, trade in local.items() if trade["timestamp"] < checked_at]
+            last_timestamp = max((fill["timestamp"] for fill in completed), default=None)
+        else:
+            logger.warning(f"{currency} 체결 내역을 일부만 받아 취소 판단과 기준점 갱신을 미룹니다")
+            checked, last_timestamp = [], None
+
+        result = self.db.sync_exchange_orders(key, fills, open_ids, checked, last_timestamp)
+        if any(result.values()):
+            logger.info(
+                f"{currency} 주문 동기화: 새 체결 {result['fills']}건, "
+                f"체결 수량 갱신 {result['filled']}건, 취소 {result['cancelled']}건"
+            )
+        return result
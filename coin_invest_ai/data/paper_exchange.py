@@ -0,0 +1,443 @@
+"""
+모의 체결 엔진: 마켓별 가격-시간 우선 호가창에서 주문을 체결하고 trades/portfolio에 반영
+
+- 시장 유동성은 get_orderbook 호가 스냅샷(seed_orderbook) 또는 저장된/실시간 현재가(on_tick)로 채운다.
+  새 스냅샷이 들어오면 이전 시장 유동성은 모두 교체되고, 내 미체결 주문은 순서를 유지한다.
+- 새 주문은 반대편 호가를 가격-시간 순으로 소진하며, 체결가는 먼저 호가창에 있던 주문의 가격이다.
+- 체결 결과는 메모리에 모았다가 flush()에서 TradingDatabase.save_order_batch로 한 번에 저장한다.
+"""
+
+import heapq
+import itertools
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import PAPER_TICK_QUANTITY
+from db.database import TradingDatabase
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 모의 주문 ID 접두어 (거래소 주문과 구분)
+PAPER_ORDER_PREFIX = "paper-"
+
+# 남은 수량이 이보다 작으면 전량 체결로 간주
+QUANTITY_EPSILON = 1e-12
+
+
+class PaperOrder:
+    """호가창 주문 (mine=False이면 스냅샷/현재가로 만든 시장 유동성)"""
+
+    __slots__ = ("order_id", "currency", "side", "price", "quantity", "remaining",
+                 "seq", "mine", "active", "filled_value", "notes", "timestamp")
+
+    def __init__(self, order_id: Optional[str], currency: str, side: str, price: Optional[float],
+                 quantity: float, seq: int, mine: bool, notes: str = None):
+        self.order_id = order_id
+        self.currency = currency
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+        self.seq = seq
+        self.mine = mine
+        self.active = True
+        self.filled_value = 0.0
+        self.notes = notes
+        self.timestamp = datetime.now().isoformat()
+
+    @property
+    def filled_quantity(self) -> float:
+        return self.quantity - self.remaining
+
+    @property
+    def average_price(self) -> Optional[float]:
+        filled = self.filled_quantity
+        return self.filled_value / filled if filled > QUANTITY_EPSILON else self.price
+
+    @property
+    def status(self) -> str:
+        if self.remaining <= QUANTITY_EPSILON:
+            return "completed"
+        return "pending" if self.active else "cancelled"
+
+    def to_dict(self) -> Dict:
+        # 미체결 지정가 주문은 지정가, 체결/취소된 주문은 평균 체결가를 가격으로 기록
+        price = self.price if self.status == "pending" else self.average_price
+        return {
+            "order_id": self.order_id,
+            "currency": self.currency,
+            "action": self.side,
+            "price": price or 0.0,
+            "quantity": self.quantity,
+            "filled_quantity": self.filled_quantity,
+            "filled_value": self.filled_value,
+            "status": self.status,
+            "notes": self.notes,
+            "timestamp": self.timestamp,
+        }
+
+
+class _BookSide:
+    """한쪽 호가 (가격별 FIFO 큐 + 최우선 가격 힙, 빈 가격은 조회할 때 정리)"""
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.levels: Dict[float, deque] = {}
+        self._heap: List[float] = []
+
+    def add(self, order: PaperOrder):
+        queue = self.levels.get(order.price)
+        if queue is None:
+            queue = self.levels[order.price] = deque()
+            heapq.heappush(self._heap, -order.price if self.is_bid else order.price)
+        queue.append(order)
+
+    def best(self) -> Optional[float]:
+        """최우선 가격 (취소/체결된 주문만 남은 가격은 제거)"""
+        while self._heap:
+            price = -self._heap[0] if self.is_bid else self._heap[0]
+            queue = self.levels.get(price)
+            if queue is not None:
+                while queue and not queue[0].active:
+                    queue.popleft()
+                if queue:
+                    return price
+                del self.levels[price]
+            heapq.heappop(self._heap)
+        return None
+
+    def keep_mine(self):
+        """시장 유동성을 모두 빼고 내 미체결 주문만 남김 (순서 유지)"""
+        levels = {}
+        for price, queue in self.levels.items():
+            mine = deque(order for order in queue if order.mine and order.active)
+            if mine:
+                levels[price] = mine
+        self.levels = levels
+        self._heap = [-price if self.is_bid else price for price in levels]
+        heapq.heapify(self._heap)
+
+    def depth(self, limit: int) -> List[tuple]:
+        """가격별 잔량 (최우선 가격부터 limit개)"""
+        prices = sorted(self.levels, reverse=self.is_bid)
+        rows = []
+        for price in prices:
+            quantity = sum(order.remaining for order in self.levels[price] if order.active)
+            if quantity > 0:
+                rows.append((price, quantity))
+                if len(rows) == limit:
+                    break
+        return rows
+
+
+class PaperOrderBook:
+    """한 마켓의 가격-시간 우선 호가창"""
+
+    def __init__(self, currency: str, sequence):
+        self.currency = currency
+        self.bids = _BookSide(is_bid=True)
+        self.asks = _BookSide(is_bid=False)
+        self._sequence = sequence
+
+    def _side(self, side: str) -> _BookSide:
+        return self.bids if side == "buy" else self.asks
+
+    def reseed(self, bids: List[tuple], asks: List[tuple]) -> List[tuple]:
+        """
+        시장 유동성 교체 후 가격이 겹친 내 미체결 주문 체결
+
+        Args:
+            bids: (가격, 수량) 매수 호가 목록
+            asks: (가격, 수량) 매도 호가 목록
+
+        Returns:
+            (주문, 수량, 가격) 체결 목록
+        """
+        for book_side, levels in ((self.bids, bids), (self.asks, asks)):
+            book_side.keep_mine()
+            for price, quantity in levels:
+                if quantity > 0:
+                    book_side.add(PaperOrder(None, self.currency, "buy" if book_side.is_bid else "sell",
+                                             price, quantity, next(self._sequence), mine=False))
+        return self._cross()
+
+    def _cross(self) -> List[tuple]:
+        """매수/매도 최우선 가격이 겹치면 먼저 들어온 주문 가격으로 체결 (시장 유동성끼리는 체결하지 않음)"""
+        fills = []
+        while True:
+            bid, ask = self.bids.best(), self.asks.best()
+            if bid is None or ask is None or bid < ask:
+                break
+            buyer, seller = self.bids.levels[bid][0], self.asks.levels[ask][0]
+            if not (buyer.mine or seller.mine):
+                break
+            maker = buyer if buyer.seq < seller.seq else seller
+            quantity = min(buyer.remaining, seller.remaining)
+            fills.extend(self._fill(buyer, seller, quantity, maker.price))
+        return fills
+
+    def _fill(self, buyer: PaperOrder, seller: PaperOrder, quantity: float, price: float) -> List[tuple]:
+        fills = []
+        for order in (buyer, seller):
+            order.remaining -= quantity
+            if order.remaining <= QUANTITY_EPSILON:
+                order.remaining = 0.0
+                order.active = False
+            if order.mine:
+                order.filled_value += quantity * price
+                fills.append((order, quantity, price))
+        return fills
+
+    def submit(self, order: PaperOrder) -> List[tuple]:
+        """
+        새 주문 체결 (지정가 잔량은 호가창에 남기고, 시장가(price=None) 잔량은 취소)
+
+        Returns:
+            (주문, 수량, 가격) 체결 목록
+        """
+        opposite = self.asks if order.side == "buy" else self.bids
+        fills = []
+        while order.remaining > QUANTITY_EPSILON:
+            best = opposite.best()
+            if best is None:
+                break
+            if order.price is not None and (best > order.price if order.side == "buy" else best < order.price):
+                break
+            maker = opposite.levels[best][0]
+            quantity = min(order.remaining, maker.remaining)
+            if order.side == "buy":
+                fills.extend(self._fill(order, maker, quantity, best))
+            else:
+                fills.extend(self._fill(maker, order, quantity, best))
+
+        if order.active:
+            if order.price is None:
+                order.active = False
+            else:
+                self._side(order.side).add(order)
+        return fills
+
+
+class PaperExchange:
+    """마켓별 모의 호가창과 체결 결과 저장 (스레드 안전)"""
+
+    def __init__(self, db: TradingDatabase = None, api=None, restore: bool = True):
+        """
+        Args:
+            db: TradingDatabase 인스턴스 (기본값: 새 인스턴스)
+            api: 호가 스냅샷 조회용 CoinoneAPI 인스턴스 (seed_orderbook에서 스냅샷을 주지 않을 때 사용)
+            restore: DB에 남아 있는 모의 미체결 주문을 호가창에 다시 올릴지 여부
+        """
+        self.db = db or TradingDatabase()
+        self.api = api
+        self._books: Dict[str, PaperOrderBook] = {}
+        self._orders: Dict[str, PaperOrder] = {}
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._prefix = f"{PAPER_ORDER_PREFIX}{uuid.uuid4().hex[:8]}-"
+        self._lock = threading.RLock()
+        # flush() 전까지 모아 두는 변경 사항
+        self._new: Dict[str, PaperOrder] = {}
+        self._dirty: Dict[str, PaperOrder] = {}
+        self._fills: List[Dict] = []
+
+        if restore:
+            self._restore()
+
+    def _restore(self):
+        for trade in self.db.get_pending_orders(order_id_prefix=PAPER_ORDER_PREFIX):
+            filled = trade.get("filled_quantity") or 0.0
+            order = PaperOrder(trade["order_id"], trade["currency"], trade["action"], trade["price"],
+                               trade["quantity"], next(self._sequence), mine=True, notes=trade["notes"])
+            order.remaining = trade["quantity"] - filled
+            # filled_value 컬럼이 없던 시기에 저장된 주문은 지정가로 근사
+            filled_value = trade.get("filled_value")
+            order.filled_value = filled * trade["price"] if filled_value is None else filled_value
+            order.timestamp = trade["timestamp"]
+            self._record(self._book(order.currency).submit(order))
+            if order.active:
+                self._orders[order.order_id] = order
+        if self._orders:
+            logger.info(f"모의 미체결 주문 복원: {len(self._orders)}건")
+
+    def _book(self, currency: str) -> PaperOrderBook:
+        book = self._books.get(currency)
+        if book is None:
+            book = self._books[currency] = PaperOrderBook(currency, self._sequence)
+        return book
+
+    def _record(self, fills: List[tuple]):
+        for order, quantity, price in fills:
+            self._fills.append({"currency": order.currency, "action": order.side,
+                                "quantity": quantity, "price": price})
+            if order.order_id not in self._new:
+                self._dirty[order.order_id] = order
+            if not order.active:
+                self._orders.pop(order.order_id, None)
+
+    def seed_orderbook(self, currency: str, orderbook: Dict = None) -> int:
+        """
+        호가 스냅샷으로 시장 유동성 교체
+
+        Args:
+            currency: 통화 코드
+            orderbook: CoinoneAPI.get_orderbook() 결과 (None이면 api로 조회)
+
+        Returns:
+            내 주문 체결 건수
+        """
+        currency = currency.upper()
+        if orderbook is None:
+            orderbook = self.api.get_orderbook(currency) if self.api is not None else {}
+
+        def levels(side: str) -> List[tuple]:
+            rows = orderbook.get(side) or orderbook.get(f"{side}s") or []
+            return [(float(row["price"]), float(row["qty"])) for row in rows]
+
+        bids, asks = levels("bid"), levels("ask")
+        if not bids and not asks:
+            logger.warning(f"{currency} 호가 스냅샷이 비어 있어 시장 유동성을 유지합니다")
+            return 0
+
+        with self._lock:
+            fills = self._book(currency).reseed(bids, asks)
+            self._record(fills)
+            return len(fills)
+
+    def on_tick(self, currency: str, price: float) -> int:
+        """
+        현재가 하나로 시장 유동성 교체 (매수/매도 모두 해당 가격에 PAPER_TICK_QUANTITY 잔량)
+
+        Args:
+            currency: 통화 코드
+            price: 체결 가격
+
+        Returns:
+            내 주문 체결 건수
+        """
+        level = [(float(price), PAPER_TICK_QUANTITY)]
+        with self._lock:
+            fills = self._book(currency.upper()).reseed(level, level)
+            self._record(fills)
+            return len(fills)
+
+    def replay_ticks(self, currency: str, since: str = None) -> int:
+        """
+        저장된 현재가 기록(market_ticks)을 순서대로 재생
+
+        Args:
+            currency: 통화 코드
+            since: 이 시각(ISO 형식) 이후 기록만 재생
+
+        Returns:
+            내 주문 체결 건수
+        """
+        return sum(self.on_tick(currency, tick["price"]) for tick in self.db.get_ticks(currency, since))
+
+    def on_tickers(self, tickers: Dict[str, Dict]):
+        """MarketFeed 구독 함수: 미체결 주문이 있는 마켓만 현재가로 체결 확인 후 저장"""
+        with self._lock:
+            currencies = {order.currency for order in self._orders.values()}
+        filled = sum(
+            self.on_tick(currency, tickers[currency]["last"])
+            for currency in currencies
+            if tickers.get(currency, {}).get("last") is not None
+        )
+        if filled:
+            self.flush()
+
+    def submit(self, currency: str, side: str, quantity: float, price: float = None,
+               notes: str = None) -> Dict:
+        """
+        모의 주문 제출
+
+        Args:
+            currency: 통화 코드
+            side: "buy" 또는 "sell"
+            quantity: 수량
+            price: 지정가 (None이면 시장가, 체결되지 않은 잔량은 취소)
+            notes: 메모
+
+        Returns:
+            주문 상태 딕셔너리 ("order_id", "status", "filled_quantity", "price"(평균 체결가) 등)
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError(f"알 수 없는 주문 구분: {side}")
+        if quantity <= 0 or (price is not None and price <= 0):
+            raise ValueError("가격과 수량은 0보다 커야 합니다")
+
+        with self._lock:
+            order = PaperOrder(f"{self._prefix}{next(self._ids)}", currency.upper(), side, price,
+                               quantity, next(self._sequence), mine=True, notes=notes)
+            self._new[order.order_id] = order
+            self._record(self._book(order.currency).submit(order))
+            if order.active:
+                self._orders[order.order_id] = order
+            return order.to_dict()
+
+    def cancel(self, order_id: str) -> bool:
+        """
+        미체결 주문 취소
+
+        Returns:
+            취소 여부 (이미 체결/취소된 주문이면 False)
+        """
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                return False
+            order.active = False
+            if order_id not in self._new:
+                self._dirty[order_id] = order
+            return True
+
+    def open_orders(self, currency: str = None) -> List[Dict]:
+        """
+        내 미체결 주문 목록
+
+        Args:
+            currency: 통화 코드 (None이면 전체)
+
+        Returns:
+            주문 상태 딕셔너리 목록 (접수 순)
+        """
+        with self._lock:
+            orders = sorted(self._orders.values(), key=lambda order: order.seq)
+            return [order.to_dict() for order in orders
+                    if currency is None or order.currency == currency.upper()]
+
+    def depth(self, currency: str, limit: int = 10) -> Dict[str, List[tuple]]:
+        """
+        모의 호가창 잔량
+
+        Returns:
+            {"bids": [(가격, 수량)], "asks": [(가격, 수량)]}
+        """
+        with self._lock:
+            book = self._book(currency.upper())
+            return {"bids": book.bids.depth(limit), "asks": book.asks.depth(limit)}
+
+    def flush(self) -> int:
+        """
+        모아 둔 주문/체결을 DB에 한 트랜잭션으로 저장
+
+        Returns:
+            저장한 체결 건수
+        """
+        with self._lock:
+            new, dirty, fills = self._new, self._dirty, self._fills
+            self._new, self._dirty, self._fills = {}, {}, []
+            try:
+                self.db.save_order_batch(
+                    [order.to_dict() for order in new.values()],
+                    [order.to_dict() for order in dirty.values()],
+                    fills
+                )
+            except Exception:
+                # 다음 flush()에서 다시 저장
+                self._new, self._dirty, self._fills = new, dirty, fills
+                raise
+            return len(fills)
@@ -3,14 +3,26 @@ SQLite 데이터베이스 모듈: 매매 기록 저장 및 관리
 """
 
 import sqlite3
+import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from pathlib import Path
+import numpy as np
+import pandas as pd
 from config import DB_PATH
+from utils.news_index import article_hash
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 이 프로세스에서 스키마 초기화를 마친 DB 경로 (인스턴스마다 DDL을 반복하지 않음)
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# 거래 내역 페이지 조회에서 정렬 가능한 컬럼
+TRADE_SORT_COLUMNS = ("timestamp", "currency", "action", "price", "quantity", "total_amount", "status")
+
 
 class TradingDatabase:
     """매매 기록 데이터베이스 클래스"""
@@ -20,9 +32,21 @@ class TradingDatabase:
         Args:
             db_path: 데이터베이스 파일 경로
         """
-        self.db_path = db_path or DB_PATH
+        self.db_path = Path(db_path or DB_PATH)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_db()
+        
+        key = str(self.db_path.resolve())
+        with _init_lock:
+            # 파일이 지워진 경우에는 다시 생성
+            if key not in _initialized_paths or not self.db_path.exists():
+                self._init_db()
+                _initialized_paths.add(key)
+        
+        # 조회 결과 캐시: 어느 연결(다른 프로세스 포함)이든 커밋하면 data_version이 바뀌어 무효화
+        self._cache: Dict[tuple, List[Dict]] = {}
+        self._cache_lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._version_conn = sqlite3.connect(self.db_path, check_same_thread=False)
     
     def _init_db(self):
         """데이터베이스 초기화 및 테이블 생성"""
@@ -47,6 +71,24 @@ class TradingDatabase:
                     )
                 """)
                 
+                # 체결 수량/체결 금액 합계 컬럼 (기존 DB에는 컬럼 추가)
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(trades)")}
+                if "filled_quantity" not in columns:
+                    cursor.execute("ALTER TABLE trades ADD COLUMN filled_quantity REAL")
+                if "filled_value" not in columns:
+                    cursor.execute("ALTER TABLE trades ADD COLUMN filled_value REAL")
+                
+                # 거래 내역 페이지 조회/미체결 주문 조회용 인덱스
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (timestamp)")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_trades_currency_timestamp
+                    ON trades (currency, timestamp)
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_order_id ON trades (order_id)")
+                for column in ("price", "quantity", "total_amount"):
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_trades_{column} ON trades ({column})")
+                
                 # 포트폴리오 테이블
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS portfolio (
@@ -70,6 +112,94 @@ class TradingDatabase:
                     )
                 """)
                 
+                # 구조화된 추천 결과 및 생성 지표 컬럼 (기존 DB에는 컬럼 추가)
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(analysis)")}
+                for column, column_type in (
+                    ("action", "TEXT"), ("confidence", "REAL"), ("reasons", "TEXT"),
+                    ("ttft", "REAL"), ("latency", "REAL"), ("prompt_tokens", "INTEGER"),
+                    ("completion_tokens", "INTEGER"), ("tokens_per_sec", "REAL")
+                ):
+                    if column not in columns:
+                        cursor.execute(f"ALTER TABLE analysis ADD COLUMN {column} {column_type}")
+                
+                # 뉴스 감성 점수 캐시 테이블 (기사 해시 기준)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS news_sentiment (
+                        article_hash TEXT PRIMARY KEY,
+                        title TEXT,
+                        sentiment REAL NOT NULL,
+                        relevance TEXT NOT NULL,
+                        scorer TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                
+                # 시세 기록 테이블 (데몬이 주기적으로 저장)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS market_ticks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT NOT NULL,
+                        currency TEXT NOT NULL,
+                        price REAL NOT NULL,
+                        change_rate REAL,
+                        volume REAL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_market_ticks_currency
+                    ON market_ticks (currency, timestamp)
+                """)
+                
+                # 거래소 체결 내역 (체결 ID 기준 중복 제거, 주문별 체결 수량 집계용)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS order_fills (
+                        trade_id TEXT PRIMARY KEY,
+                        order_id TEXT NOT NULL,
+                        currency TEXT NOT NULL,
+                        price REAL NOT NULL,
+                        quantity REAL NOT NULL,
+                        timestamp INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_fills_order_id ON order_fills (order_id)")
+                
+                # 동기화 기준점 (빠짐없이 받은 마지막 체결 시각)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sync_state (
+                        key TEXT PRIMARY KEY,
+                        last_timestamp INTEGER,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                
+                # 캔들 테이블 (완성된 봉만 저장, 지표 계산용)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS candles (
+                        currency TEXT NOT NULL,
+                        interval TEXT NOT NULL,
+                        timestamp INTEGER NOT NULL,
+                        open REAL NOT NULL,
+                        high REAL NOT NULL,
+                        low REAL NOT NULL,
+                        close REAL NOT NULL,
+                        volume REAL NOT NULL,
+                        PRIMARY KEY (currency, interval, timestamp)
+                    ) WITHOUT ROWID
+                """)
+                
+                # 수집된 뉴스 테이블 (기사 해시 기준 중복 제거)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS news (
+                        article_hash TEXT PRIMARY KEY,
+                        title TEXT NOT NULL,
+                        description TEXT,
+                        url TEXT,
+                        source TEXT,
+                        published_at TEXT,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                
                 conn.commit()
                 logger.info(f"데이터베이스 초기화 완료: {self.db_path}")
                 
@@ -77,6 +207,42 @@ class TradingDatabase:
             logger.error(f"데이터베이스 초기화 실패: {e}")
             raise
     
+    def _cached(self, key: tuple, load: Callable[[], Any]) -> Any:
+        """
+        조회 결과 캐시 (마지막 조회 이후 DB에 커밋된 쓰기가 없으면 저장된 결과 반환)
+        
+        Args:
+            key: 캐시 키 (조회 이름과 인자)
+            load: 캐시가 없을 때 실행할 조회 함수 (딕셔너리 목록, DataFrame 또는 숫자 반환)
+            
+        Returns:
+            조회 결과 복사본
+        """
+        with self._cache_lock:
+            version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                self._cache.clear()
+                self._data_version = version
+            rows = self._cache.get(key)
+        
+        if rows is None:
+            rows = load()
+            with self._cache_lock:
+                # 조회 중에 쓰기가 있었으면 다음 조회에서 버전 비교로 비워짐
+                if self._data_version == version:
+                    self._cache[key] = rows
+        if isinstance(rows, pd.DataFrame):
+            return rows.copy()
+        if isinstance(rows, list):
+            return [dict(row) for row in rows]
+        return rows
+    
+    def _fetch_all(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """SELECT 실행 후 행을 딕셔너리 목록으로 반환"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+    
     def add_trade(self, currency: str, action: str, price: float, 
                   quantity: float, order_id: str = None, 
                   status: str = "completed", notes: str = None) -> int:
@@ -89,7 +255,7 @@ class TradingDatabase:
             price: 가격
             quantity: 수량
             order_id: 주문 ID
-            status: 상태
+            status: 상태 ("completed"일 때만 포트폴리오에 반영)
             notes: 메모
             
         Returns:
@@ -112,8 +278,9 @@ class TradingDatabase:
                 conn.commit()
                 trade_id = cursor.lastrowid
                 
-                # 포트폴리오 업데이트
-                self._update_portfolio(currency, action, quantity, price)
+                # 포트폴리오 업데이트 (미체결 주문은 체결될 때 반영)
+                if status == "completed":
+                    self._update_portfolio(currency, action, quantity, price)
                 
                 logger.info(f"매매 기록 추가: {trade_id}")
                 return trade_id
@@ -126,49 +293,107 @@ class TradingDatabase:
         """포트폴리오 업데이트"""
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+                self._apply_fills(conn.cursor(), [
+                    {"currency": currency, "action": action, "quantity": quantity, "price": price}
+                ])
+                conn.commit()
                 
-                # 기존 포지션 조회
-                cursor.execute("""
-                    SELECT quantity, avg_price FROM portfolio WHERE currency = ?
-                """, (currency,))
-                
-                row = cursor.fetchone()
-                
-                if row:
-                    old_quantity, old_avg_price = row
-                    
-                    if action == "buy":
-                        # 매수: 평균 가격 재계산
-                        new_quantity = old_quantity + quantity
-                        new_avg_price = (
-                            (old_quantity * old_avg_price + quantity * price) / new_quantity
-                        )
-                    else:
-                        # 매도: 수량 감소
-                        new_quantity = old_quantity - quantity
-                        new_avg_price = old_avg_price
-                    
-                    if new_quantity > 0:
-                        cursor.execute("""
-                            UPDATE portfolio 
-                            SET quantity = ?, avg_price = ?, updated_at = ?
-                            WHERE currency = ?
-                        """, (new_quantity, new_avg_price, datetime.now().isoformat(), currency))
-                    else:
-                        cursor.execute("DELETE FROM portfolio WHERE currency = ?", (currency,))
+        except Exception as e:
+            logger.error(f"포트폴리오 업데이트 실패: {e}")
+            raise
+    
+    @staticmethod
+    def _apply_fills(cursor: sqlite3.Cursor, fills: List[Dict]):
+        """
+        체결 목록을 순서대로 포트폴리오에 반영 (통화별 현재 포지션을 한 번만 읽고 한 번만 씀)
+        
+        Args:
+            cursor: 트랜잭션 중인 커서
+            fills: {"currency", "action", "quantity", "price"} 목록
+        """
+        currencies = sorted({fill["currency"] for fill in fills})
+        if not currencies:
+            return
+        
+        # 기존 포지션 조회
+        placeholders = ", ".join("?" * len(currencies))
+        positions = {
+            row[0]: [row[1], row[2]]
+            for row in cursor.execute(
+                f"SELECT currency, quantity, avg_price FROM portfolio WHERE currency IN ({placeholders})",
+                currencies
+            )
+        }
+        existing = set(positions)
+        
+        for fill in fills:
+            position = positions.get(fill["currency"])
+            quantity, price = fill["quantity"], fill["price"]
+            
+            if fill["action"] == "buy":
+                # 매수: 평균 가격 재계산
+                if position is None or position[0] <= 0:
+                    positions[fill["currency"]] = [quantity, price]
                 else:
-                    # 새로운 포지션
-                    if action == "buy":
-                        cursor.execute("""
-                            INSERT INTO portfolio (currency, quantity, avg_price, updated_at)
-                            VALUES (?, ?, ?, ?)
-                        """, (currency, quantity, price, datetime.now().isoformat()))
-                
+                    new_quantity = position[0] + quantity
+                    position[1] = (position[0] * position[1] + quantity * price) / new_quantity
+                    position[0] = new_quantity
+            elif position is not None:
+                # 매도: 수량 감소
+                position[0] -= quantity
+        
+        now = datetime.now().isoformat()
+        for currency, (quantity, avg_price) in positions.items():
+            if quantity > 0 and currency in existing:
+                cursor.execute("""
+                    UPDATE portfolio 
+                    SET quantity = ?, avg_price = ?, updated_at = ?
+                    WHERE currency = ?
+                """, (quantity, avg_price, now, currency))
+            elif quantity > 0:
+                # 새로운 포지션
+                cursor.execute("""
+                    INSERT INTO portfolio (currency, quantity, avg_price, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, (currency, quantity, avg_price, now))
+            elif currency in existing:
+                cursor.execute("DELETE FROM portfolio WHERE currency = ?", (currency,))
+    
+    def save_order_batch(self, new_orders: List[Dict], updates: List[Dict], fills: List[Dict]):
+        """
+        주문 추가, 주문 상태 변경, 포트폴리오 반영을 한 트랜잭션으로 저장 (모의 체결 엔진용)
+        
+        Args:
+            new_orders: 새 주문 {"timestamp", "currency", "action", "price", "quantity", "order_id",
+                "status", "filled_quantity", "filled_value", "notes"} 목록
+            updates: 기존 주문 변경 {"order_id", "price", "filled_quantity", "filled_value", "status"} 목록
+                (price는 미체결이면 지정가, 체결/취소되면 평균 체결가, filled_value는 체결 금액 합계)
+            fills: 체결 {"currency", "action", "quantity", "price"} 목록 (순서대로 포트폴리오에 반영)
+        """
+        if not (new_orders or updates or fills):
+            return
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT INTO trades 
+                    (timestamp, currency, action, price, quantity, total_amount, 
+                     order_id, status, notes, created_at, filled_quantity, filled_value)
+                    VALUES (:timestamp, :currency, :action, :price, :quantity, :price * :quantity,
+                            :order_id, :status, :notes, :timestamp, :filled_quantity, :filled_value)
+                """, new_orders)
+                cursor.executemany("""
+                    UPDATE trades
+                    SET price = :price, total_amount = :price * quantity,
+                        filled_quantity = :filled_quantity, filled_value = :filled_value, status = :status
+                    WHERE order_id = :order_id
+                """, updates)
+                self._apply_fills(cursor, fills)
                 conn.commit()
                 
         except Exception as e:
-            logger.error(f"포트폴리오 업데이트 실패: {e}")
+            logger.error(f"주문 일괄 저장 실패: {e}")
             raise
     
     def get_trades(self, currency: str = None, limit: int = 100) -> List[Dict]:
@@ -182,32 +407,136 @@ class TradingDatabase:
         Returns:
             매매 기록 목록
         """
+        if currency:
+            sql = """
+                SELECT * FROM trades 
+                WHERE currency = ? 
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            """
+            params = (currency, limit)
+        else:
+            sql = """
+                SELECT * FROM trades 
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            """
+            params = (limit,)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                if currency:
-                    cursor.execute("""
-                        SELECT * FROM trades 
-                        WHERE currency = ? 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    """, (currency, limit))
-                else:
-                    cursor.execute("""
-                        SELECT * FROM trades 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    """, (limit,))
-                
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            return self._cached(("trades", currency, limit), lambda: self._fetch_all(sql, params))
                 
         except Exception as e:
             logger.error(f"매매 기록 조회 실패: {e}")
             return []
     
+    @staticmethod
+    def _trade_filters(currency: str = None, action: str = None, start: str = None,
+                       end: str = None) -> Tuple[str, tuple]:
+        """거래 내역 필터를 WHERE 절과 파라미터로 변환 (start 이상, end 미만)"""
+        conditions, params = [], []
+        for clause, value in (("currency = ?", currency), ("action = ?", action),
+                              ("timestamp >= ?", start), ("timestamp < ?", end)):
+            if value:
+                conditions.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+    
+    def count_trades(self, currency: str = None, action: str = None,
+                     start: str = None, end: str = None) -> int:
+        """
+        조건에 맞는 매매 기록 수
+        
+        Args:
+            currency: 통화 코드 (None이면 전체)
+            action: 행동 ("buy", "sell", None이면 전체)
+            start: 시작 시각 (ISO 형식, 포함)
+            end: 종료 시각 (ISO 형식, 미포함)
+            
+        Returns:
+            매매 기록 수
+        """
+        where, params = self._trade_filters(currency, action, start, end)
+        
+        def load() -> int:
+            with sqlite3.connect(self.db_path) as conn:
+                return conn.execute(f"SELECT COUNT(*) FROM trades {where}", params).fetchone()[0]
+        
+        try:
+            return self._cached(("count_trades", where, params), load)
+            
+        except Exception as e:
+            logger.error(f"매매 기록 수 조회 실패: {e}")
+            return 0
+    
+    def get_trades_page(self, currency: str = None, action: str = None,
+                        start: str = None, end: str = None, sort_by: str = "timestamp",
+                        descending: bool = True, limit: int = 50, offset: int = 0) -> pd.DataFrame:
+        """
+        매매 기록 한 페이지 조회 (필터/정렬/페이지 나누기는 SQLite에서 처리)
+        
+        정렬과 OFFSET은 id만 읽는 하위 쿼리에서 인덱스로 처리하고,
+        해당 페이지 행만 전체 컬럼을 읽는다. 결과는 pyarrow 기반 DataFrame.
+        
+        Args:
+            currency: 통화 코드 (None이면 전체)
+            action: 행동 ("buy", "sell", None이면 전체)
+            start: 시작 시각 (ISO 형식, 포함)
+            end: 종료 시각 (ISO 형식, 미포함)
+            sort_by: 정렬 컬럼 (TRADE_SORT_COLUMNS 중 하나)
+            descending: 내림차순 여부
+            limit: 페이지 크기
+            offset: 건너뛸 행 수
+            
+        Returns:
+            매매 기록 DataFrame
+        """
+        if sort_by not in TRADE_SORT_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 컬럼: {sort_by}")
+        
+        where, params = self._trade_filters(currency, action, start, end)
+        direction = "DESC" if descending else "ASC"
+        sql = f"""
+            SELECT t.* FROM trades t
+            JOIN (
+                SELECT id FROM trades {where}
+                ORDER BY {sort_by} {direction}, id {direction}
+                LIMIT ? OFFSET ?
+            ) page ON t.id = page.id
+            ORDER BY t.{sort_by} {direction}, t.id {direction}
+        """
+        
+        def load() -> pd.DataFrame:
+            with sqlite3.connect(self.db_path) as conn:
+                return pd.read_sql_query(sql, conn, params=params + (limit, offset),
+                                         dtype_backend="pyarrow")
+        
+        try:
+            return self._cached(("trades_page", sql, params, limit, offset), load)
+            
+        except Exception as e:
+            logger.error(f"매매 기록 페이지 조회 실패: {e}")
+            return pd.DataFrame()
+    
+    def get_trade_currencies(self) -> List[str]:
+        """
+        매매 기록이 있는 통화 코드 목록
+        
+        Returns:
+            정렬된 통화 코드 목록
+        """
+        try:
+            rows = self._cached(
+                ("trade_currencies",),
+                lambda: self._fetch_all("SELECT DISTINCT currency FROM trades ORDER BY currency")
+            )
+            return [row["currency"] for row in rows]
+            
+        except Exception as e:
+            logger.error(f"매매 통화 목록 조회 실패: {e}")
+            return []
+    
     def get_portfolio(self) -> List[Dict]:
         """
         포트폴리오 조회
@@ -216,19 +545,18 @@ class TradingDatabase:
             포트폴리오 목록
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT * FROM portfolio ORDER BY currency")
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            return self._cached(
+                ("portfolio",),
+                lambda: self._fetch_all("SELECT * FROM portfolio ORDER BY currency")
+            )
                 
         except Exception as e:
             logger.error(f"포트폴리오 조회 실패: {e}")
             return []
     
-    def add_analysis(self, currency: str, analysis_type: str, content: str):
+    def add_analysis(self, currency: str, analysis_type: str, content: str,
+                     action: str = None, confidence: float = None, reasons: List[str] = None,
+                     metrics: Dict = None):
         """
         분석 기록 추가
         
@@ -236,16 +564,28 @@ class TradingDatabase:
             currency: 통화 코드
             analysis_type: 분석 유형
             content: 분석 내용
+            action: 추천 행동 ("buy", "sell", "hold", 구조화된 추천인 경우)
+            confidence: 추천 확신도 (0.0 ~ 1.0)
+            reasons: 추천 근거 목록
+            metrics: 생성 지표 (QwenModel.generate의 metrics: ttft, latency,
+                prompt_tokens, completion_tokens, tokens_per_sec)
         """
         try:
             timestamp = datetime.now().isoformat()
+            metrics = metrics or {}
             
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO analysis (timestamp, currency, analysis_type, content, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (timestamp, currency, analysis_type, content, timestamp))
+                    INSERT INTO analysis
+                    (timestamp, currency, analysis_type, content, action, confidence, reasons,
+                     ttft, latency, prompt_tokens, completion_tokens, tokens_per_sec, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (timestamp, currency, analysis_type, content, action, confidence,
+                      json.dumps(reasons, ensure_ascii=False) if reasons is not None else None,
+                      metrics.get("ttft"), metrics.get("latency"), metrics.get("prompt_tokens"),
+                      metrics.get("completion_tokens"), metrics.get("tokens_per_sec"),
+                      timestamp))
                 
                 conn.commit()
                 logger.info("분석 기록 추가 완료")
@@ -253,4 +593,542 @@ class TradingDatabase:
         except Exception as e:
             logger.error(f"분석 기록 추가 실패: {e}")
             raise
-
+    
+    def get_generation_metrics(self, limit: int = 500) -> List[Dict]:
+        """
+        생성 지표가 기록된 최근 분석 조회
+        
+        Args:
+            limit: 최대 조회 개수
+            
+        Returns:
+            {"timestamp", "currency", "analysis_type", "ttft", "latency", "prompt_tokens",
+             "completion_tokens", "tokens_per_sec"} 딕셔너리 목록 (최신순)
+        """
+        sql = """
+            SELECT timestamp, currency, analysis_type, ttft, latency,
+                   prompt_tokens, completion_tokens, tokens_per_sec
+            FROM analysis
+            WHERE latency IS NOT NULL
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """
+        try:
+            return self._cached(("generation_metrics", limit), lambda: self._fetch_all(sql, (limit,)))
+                
+        except Exception as e:
+            logger.error(f"생성 지표 조회 실패: {e}")
+            return []
+    
+    def get_latest_analyses(self, analysis_type: str = None, limit: int = 20) -> List[Dict]:
+        """
+        최근 분석 기록 조회
+        
+        Args:
+            analysis_type: 분석 유형 ("ai_analysis", "ai_recommendation", None이면 전체)
+            limit: 조회 개수
+            
+        Returns:
+            분석 기록 목록 (최신순)
+        """
+        sql = "SELECT * FROM analysis"
+        params: tuple = ()
+        if analysis_type:
+            sql += " WHERE analysis_type = ?"
+            params = (analysis_type,)
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        
+        try:
+            return self._cached(
+                ("analyses", analysis_type, limit),
+                lambda: self._fetch_all(sql, params + (limit,))
+            )
+            
+        except Exception as e:
+            logger.error(f"분석 기록 조회 실패: {e}")
+            return []
+    
+    def get_recommendations(self, currency: str, since: str = None) -> List[Dict]:
+        """
+        통화별 구조화된 AI 추천 기록 조회 (백테스트용)
+        
+        Args:
+            currency: 통화 코드
+            since: 이 시각(ISO 형식) 이후의 추천만 조회
+            
+        Returns:
+            {"timestamp", "action", "confidence"} 목록 (오래된 순)
+        """
+        sql = """
+            SELECT timestamp, action, confidence FROM analysis
+            WHERE currency = ? AND analysis_type = 'ai_recommendation' AND action IS NOT NULL
+        """
+        params: tuple = (currency.upper(),)
+        if since:
+            sql += " AND timestamp >= ?"
+            params += (since,)
+        sql += " ORDER BY timestamp"
+        
+        try:
+            return self._cached(
+                ("recommendations", currency.upper(), since),
+                lambda: self._fetch_all(sql, params)
+            )
+            
+        except Exception as e:
+            logger.error(f"추천 기록 조회 실패: {e}")
+            return []
+    
+    def get_pending_orders(self, order_id_prefix: str = None) -> List[Dict]:
+        """
+        거래소 주문 ID가 있는 미체결(pending) 매매 기록 조회
+        
+        Args:
+            order_id_prefix: 이 접두어로 시작하는 주문 ID만 조회 (예: 모의 주문)
+            
+        Returns:
+            매매 기록 목록
+        """
+        sql = "SELECT * FROM trades WHERE status = 'pending' AND order_id IS NOT NULL"
+        params: tuple = ()
+        if order_id_prefix:
+            sql += " AND substr(order_id, 1, ?) = ?"
+            params = (len(order_id_prefix), order_id_prefix)
+        
+        try:
+            return self._fetch_all(sql + " ORDER BY timestamp", params)
+            
+        except Exception as e:
+            logger.error(f"미체결 주문 조회 실패: {e}")
+            return []
+    
+    def get_sync_state(self, key: str) -> Dict:
+        """
+        동기화 기준점 조회
+        
+        Args:
+            key: 동기화 대상 키 (예: "orders:BTC")
+            
+        Returns:
+            {"last_timestamp", "updated_at"} (없으면 빈 딕셔너리)
+        """
+        try:
+            rows = self._fetch_all(
+                "SELECT last_timestamp, updated_at FROM sync_state WHERE key = ?", (key,)
+            )
+            return rows[0] if rows else {}
+            
+        except Exception as e:
+            logger.error(f"동기화 기준점 조회 실패: {e}")
+            return {}
+    
+    def sync_exchange_orders(self, key: str, fills: List[Dict], open_order_ids: List[str],
+                             checked_order_ids: List[str], last_timestamp: int = None) -> Dict[str, int]:
+        """
+        거래소 체결/미체결 목록을 로컬 주문에 한 트랜잭션으로 반영
+        
+        - 새 체결은 order_fills에 추가 (이미 받은 체결 ID는 무시) 후 체결 시각 순으로 포트폴리오에 반영
+        - 새 체결이 있는 미체결 주문은 주문별 체결 합계로 체결 수량을 갱신, 전량 체결이면 "completed"
+        - checked_order_ids 중 거래소 미체결 목록에 없고 전량 체결되지 않은 주문은 "cancelled"
+        - last_timestamp가 있으면 sync_state 기준점으로 저장
+        
+        Args:
+            key: 동기화 기준점 키
+            fills: {"trade_id", "order_id", "currency", "action", "price", "quantity", "timestamp"} 목록
+            open_order_ids: 거래소 미체결 주문 ID 목록
+            checked_order_ids: 미체결 목록 조회 전에 접수된 로컬 미체결 주문 ID 목록
+                (체결 내역을 일부만 받았으면 빈 목록으로 넘겨 취소 판단을 미룸)
+            last_timestamp: 빠짐없이 받은 체결 내역의 마지막 체결 시각 (ms, None이면 기준점 유지)
+            
+        Returns:
+            {"fills": 새 체결 수, "filled": 체결 수량이 갱신된 주문 수, "cancelled": 취소 처리한 주문 수}
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                # 받은 체결을 임시 테이블에 한 번에 넣고 처음 받은 체결만 골라 추가
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS sync_fills (
+                        trade_id TEXT PRIMARY KEY,
+                        order_id TEXT NOT NULL,
+                        currency TEXT NOT NULL,
+                        action TEXT NOT NULL,
+                        price REAL NOT NULL,
+                        quantity REAL NOT NULL,
+                        timestamp INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("DELETE FROM sync_fills")
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO sync_fills
+                    (trade_id, order_id, currency, action, price, quantity, timestamp)
+                    VALUES (:trade_id, :order_id, :currency, :action, :price, :quantity, :timestamp)
+                """, fills)
+                cursor.execute("DELETE FROM sync_fills WHERE trade_id IN (SELECT trade_id FROM order_fills)")
+                cursor.execute("""
+                    INSERT INTO order_fills (trade_id, order_id, currency, price, quantity, timestamp)
+                    SELECT trade_id, order_id, currency, price, quantity, timestamp FROM sync_fills
+                """)
+                columns = ("trade_id", "order_id", "currency", "action", "price", "quantity", "timestamp")
+                new_fills = [
+                    dict(zip(columns, row))
+                    for row in cursor.execute(
+                        f"SELECT {', '.join(columns)} FROM sync_fills ORDER BY timestamp, trade_id"
+                    )
+                ]
+                
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS sync_order_ids (
+                        order_id TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        PRIMARY KEY (kind, order_id)
+                    )
+                """)
+                cursor.execute("DELETE FROM sync_order_ids")
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO sync_order_ids (order_id, kind) VALUES (?, ?)",
+                    [(fill["order_id"], "filled") for fill in new_fills]
+                    + [(order_id, "open") for order_id in open_order_ids]
+                    + [(order_id, "checked") for order_id in checked_order_ids]
+                )
+                
+                # 새 체결이 있는 주문: 체결 합계로 수량/상태 갱신 (전량 체결이면 평균 체결가 기록)
+                cursor.execute("""
+                    UPDATE trades
+                    SET filled_quantity = f.quantity,
+                        filled_value = f.value,
+                        status = CASE WHEN f.quantity >= trades.quantity - 1e-12
+                                      THEN 'completed' ELSE trades.status END,
+                        price = CASE WHEN f.quantity >= trades.quantity - 1e-12
+                                     THEN f.value / f.quantity ELSE trades.price END,
+                        total_amount = CASE WHEN f.quantity >= trades.quantity - 1e-12
+                                            THEN f.value ELSE trades.total_amount END
+                    FROM (
+                        SELECT order_id, SUM(quantity) AS quantity, SUM(quantity * price) AS value
+                        FROM order_fills
+                        WHERE order_id IN (SELECT order_id FROM sync_order_ids WHERE kind = 'filled')
+                        GROUP BY order_id
+                    ) f
+                    WHERE trades.order_id = f.order_id AND trades.status = 'pending'
+                """)
+                filled = cursor.rowcount
+                
+                # 거래소 미체결 목록에서 빠졌지만 전량 체결되지 않은 주문
+                cursor.execute("""
+                    UPDATE trades SET status = 'cancelled'
+                    WHERE status = 'pending'
+                      AND order_id IN (SELECT order_id FROM sync_order_ids WHERE kind = 'checked')
+                      AND order_id NOT IN (SELECT order_id FROM sync_order_ids WHERE kind = 'open')
+                """)
+                cancelled = cursor.rowcount
+                
+                self._apply_fills(cursor, new_fills)
+                
+                if last_timestamp is not None:
+                    cursor.execute("""
+                        INSERT OR REPLACE INTO sync_state (key, last_timestamp, updated_at)
+                        VALUES (?, ?, ?)
+                    """, (key, last_timestamp, datetime.now().isoformat()))
+                
+                conn.commit()
+                return {"fills": len(new_fills), "filled": filled, "cancelled": cancelled}
+                
+        except Exception as e:
+            logger.error(f"주문 동기화 반영 실패: {e}")
+            raise
+    
+    def update_trade_status(self, trade_id: int, status: str):
+        """
+        매매 기록 상태 변경
+        
+        Args:
+            trade_id: 매매 기록 ID
+            status: 새 상태
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("UPDATE trades SET status = ? WHERE id = ?", (status, trade_id))
+                conn.commit()
+                logger.info(f"매매 기록 상태 변경: {trade_id} -> {status}")
+                
+        except Exception as e:
+            logger.error(f"매매 기록 상태 변경 실패: {e}")
+            raise
+    
+    def get_news_sentiments(self, article_hashes: List[str]) -> Dict[str, Dict]:
+        """
+        캐시된 뉴스 감성 점수 조회
+        
+        Args:
+            article_hashes: 기사 해시 목록
+            
+        Returns:
+            {기사 해시: 점수 딕셔너리} (relevance는 {통화: 관련도} 딕셔너리)
+        """
+        if not article_hashes:
+            return {}
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                
+                placeholders = ",".join("?" * len(article_hashes))
+                cursor.execute(f"""
+                    SELECT * FROM news_sentiment WHERE article_hash IN ({placeholders})
+                """, article_hashes)
+                
+                result = {}
+                for row in cursor.fetchall():
+                    item = dict(row)
+                    item["relevance"] = json.loads(item["relevance"])
+                    result[item["article_hash"]] = item
+                return result
+                
+        except Exception as e:
+            logger.error(f"뉴스 감성 점수 조회 실패: {e}")
+            return {}
+    
+    def add_news_sentiments(self, rows: List[Dict]):
+        """
+        뉴스 감성 점수 일괄 저장
+        
+        Args:
+            rows: 점수 딕셔너리 목록 (article_hash, title, sentiment, relevance, scorer)
+        """
+        if not rows:
+            return
+        
+        try:
+            timestamp = datetime.now().isoformat()
+            
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO news_sentiment
+                    (article_hash, title, sentiment, relevance, scorer, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (row["article_hash"], row.get("title"), row["sentiment"],
+                     json.dumps(row["relevance"]), row["scorer"], timestamp)
+                    for row in rows
+                ])
+                
+                conn.commit()
+                logger.info(f"뉴스 감성 점수 저장: {len(rows)}건")
+                
+        except Exception as e:
+            logger.error(f"뉴스 감성 점수 저장 실패: {e}")
+            raise
+    
+    def add_tickers(self, tickers: Dict[str, Dict]):
+        """
+        현재가 스냅샷 저장
+        
+        Args:
+            tickers: {통화 코드: 현재가 정보} (CoinoneAPI.get_ticker 결과)
+        """
+        rows = [
+            (currency, float(ticker["last"]),
+             float(ticker["change_rate"]) if ticker.get("change_rate") is not None else None,
+             float(ticker["volume"]) if ticker.get("volume") is not None else None)
+            for currency, ticker in tickers.items()
+            if ticker and ticker.get("last") is not None
+        ]
+        if not rows:
+            return
+        
+        try:
+            timestamp = datetime.now().isoformat()
+            
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT INTO market_ticks (timestamp, currency, price, change_rate, volume)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(timestamp,) + row for row in rows])
+                conn.commit()
+                
+        except Exception as e:
+            logger.error(f"시세 저장 실패: {e}")
+            raise
+    
+    def get_ticks(self, currency: str, since: str = None) -> List[Dict]:
+        """
+        저장된 현재가 기록 조회 (모의 체결 재생용)
+        
+        Args:
+            currency: 통화 코드
+            since: 이 시각(ISO 형식) 이후 기록만 조회
+            
+        Returns:
+            {"timestamp", "price"} 목록 (오래된 순)
+        """
+        sql = "SELECT timestamp, price FROM market_ticks WHERE currency = ?"
+        params: tuple = (currency.upper(),)
+        if since:
+            sql += " AND timestamp > ?"
+            params += (since,)
+        
+        try:
+            return self._fetch_all(sql + " ORDER BY timestamp, id", params)
+            
+        except Exception as e:
+            logger.error(f"시세 기록 조회 실패: {e}")
+            return []
+    
+    def get_latest_tickers(self) -> Dict[str, Dict]:
+        """
+        통화별 마지막으로 저장된 현재가 조회
+        
+        Returns:
+            {통화 코드: {"last", "change_rate", "volume", "timestamp"}} 딕셔너리
+        """
+        try:
+            rows = self._cached(("latest_tickers",), lambda: self._fetch_all("""
+                SELECT t.currency, t.price, t.change_rate, t.volume, t.timestamp
+                FROM market_ticks t
+                JOIN (SELECT currency, MAX(id) AS id FROM market_ticks GROUP BY currency) latest
+                ON t.id = latest.id
+            """))
+            return {
+                row["currency"]: {
+                    "last": row["price"],
+                    "change_rate": row["change_rate"],
+                    "volume": row["volume"],
+                    "timestamp": row["timestamp"]
+                }
+                for row in rows
+            }
+            
+        except Exception as e:
+            logger.error(f"저장된 시세 조회 실패: {e}")
+            return {}
+    
+    def add_news(self, news_list: List[Dict]) -> int:
+        """
+        수집된 뉴스 저장 (이미 저장된 기사는 무시)
+        
+        Args:
+            news_list: 뉴스 목록 (title, description, url, source, published_at)
+            
+        Returns:
+            새로 저장된 기사 수
+        """
+        if not news_list:
+            return 0
+        
+        try:
+            timestamp = datetime.now().isoformat()
+            
+            with sqlite3.connect(self.db_path) as conn:
+                before = conn.total_changes
+                conn.executemany("""
+                    INSERT OR IGNORE INTO news
+                    (article_hash, title, description, url, source, published_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (article_hash(news), news.get("title", ""), news.get("description"),
+                     news.get("url"), news.get("source"), news.get("published_at"), timestamp)
+                    for news in news_list
+                ])
+                conn.commit()
+                added = conn.total_changes - before
+                logger.info(f"뉴스 저장: 신규 {added}건")
+                return added
+                
+        except Exception as e:
+            logger.error(f"뉴스 저장 실패: {e}")
+            raise
+    
+    def get_recent_news(self, limit: int = 20) -> List[Dict]:
+        """
+        최근 저장된 뉴스 조회
+        
+        Args:
+            limit: 조회 개수
+            
+        Returns:
+            뉴스 목록 (최신순)
+        """
+        try:
+            return self._cached(("recent_news", limit), lambda: self._fetch_all("""
+                SELECT title, description, url, source, published_at, created_at
+                FROM news
+                ORDER BY created_at DESC, rowid DESC
+                LIMIT ?
+            """, (limit,)))
+            
+        except Exception as e:
+            logger.error(f"뉴스 조회 실패: {e}")
+            return []
+    
+    def add_candles(self, currency: str, interval: str, candles: List[Dict]) -> int:
+        """
+        캔들 저장 (같은 시각의 봉은 덮어씀)
+        
+        Args:
+            currency: 통화 코드
+            interval: 봉 간격
+            candles: {"timestamp", "open", "high", "low", "close", "volume"} 딕셔너리 목록
+            
+        Returns:
+            저장한 봉 수
+        """
+        if not candles:
+            return 0
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO candles
+                    (currency, interval, timestamp, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (currency.upper(), interval, int(c["timestamp"]), c["open"], c["high"],
+                     c["low"], c["close"], c["volume"])
+                    for c in candles
+                ])
+                conn.commit()
+                return len(candles)
+                
+        except Exception as e:
+            logger.error(f"캔들 저장 실패: {e}")
+            raise
+    
+    def get_candles(self, currency: str, interval: str, limit: int = None,
+                    since: int = None) -> Dict[str, np.ndarray]:
+        """
+        저장된 캔들을 컬럼별 배열로 조회 (오래된 순)
+        
+        Args:
+            currency: 통화 코드
+            interval: 봉 간격
+            limit: 최근 봉 최대 개수 (None이면 전체)
+            since: 이 시각(ms) 이후의 봉만 조회
+            
+        Returns:
+            {"timestamp", "open", "high", "low", "close", "volume"} 배열 딕셔너리
+        """
+        columns = ("timestamp", "open", "high", "low", "close", "volume")
+        sql = f"""
+            SELECT {', '.join(columns)} FROM candles
+            WHERE currency = ? AND interval = ? AND timestamp > ?
+            ORDER BY timestamp DESC
+        """
+        params = (currency.upper(), interval, since if since is not None else -1)
+        if limit:
+            sql += " LIMIT ?"
+            params += (limit,)
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(sql, params).fetchall()
+            data = np.array(rows[::-1], dtype=float).reshape(-1, len(columns))
+            candles = {name: data[:, i] for i, name in enumerate(columns)}
+            candles["timestamp"] = candles["timestamp"].astype(np.int64)
+            return candles
+            
+        except Exception as e:
+            logger.error(f"캔들 조회 실패: {e}")
+            return {name: np.array([]) for name in columns}
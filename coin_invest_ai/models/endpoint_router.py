@@ -0,0 +1,283 @@
+"""
+LLM 엔드포인트 라우터: 여러 OpenAI 호환 서버에 진행 중 요청 수가 가장 적은 곳부터 분배
+(헬스 체크, 장애 시 다른 엔드포인트로 재시도, 엔드포인트별 지연 시간 통계)
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+import requests
+from config import LLM_ENDPOINT_COOLDOWN_SECONDS, LLM_HEALTH_CHECK_INTERVAL
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 지연 시간 백분위 계산에 사용할 최근 요청 수
+LATENCY_WINDOW = 200
+
+
+class EndpointUnavailable(Exception):
+    """엔드포인트 자체 문제(5xx 응답 등)로 다른 엔드포인트에서 재시도할 수 있는 오류"""
+
+
+# 다른 엔드포인트로 넘어가 재시도하는 오류
+FAILOVER_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, EndpointUnavailable)
+
+
+class Endpoint:
+    """엔드포인트 상태 및 통계"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.retry_at = 0.0
+        self.models: List[str] = []
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def record_success(self, seconds: float):
+        self.requests += 1
+        self._latencies.append(seconds)
+        self.healthy = True
+
+    def record_failure(self, error: Exception, cooldown: float):
+        self.requests += 1
+        self.failures += 1
+        self.last_error = str(error)
+        self.healthy = False
+        self.retry_at = time.time() + cooldown
+
+    def mean_latency(self) -> float:
+        return sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+
+    def available(self, now: float) -> bool:
+        """정상이거나 실패 후 대기 시간이 지나 다시 시도할 수 있는지 여부"""
+        return self.healthy or self.retry_at <= now
+
+    def percentile(self, q: float) -> float:
+        """최근 지연 시간의 q 백분위 (nearest-rank)"""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class EndpointRouter:
+    """최소 진행 요청(least outstanding requests) 방식 엔드포인트 라우터"""
+
+    def __init__(self, urls: List[str], health_check_interval: int = None,
+                 cooldown_seconds: int = None):
+        """
+        Args:
+            urls: OpenAI 호환 API 기본 URL 목록 (예: http://host:1234/v1)
+            health_check_interval: 백그라운드 헬스 체크 주기 (초, 0이면 사용 안 함)
+            cooldown_seconds: 실패한 엔드포인트를 다시 시도하기까지 대기 시간 (초)
+        """
+        if not urls:
+            raise ValueError("엔드포인트 URL이 없습니다")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.health_check_interval = (
+            LLM_HEALTH_CHECK_INTERVAL if health_check_interval is None else health_check_interval
+        )
+        self.cooldown_seconds = (
+            LLM_ENDPOINT_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def check_health(self, endpoint: Endpoint) -> bool:
+        """
+        /models 조회로 엔드포인트 상태 확인
+
+        Args:
+            endpoint: 확인할 엔드포인트
+
+        Returns:
+            정상 여부
+        """
+        try:
+            response = requests.get(f"{endpoint.url}/models", timeout=5)
+            if response.status_code != 200:
+                raise EndpointUnavailable(f"응답 오류: {response.status_code}")
+            endpoint.models = [m.get("id") for m in response.json().get("data", [])]
+            with self._lock:
+                endpoint.healthy = True
+                endpoint.retry_at = 0.0
+            if not endpoint.models:
+                logger.warning(f"{endpoint.url}에 로드된 모델이 없습니다")
+            return True
+        except Exception as e:
+            with self._lock:
+                was_healthy = endpoint.healthy
+                endpoint.healthy = False
+                endpoint.last_error = str(e)
+                endpoint.retry_at = time.time() + self.cooldown_seconds
+            if was_healthy:
+                logger.warning(f"엔드포인트 비정상: {endpoint.url} ({e})")
+            return False
+
+    def check_all(self) -> Dict[str, bool]:
+        """
+        전체 엔드포인트 헬스 체크
+
+        Returns:
+            {URL: 정상 여부} 딕셔너리
+        """
+        return {endpoint.url: self.check_health(endpoint) for endpoint in self.endpoints}
+
+    def start_health_checks(self):
+        """health_check_interval 주기로 백그라운드 헬스 체크 시작"""
+        if self.health_check_interval <= 0 or self._health_thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.health_check_interval):
+                self.check_all()
+
+        self._health_thread = threading.Thread(target=run, name="llm-health-check", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        """백그라운드 헬스 체크 종료"""
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+            self._health_thread = None
+
+    def _acquire(self, tried: set) -> Optional[Endpoint]:
+        """
+        진행 중 요청이 가장 적은 엔드포인트 선택
+
+        실패한 엔드포인트는 대기 시간 동안 제외하고, 대기 시간이 지나면 정상 엔드포인트와 같이 다시 시도한다.
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.url not in tried and e.available(now)]
+            if not candidates:
+                # 모두 실패 상태면 아직 시도하지 않은 엔드포인트를 대기 시간과 무관하게 시도
+                candidates = [e for e in self.endpoints if e.url not in tried]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: (not e.available(now), e.outstanding, e.mean_latency()))
+            endpoint.outstanding += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, started: float, error: Exception = None):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.record_success(time.perf_counter() - started)
+            else:
+                endpoint.record_failure(error, self.cooldown_seconds)
+
+    def call(self, send: Callable[[str], T]) -> T:
+        """
+        엔드포인트를 골라 요청 실행 (연결 실패/시간 초과/5xx 시 다음 엔드포인트로 재시도)
+
+        Args:
+            send: 기본 URL을 받아 요청을 수행하는 함수
+
+        Returns:
+            send의 반환값
+        """
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                raise ConnectionError(f"사용 가능한 LLM 엔드포인트가 없습니다: {last_error}")
+            tried.add(endpoint.url)
+
+            started = time.perf_counter()
+            try:
+                result = send(endpoint.url)
+            except FAILOVER_ERRORS as e:
+                self._release(endpoint, started, e)
+                logger.warning(f"엔드포인트 요청 실패, 다른 엔드포인트로 재시도: {endpoint.url} ({e})")
+                last_error = e
+                continue
+            except Exception:
+                # 요청 내용 문제(4xx 등)는 다른 엔드포인트에서도 같으므로 그대로 전달
+                self._release(endpoint, started)
+                raise
+            self._release(endpoint, started)
+            return result
+
+    def stream(self, open_stream: Callable[[str], Iterator[T]]) -> Iterator[T]:
+        """
+        스트리밍 요청 실행 (첫 조각을 받기 전에 실패한 경우에만 다음 엔드포인트로 재시도)
+
+        Args:
+            open_stream: 기본 URL을 받아 조각을 반환하는 제너레이터 함수
+
+        Yields:
+            스트림 조각
+        """
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                raise ConnectionError(f"사용 가능한 LLM 엔드포인트가 없습니다: {last_error}")
+            tried.add(endpoint.url)
+
+            started = time.perf_counter()
+            chunks = open_stream(endpoint.url)
+            try:
+                first = next(chunks)
+            except StopIteration:
+                self._release(endpoint, started)
+                return
+            except FAILOVER_ERRORS as e:
+                self._release(endpoint, started, e)
+                logger.warning(f"엔드포인트 스트리밍 실패, 다른 엔드포인트로 재시도: {endpoint.url} ({e})")
+                last_error = e
+                continue
+            except Exception:
+                self._release(endpoint, started)
+                raise
+
+            error = None
+            try:
+                yield first
+                yield from chunks
+            except FAILOVER_ERRORS as e:
+                error = e
+                raise
+            finally:
+                # 소비자가 중간에 멈춘 경우(GeneratorExit)도 정상 종료로 집계
+                chunks.close()
+                self._release(endpoint, started, error)
+            return
+
+    def stats(self) -> List[Dict]:
+        """
+        엔드포인트별 통계
+
+        Returns:
+            {"url", "healthy", "outstanding", "requests", "failures",
+             "mean_latency", "p50_latency", "p95_latency", "last_error"} 딕셔너리 목록
+        """
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "healthy": e.healthy,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "failures": e.failures,
+                    "mean_latency": e.mean_latency(),
+                    "p50_latency": e.percentile(0.5),
+                    "p95_latency": e.percentile(0.95),
+                    "last_error": e.last_error
+                }
+                for e in self.endpoints
+            ]
@@ -0,0 +1,477 @@
+"""
+추론 서비스 모듈: 별도 프로세스의 모델 워커 풀과 우선순위 요청 큐
+
+Streamlit 스크립트 스레드에서 생성하지 않고 워커 프로세스에 작업을 넘긴 뒤
+결과를 폴링하거나 스트리밍으로 받는다.
+"""
+
+import atexit
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from config import INFERENCE_JOB_TIMEOUT, INFERENCE_TORCH_THREADS, INFERENCE_WORKERS, QWEN_MODEL_PATH
+from utils.prompt_builder import estimate_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 기본 우선순위 (값이 작을수록 먼저 처리)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# 보관할 완료 작업 수 (초과 시 오래된 작업부터 삭제)
+MAX_FINISHED_JOBS = 200
+
+
+def _worker_main(worker_id: int, inbox, outbox, cancels, use_lmstudio: bool,
+                 model_path: str, torch_threads: int):
+    """워커 프로세스 진입점: 모델을 한 번 로드하고 작업을 순서대로 처리 (cancels로 취소할 작업 ID 수신)"""
+    # torch import 전에 스레드 수를 고정해야 OpenMP 풀 크기에 반영됨
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+    if not use_lmstudio:
+        import torch
+        torch.set_num_threads(torch_threads)
+        torch.set_num_interop_threads(1)
+
+    from models.qwen_local import QwenModel
+
+    try:
+        model = QwenModel(model_path=model_path, use_lmstudio=use_lmstudio)
+        model.load_model()
+    except Exception as e:
+        outbox.put(("failed", worker_id, str(e)))
+        return
+    outbox.put(("ready", worker_id, None))
+
+    # 작업을 꺼내기 전에 도착한 취소 요청도 작업 ID로 기억
+    cancelled_ids: Set[str] = set()
+
+    def is_cancelled(job_id: str) -> bool:
+        while True:
+            try:
+                cancelled_ids.add(cancels.get_nowait())
+            except queue.Empty:
+                return job_id in cancelled_ids
+
+    while True:
+        job = inbox.get()
+        if job is None:
+            break
+
+        job_id, prompt, kwargs = job
+        outbox.put(("started", worker_id, job_id))
+        result = ("cancelled", worker_id, job_id)
+        try:
+            if not is_cancelled(job_id):
+                metrics = {}
+                stream = model.generate_stream(prompt, metrics=metrics, **kwargs)
+                for chunk in stream:
+                    if is_cancelled(job_id):
+                        stream.close()
+                        break
+                    outbox.put(("chunk", job_id, chunk))
+                else:
+                    result = ("done", worker_id, (job_id, metrics))
+        except Exception as e:
+            result = ("error", worker_id, (job_id, str(e)))
+        # 다음 작업은 이 워커가 유휴 상태로 보고된 뒤에만 할당되므로, 보고 전에 정리해도 취소 요청을 잃지 않음
+        is_cancelled(job_id)
+        cancelled_ids.clear()
+        outbox.put(result)
+
+
+class InferenceJob:
+    """추론 작업 상태 (queued → running → done/error/cancelled)"""
+
+    def __init__(self, prompt: str, priority: int, kwargs: Dict, metrics: Dict = None):
+        self.job_id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.priority = priority
+        self.kwargs = kwargs
+        # 완료 시 워커가 보낸 생성 지표와 큐 대기 시간 (호출자가 넘긴 딕셔너리를 그대로 채움)
+        self.metrics = metrics if metrics is not None else {}
+        self.status = "queued"
+        self.chunks: List[str] = []
+        self.error: Optional[str] = None
+        self.worker_id: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._finished = threading.Event()
+
+    @property
+    def text(self) -> str:
+        """지금까지 생성된 텍스트"""
+        return "".join(self.chunks)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def _finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._finished.set()
+
+    def wait(self, timeout: float = None) -> str:
+        """
+        작업 완료까지 대기
+
+        Args:
+            timeout: 최대 대기 시간 (초, 기본값: INFERENCE_JOB_TIMEOUT)
+
+        Returns:
+            생성된 텍스트
+        """
+        if not self._finished.wait(INFERENCE_JOB_TIMEOUT if timeout is None else timeout):
+            raise TimeoutError(f"추론 작업 시간 초과: {self.job_id}")
+        if self.status == "error":
+            raise RuntimeError(f"추론 작업 실패: {self.error}")
+        return self.text
+
+    def stream(self, poll_interval: float = 0.05, timeout: float = None) -> Iterator[str]:
+        """
+        생성되는 텍스트 조각을 폴링하여 반환
+
+        Args:
+            poll_interval: 폴링 간격 (초)
+            timeout: 작업 생성 시점부터 최대 대기 시간 (초, 기본값: INFERENCE_JOB_TIMEOUT)
+
+        Yields:
+            새로 생성된 텍스트 조각
+        """
+        deadline = self.created_at + (INFERENCE_JOB_TIMEOUT if timeout is None else timeout)
+        sent = 0
+        while True:
+            finished = self.finished
+            available = len(self.chunks)
+            while sent < available:
+                yield self.chunks[sent]
+                sent += 1
+            if finished:
+                break
+            if time.time() >= deadline:
+                raise TimeoutError(f"추론 작업 시간 초과: {self.job_id}")
+            self._finished.wait(poll_interval)
+        if self.status == "error":
+            raise RuntimeError(f"추론 작업 실패: {self.error}")
+
+
+class InferenceService:
+    """모델 워커 프로세스 풀 및 우선순위 요청 큐"""
+
+    def __init__(self, num_workers: int = None, torch_threads: int = None,
+                 use_lmstudio: bool = False, model_path: str = None):
+        """
+        Args:
+            num_workers: 워커 프로세스 수 (기본값: INFERENCE_WORKERS)
+            torch_threads: 워커당 torch 스레드 수 (기본값: INFERENCE_TORCH_THREADS)
+            use_lmstudio: LM Studio API 사용 여부
+            model_path: 모델 경로 (로컬 모델 사용 시)
+        """
+        self.num_workers = num_workers or INFERENCE_WORKERS
+        self.torch_threads = torch_threads or INFERENCE_TORCH_THREADS
+        self.use_lmstudio = use_lmstudio
+        self.model_path = model_path or QWEN_MODEL_PATH
+        # 클라이언트 쪽에는 토크나이저가 없으므로 추정값 사용, 캐시는 워커가 관리
+        self.cache = None
+
+        self.jobs: Dict[str, InferenceJob] = {}
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._idle: List[int] = []
+        self._running: Dict[int, str] = {}
+        # 모델 로딩에 실패했거나 비정상 종료된 워커
+        self._failed: Set[int] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # fork 시 부모의 스레드/torch 상태가 복제되지 않도록 spawn 사용
+        context = mp.get_context("spawn")
+        self._outbox = context.Queue()
+        self._inboxes = []
+        self._cancel_queues = []
+        self._processes = []
+        for worker_id in range(self.num_workers):
+            inbox = context.Queue()
+            cancels = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(worker_id, inbox, self._outbox, cancels,
+                      self.use_lmstudio, self.model_path, self.torch_threads),
+                name=f"inference-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._cancel_queues.append(cancels)
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+        self._collector.start()
+        logger.info(f"추론 서비스 시작: 워커 {self.num_workers}개, 워커당 torch 스레드 {self.torch_threads}개")
+
+    @property
+    def pending(self) -> int:
+        """대기 중인 작업 수"""
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    @property
+    def ready_workers(self) -> int:
+        """작업을 받을 수 있는 워커 수 (로딩 중인 워커 제외)"""
+        with self._lock:
+            return len(self._idle) + len(self._running)
+
+    @property
+    def available(self) -> bool:
+        """작업을 처리할 수 있는(로딩 중 포함) 워커가 남아 있는지 여부"""
+        with self._lock:
+            return len(self._failed) < self.num_workers
+
+    def count_tokens(self, text: str) -> int:
+        """프롬프트 토큰 수 추정"""
+        return estimate_tokens(text)
+
+    def _dispatch(self):
+        """유휴 워커에 우선순위가 가장 높은 작업 할당 (lock 안에서 호출)"""
+        while self._idle and self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+            worker_id = self._idle.pop()
+            job.status = "running"
+            job.worker_id = worker_id
+            self._running[worker_id] = job_id
+            self._inboxes[worker_id].put((job_id, job.prompt, job.kwargs))
+
+    def _collect(self):
+        """워커 메시지를 받아 작업 상태 갱신"""
+        while True:
+            try:
+                kind, key, payload = self._outbox.get(timeout=1.0)
+            except queue.Empty:
+                self._reap_dead_workers()
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == "stop":
+                break
+
+            with self._lock:
+                if kind == "chunk":
+                    job = self.jobs.get(key)
+                    if job is not None:
+                        job.chunks.append(payload)
+                    continue
+
+                if kind == "ready":
+                    self._idle.append(key)
+                elif kind == "failed":
+                    logger.error(f"추론 워커 {key} 모델 로딩 실패: {payload}")
+                    self._mark_failed(key, f"모델 로딩 실패: {payload}")
+                elif kind == "started":
+                    job = self.jobs.get(payload)
+                    if job is not None:
+                        job.started_at = time.time()
+                else:
+                    metrics = None
+                    if kind == "error":
+                        job_id, error = payload
+                    elif kind == "done":
+                        (job_id, metrics), error = payload, None
+                    else:
+                        job_id, error = payload, None
+                    self._running.pop(key, None)
+                    if key not in self._failed:
+                        self._idle.append(key)
+                    job = self.jobs.get(job_id)
+                    if job is not None and metrics is not None:
+                        job.metrics.update(metrics)
+                        if job.started_at is not None:
+                            job.metrics["queue_wait"] = job.started_at - job.created_at
+                    if job is not None and not job.finished:
+                        job._finish({"done": "done", "cancelled": "cancelled"}.get(kind, "error"), error)
+                        logger.info(f"추론 작업 종료: {job_id} ({job.status})")
+
+                self._dispatch()
+
+    def _mark_failed(self, worker_id: int, reason: str):
+        """
+        워커를 사용 불가로 표시 (lock 안에서 호출)
+        실행 중이던 작업은 실패 처리하고, 남은 워커가 없으면 대기 중인 작업도 모두 실패 처리
+        """
+        self._failed.add(worker_id)
+        if worker_id in self._idle:
+            self._idle.remove(worker_id)
+        job = self.jobs.get(self._running.pop(worker_id, None))
+        if job is not None and not job.finished:
+            job._finish("error", f"워커 {worker_id} {reason}")
+
+        if len(self._failed) == self.num_workers:
+            for job in self.jobs.values():
+                if not job.finished:
+                    job._finish("error", f"사용 가능한 추론 워커가 없습니다 ({reason})")
+            self._heap.clear()
+
+    def _reap_dead_workers(self):
+        """비정상 종료된 워커를 사용 불가로 표시 (실행 중 작업은 실패 처리)"""
+        with self._lock:
+            for worker_id, process in enumerate(self._processes):
+                if process.is_alive() or worker_id in self._failed:
+                    continue
+                logger.error(f"추론 워커 {worker_id} 비정상 종료")
+                self._mark_failed(worker_id, f"비정상 종료 (exitcode={process.exitcode})")
+
+    def submit(self, prompt: str, priority: int = PRIORITY_INTERACTIVE, **kwargs) -> InferenceJob:
+        """
+        추론 작업 제출
+
+        Args:
+            prompt: 입력 프롬프트
+            priority: 우선순위 (값이 작을수록 먼저 처리)
+            **kwargs: QwenModel.generate_stream 인자 (max_length, temperature 등,
+                metrics 딕셔너리는 워커에 보내지 않고 완료 시 job.metrics로 채움)
+
+        Returns:
+            InferenceJob (stream() 또는 wait()로 결과 수신)
+        """
+        if self._closed:
+            raise RuntimeError("추론 서비스가 종료되었습니다")
+
+        metrics = kwargs.pop("metrics", None)
+        job = InferenceJob(prompt, priority, kwargs, metrics)
+        with self._lock:
+            finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at)
+            for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[old.job_id]
+            self.jobs[job.job_id] = job
+            if len(self._failed) == self.num_workers:
+                job._finish("error", "사용 가능한 추론 워커가 없습니다")
+                return job
+            heapq.heappush(self._heap, (priority, next(self._sequence), job.job_id))
+            self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[InferenceJob]:
+        """작업 조회"""
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        작업 취소 (대기 중이면 큐에서 제외, 실행 중이면 워커에 중단 신호)
+
+        Args:
+            job_id: 작업 ID
+
+        Returns:
+            취소 요청 여부
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            if job.status == "queued":
+                # 힙에서는 _dispatch 시점에 건너뜀
+                job._finish("cancelled")
+            elif self._running.get(job.worker_id) == job_id:
+                # 워커가 아직 작업을 꺼내지 않았어도 작업 ID로 취소됨
+                self._cancel_queues[job.worker_id].put(job_id)
+            logger.info(f"추론 작업 취소 요청: {job_id}")
+            return True
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        """작업을 제출하고 완료까지 대기 (QwenModel.generate와 같은 인자, 시간 초과 시 작업 취소)"""
+        job = self.submit(prompt, **kwargs)
+        try:
+            return job.wait()
+        except TimeoutError:
+            self.cancel(job.job_id)
+            raise
+
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """작업을 제출하고 결과를 스트리밍 (QwenModel.generate_stream과 같은 인자, 중단/시간 초과 시 작업 취소)"""
+        job = self.submit(prompt, **kwargs)
+        try:
+            yield from job.stream()
+        finally:
+            self.cancel(job.job_id)
+
+    def generate_batch(self, prompts: List[str], max_in_flight: int = None, **kwargs) -> List[Dict]:
+        """
+        여러 작업을 낮은 우선순위로 제출하고 모두 완료될 때까지 대기
+        (워커 수만큼 병렬 처리되며 max_in_flight는 워커 수로 대체됨)
+
+        Returns:
+            프롬프트 순서대로 {"prompt", "text", "elapsed", "cached", "error"} 딕셔너리 목록
+        """
+        jobs = [self.submit(prompt, priority=PRIORITY_BACKGROUND, **kwargs) for prompt in prompts]
+        deadline = time.time() + INFERENCE_JOB_TIMEOUT
+        results = []
+        for job in jobs:
+            if not job._finished.wait(max(0.0, deadline - time.time())):
+                self.cancel(job.job_id)
+                job._finish("error", "추론 작업 시간 초과")
+            results.append({
+                "prompt": job.prompt,
+                "text": job.text if job.status == "done" else None,
+                "elapsed": (job.finished_at or 0.0) - (job.started_at or job.finished_at or 0.0),
+                "cached": False,
+                "error": job.error if job.status != "done" else None
+            })
+        return results
+
+    def shutdown(self, timeout: float = 10.0):
+        """워커 프로세스 종료"""
+        if self._closed:
+            return
+        self._closed = True
+
+        with self._lock:
+            for job in self.jobs.values():
+                if not job.finished:
+                    job._finish("cancelled")
+            for worker_id, job_id in self._running.items():
+                self._cancel_queues[worker_id].put(job_id)
+
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._outbox.put(("stop", None, None))
+        logger.info("추론 서비스 종료")
+
+
+_services: Dict[Tuple[bool, str], InferenceService] = {}
+_service_lock = threading.Lock()
+
+
+def get_inference_service(use_lmstudio: bool = False, model_path: str = None) -> InferenceService:
+    """
+    프로세스 공용 추론 서비스 (백엔드/모델별로 처음 호출 시 워커 시작)
+
+    Args:
+        use_lmstudio: LM Studio API 사용 여부
+        model_path: 모델 경로 (로컬 모델 사용 시)
+
+    Returns:
+        InferenceService 인스턴스
+    """
+    key = (use_lmstudio, model_path or QWEN_MODEL_PATH)
+    with _service_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = InferenceService(use_lmstudio=use_lmstudio, model_path=model_path)
+            atexit.register(service.shutdown)
+        return service
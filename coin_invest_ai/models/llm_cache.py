@@ -0,0 +1,174 @@
+"""
+LLM 응답 캐시 모듈: 모델/프롬프트/샘플링 파라미터 기준으로 생성 결과를 SQLite에 저장
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """TTL 및 LRU 개수 제한이 있는 LLM 응답 캐시"""
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        """
+        Args:
+            db_path: 캐시 데이터베이스 파일 경로 (기본값: LLM_CACHE_PATH)
+            ttl_seconds: 캐시 유효 시간 (초, 기본값: LLM_CACHE_TTL_SECONDS)
+            max_entries: 최대 저장 개수, 초과 시 가장 오래 사용되지 않은 항목부터 삭제
+        """
+        self.db_path = Path(db_path or LLM_CACHE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds or LLM_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or LLM_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """캐시 테이블 생성"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_accessed REAL NOT NULL,
+                        hit_count INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed
+                    ON llm_cache (last_accessed)
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"LLM 캐시 초기화 실패: {e}")
+            raise
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """
+        캐시 키 생성 (프롬프트 공백은 정규화)
+
+        Args:
+            model_name: 모델 이름 또는 경로
+            prompt: 입력 프롬프트
+            temperature: 생성 온도
+            max_tokens: 최대 생성 길이
+
+        Returns:
+            SHA-256 캐시 키
+        """
+        normalized_prompt = " ".join(prompt.split())
+        raw = json.dumps(
+            [model_name or "", normalized_prompt, round(float(temperature), 4), int(max_tokens)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        캐시된 응답 조회 (만료된 항목은 없는 것으로 처리)
+
+        Args:
+            key: 캐시 키
+
+        Returns:
+            캐시된 응답 (없으면 None)
+        """
+        now = time.time()
+        try:
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None or now - row[1] > self.ttl_seconds:
+                    self.misses += 1
+                    return None
+
+                conn.execute("""
+                    UPDATE llm_cache SET last_accessed = ?, hit_count = hit_count + 1
+                    WHERE cache_key = ?
+                """, (now, key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+
+        except Exception as e:
+            logger.error(f"LLM 캐시 조회 실패: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        """
+        응답 저장 후 만료/초과 항목 정리
+
+        Args:
+            key: 캐시 키
+            response: 생성된 응답
+        """
+        now = time.time()
+        try:
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO llm_cache
+                    (cache_key, response, created_at, last_accessed, hit_count)
+                    VALUES (?, ?, ?, ?, 0)
+                """, (key, response, now, now))
+                self._evict(conn, now)
+                conn.commit()
+
+        except Exception as e:
+            logger.error(f"LLM 캐시 저장 실패: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """만료 항목 삭제 후 max_entries 초과분을 LRU 순서로 삭제"""
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute("""
+            DELETE FROM llm_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache
+                ORDER BY last_accessed DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+        logger.info("LLM 캐시 초기화 완료")
+
+    def stats(self) -> Dict:
+        """
+        캐시 통계
+
+        Returns:
+            hits, misses, hit_rate (현재 프로세스 기준), entries, total_hits (저장된 항목 누적)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            entries, total_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hit_count), 0) FROM llm_cache"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "total_hits": total_hits
+        }
@@ -0,0 +1,265 @@
+"""
+공유 모델 레지스트리: 프로세스당 모델 인스턴스 하나를 여러 세션이 참조 카운트로 공유
+"""
+
+import gc
+import queue
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Tuple
+from config import QWEN_MODEL_PATH, SHARED_MODEL_API_WORKERS
+from models.qwen_local import QwenModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 스트리밍 종료 표시
+_STREAM_END = object()
+
+
+class SharedModel:
+    """요청 큐를 통해 스레드 안전하게 생성하는 공유 모델"""
+
+    def __init__(self, model: QwenModel, workers: int = 1):
+        """
+        Args:
+            model: 로드된 QwenModel 인스턴스
+            workers: 요청 처리 스레드 수 (로컬 모델은 1)
+        """
+        self.model = model
+        self.ref_count = 0
+        self._requests: "queue.Queue" = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"shared-model-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __getattr__(self, name):
+        # cache, count_tokens 등은 원래 모델에 위임
+        return getattr(self.model, name)
+
+    @property
+    def pending(self) -> int:
+        """대기 중인 요청 수"""
+        return self._requests.qsize()
+
+    def _worker(self):
+        """요청 큐에서 작업을 꺼내 순서대로 실행"""
+        while True:
+            job = self._requests.get()
+            if job is None:
+                break
+            func, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+
+    def _submit(self, func) -> Future:
+        future = Future()
+        self._requests.put((func, future))
+        return future
+
+    def generate(self, *args, **kwargs) -> str:
+        """
+        요청 큐를 거쳐 텍스트 생성 (인자는 QwenModel.generate와 동일)
+
+        Returns:
+            생성된 텍스트
+        """
+        return self._submit(lambda: self.model.generate(*args, **kwargs)).result()
+
+    def generate_stream(self, *args, **kwargs) -> Iterator[str]:
+        """
+        요청 큐를 거쳐 스트리밍 생성 (인자는 QwenModel.generate_stream과 동일)
+
+        Yields:
+            생성된 텍스트 조각
+        """
+        chunks: "queue.Queue" = queue.Queue()
+        cancelled = threading.Event()
+
+        def run():
+            stream = self.model.generate_stream(*args, **kwargs)
+            try:
+                for chunk in stream:
+                    if cancelled.is_set():
+                        break
+                    chunks.put(chunk)
+            finally:
+                # 중간에 멈추면 원래 스트림을 닫아 생성도 중단 (로컬 모델은 다음 토큰에서 멈춤)
+                stream.close()
+                chunks.put(_STREAM_END)
+
+        future = self._submit(run)
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+            # 생성 중 발생한 예외 전달
+            future.result()
+        finally:
+            # 호출 측이 반복을 중단하면(재실행, 탭 닫힘) 대기 중인 요청은 취소하고 진행 중인 생성은 멈춤
+            cancelled.set()
+            future.cancel()
+
+    def generate_batch(self, *args, **kwargs) -> List[Dict]:
+        """
+        요청 큐를 거쳐 배치 생성 (인자는 QwenModel.generate_batch와 동일)
+
+        Returns:
+            프롬프트별 결과 딕셔너리 목록
+        """
+        return self._submit(lambda: self.model.generate_batch(*args, **kwargs)).result()
+
+    def shutdown(self):
+        """처리 스레드 종료 (대기 중인 요청은 취소하고 진행 중인 생성이 끝나기를 기다림)"""
+        while True:
+            try:
+                job = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job[1].cancel()
+        for _ in self._threads:
+            self._requests.put(None)
+        current = threading.current_thread()
+        for thread in self._threads:
+            if thread is not current:
+                thread.join()
+
+
+class ModelLease:
+    """
+    세션 하나가 보유한 공유 모델 참조
+
+    release()를 호출하지 않아도 세션이 정리되어 이 객체가 사라지면 참조를 반환한다.
+    """
+
+    def __init__(self, shared: SharedModel):
+        """
+        Args:
+            shared: acquire_model로 얻은 SharedModel
+        """
+        self.model = shared
+        self._finalizer = weakref.finalize(self, release_model, shared)
+        # 프로세스 종료 시에는 모델 해제(진행 중인 생성 대기)를 하지 않음
+        self._finalizer.atexit = False
+
+    def release(self):
+        """참조 반환 (여러 번 호출해도 한 번만 반환)"""
+        self._finalizer()
+
+
+_registry: Dict[Tuple[bool, str], SharedModel] = {}
+# 로드 중인 키: [로드 완료 Future, 로드를 기다리는 참조 수]
+_loading: Dict[Tuple[bool, str], list] = {}
+# _registry/_loading/ref_count만 보호 (모델 로드와 해제는 잠금 밖에서 실행)
+# 잠금을 잡은 스레드에서 가비지 컬렉션으로 ModelLease가 정리되어도 교착되지 않도록 재진입 허용
+_registry_lock = threading.RLock()
+
+
+def acquire_model(use_lmstudio: bool = True, model_path: str = None) -> SharedModel:
+    """
+    공유 모델 참조 획득 (처음 요청 시에만 로드)
+
+    Args:
+        use_lmstudio: LM Studio API 사용 여부
+        model_path: 모델 경로 (로컬 모델 사용 시)
+
+    Returns:
+        SharedModel 인스턴스 (사용 후 release_model 호출)
+    """
+    key = (use_lmstudio, model_path or QWEN_MODEL_PATH)
+
+    with _registry_lock:
+        shared = _registry.get(key)
+        if shared is not None:
+            shared.ref_count += 1
+            logger.info(f"공유 모델 참조 획득: {key} (참조 {shared.ref_count})")
+            return shared
+
+        # 같은 키를 다른 세션이 로드 중이면 그 결과를 기다림 (다른 키의 획득/반환은 막지 않음)
+        loading = _loading.get(key)
+        owner = loading is None
+        if owner:
+            loading = _loading[key] = [Future(), 0]
+        loading[1] += 1
+        future = loading[0]
+
+    if owner:
+        try:
+            model = QwenModel(model_path=model_path, use_lmstudio=use_lmstudio)
+            model.load_model()
+            # LM Studio는 서버가 동시 요청을 처리하고, 로컬 모델은 한 번에 하나씩 생성
+            workers = SHARED_MODEL_API_WORKERS if use_lmstudio else 1
+            shared = SharedModel(model, workers=workers)
+        except BaseException as e:
+            with _registry_lock:
+                del _loading[key]
+            future.set_exception(e)
+            raise
+
+        with _registry_lock:
+            shared.ref_count = _loading.pop(key)[1]
+            _registry[key] = shared
+            logger.info(f"공유 모델 생성: {key} (참조 {shared.ref_count})")
+        future.set_result(shared)
+        return shared
+
+    shared = future.result()
+    logger.info(f"공유 모델 참조 획득: {key}")
+    return shared
+
+
+def lease_model(use_lmstudio: bool = True, model_path: str = None) -> ModelLease:
+    """
+    세션용 공유 모델 참조 획득 (세션 상태에 보관, 세션이 끝나면 자동 반환)
+
+    Args:
+        use_lmstudio: LM Studio API 사용 여부
+        model_path: 모델 경로 (로컬 모델 사용 시)
+
+    Returns:
+        ModelLease 인스턴스 (모델은 lease.model)
+    """
+    return ModelLease(acquire_model(use_lmstudio=use_lmstudio, model_path=model_path))
+
+
+def release_model(shared: SharedModel):
+    """
+    공유 모델 참조 반환 (마지막 참조가 반환되면 레지스트리에서 빼고 백그라운드 스레드에서 해제)
+
+    세션 정리(가비지 컬렉션) 중 어느 스레드에서 호출되어도 진행 중인 생성을 기다리지 않는다.
+
+    Args:
+        shared: acquire_model로 얻은 SharedModel
+    """
+    with _registry_lock:
+        shared.ref_count -= 1
+        logger.info(f"공유 모델 참조 반환 (참조 {shared.ref_count})")
+        if shared.ref_count > 0:
+            return
+
+        for key, value in list(_registry.items()):
+            if value is shared:
+                del _registry[key]
+
+    threading.Thread(target=_dispose, args=(shared,), name="shared-model-dispose", daemon=True).start()
+
+
+def _dispose(shared: SharedModel):
+    """대기 중인 요청을 취소하고 처리 스레드가 끝나면 모델 해제"""
+    shared.shutdown()
+    shared.model.router.stop_health_checks()
+    shared.model.model = None
+    shared.model.tokenizer = None
+    gc.collect()
+    logger.info("공유 모델 해제 완료")
@@ -1,100 +1,592 @@
 """
 Qwen 모델 로딩 및 추론을 위한 모듈
 LM Studio API 또는 로컬 모델 사용
+(torch/transformers는 로컬 모델을 로드할 때 처음 import하므로 앱 시작을 지연시키지 않음)
 """
 
+import copy
+import hashlib
+import json
+import re
+import time
 import requests
 import logging
-from typing import Optional
-from config import QWEN_MODEL_PATH
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from contextlib import contextmanager
+from threading import Event, Thread
+from typing import Dict, Iterator, List, Optional
+from config import QWEN_MODEL_PATH, LLM_CACHE_ENABLED, LM_STUDIO_MAX_IN_FLIGHT, PREFIX_KV_CACHE_ENABLED
+from config import QWEN_CPU_MODE, QWEN_INTRA_OP_THREADS, QWEN_INTER_OP_THREADS, QWEN_QUANTIZED_DIR
+from config import QWEN_WARMUP, QWEN_DRAFT_MODEL_PATH, LM_STUDIO_API_URLS
+from models.endpoint_router import EndpointRouter, EndpointUnavailable
+from models.llm_cache import LLMCache
+from utils.prompt_builder import PROMPT_PREFIXES, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
-# LM Studio API 기본 URL
-LM_STUDIO_API_URL = "http://localhost:1234/v1"
+# 워밍업 생성용 짧은 프롬프트
+WARMUP_PROMPT = "비트코인"
+
+# cache 인자 기본값 표시 (None은 캐시 사용 안 함)
+_DEFAULT_CACHE = object()
 
 
 class QwenModel:
     """Qwen 모델을 로드하고 추론하는 클래스 (LM Studio API 사용)"""
     
-    def __init__(self, model_path: str = None, use_lmstudio: bool = True, api_url: str = None):
+    def __init__(self, model_path: str = None, use_lmstudio: bool = True, api_url: str = None,
+                 cache: Optional[LLMCache] = _DEFAULT_CACHE, cpu_mode: str = None, draft_model_path: str = None,
+                 api_urls: List[str] = None):
         """
         Args:
             model_path: 모델 경로 (로컬 모델 사용 시)
             use_lmstudio: LM Studio API 사용 여부 (기본값: True)
-            api_url: LM Studio API URL (기본값: http://localhost:1234/v1)
+            api_url: LM Studio API URL (지정 시 이 엔드포인트 하나만 사용)
+            cache: 응답 캐시 (기본값: LLM_CACHE_ENABLED이면 LLMCache(), None이면 캐시 사용 안 함)
+            cpu_mode: CPU 추론 모드 "fp32", "int8", "bf16" (기본값: QWEN_CPU_MODE)
+            draft_model_path: 보조 디코딩용 초안 모델 경로 (기본값: QWEN_DRAFT_MODEL_PATH, 로컬 모델만 해당)
+            api_urls: 요청을 분산할 OpenAI 호환 API URL 목록 (기본값: LM_STUDIO_API_URLS)
         """
         self.model_path = model_path or QWEN_MODEL_PATH
+        self.cpu_mode = cpu_mode or QWEN_CPU_MODE
         self.use_lmstudio = use_lmstudio
-        self.api_url = api_url or LM_STUDIO_API_URL
+        # 여러 엔드포인트에 진행 중 요청 수가 적은 순으로 분배 (장애 시 다른 엔드포인트로 재시도)
+        self.router = EndpointRouter(api_urls or ([api_url] if api_url else LM_STUDIO_API_URLS))
+        self.api_url = self.router.endpoints[0].url
         self.model = None
         self.tokenizer = None
+        self.draft_model_path = draft_model_path or QWEN_DRAFT_MODEL_PATH or None
+        self.draft_model = None
+        # 마지막 보조 디코딩 요청의 채택률/속도 지표
+        self.assist_stats: Dict = {}
+        if cache is _DEFAULT_CACHE:
+            cache = LLMCache() if LLM_CACHE_ENABLED else None
+        self.cache = cache
+        # 고정 프롬프트 접두어별 (토큰 ID, KV 캐시) (로컬 모델)
+        self._prefix_caches: Dict[str, tuple] = {}
+        # 로컬 모델 콜드 스타트 구간별 소요 시간 (초)
+        self.startup_timings: Dict[str, float] = {}
+        
+    def load_model(self, warmup: bool = None):
+        """
+        모델 로드 (LM Studio API의 경우 연결 확인)
         
-    def load_model(self):
-        """모델 로드 (LM Studio API의 경우 연결 확인)"""
+        Args:
+            warmup: 로드 직후 워밍업 생성 여부 (기본값: QWEN_WARMUP, 로컬 모델만 해당)
+        """
         try:
             if self.use_lmstudio:
                 logger.info("LM Studio API 사용 모드")
-                # LM Studio API 서버 연결 확인
-                try:
-                    response = requests.get(f"{self.api_url}/models", timeout=5)
-                    if response.status_code == 200:
-                        models = response.json()
-                        if 'data' in models and len(models['data']) > 0:
-                            logger.info(f"LM Studio API 연결 성공")
-                            logger.info(f"사용 가능한 모델: {[m.get('id') for m in models['data']]}")
-                        else:
-                            logger.warning("LM Studio에 로드된 모델이 없습니다")
-                    else:
-                        logger.warning(f"LM Studio API 응답 오류: {response.status_code}")
-                except requests.exceptions.ConnectionError:
+                # LM Studio API 서버 연결 확인 (엔드포인트별 /models 조회)
+                health = self.router.check_all()
+                if not any(health.values()):
                     logger.error("LM Studio API 서버에 연결할 수 없습니다")
                     raise ConnectionError("LM Studio API 서버를 시작해주세요")
+                
+                logger.info(f"LM Studio API 연결 성공: {sum(health.values())}/{len(health)}개 엔드포인트")
+                for endpoint in self.router.endpoints:
+                    if endpoint.healthy:
+                        logger.info(f"사용 가능한 모델 ({endpoint.url}): {endpoint.models}")
+                if len(self.router.endpoints) > 1:
+                    self.router.start_health_checks()
             else:
                 # 로컬 모델 로드 (기존 방식)
+                self.startup_timings = {}
+                start = time.perf_counter()
                 import torch
-                from transformers import AutoModelForCausalLM, AutoTokenizer
+                from transformers import AutoTokenizer
+                self.startup_timings["import"] = time.perf_counter() - start
                 
                 logger.info(f"로컬 모델 로딩 중: {self.model_path}")
                 self.device = "cuda" if torch.cuda.is_available() else "cpu"
                 logger.info(f"사용 디바이스: {self.device}")
                 
+                start = time.perf_counter()
                 self.tokenizer = AutoTokenizer.from_pretrained(
                     self.model_path,
                     trust_remote_code=True
                 )
+                self.startup_timings["tokenizer"] = time.perf_counter() - start
                 
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    self.model_path,
-                    trust_remote_code=True,
-                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                    device_map="auto" if self.device == "cuda" else None
-                )
-                
-                if self.device == "cpu":
-                    self.model = self.model.to(self.device)
+                start = time.perf_counter()
+                if self.device == "cuda":
+                    self.model = self._from_pretrained(torch.float16, device_map="auto")
+                else:
+                    self.model = self._load_cpu_model()
                 
                 self.model.eval()
+                self.startup_timings["weights"] = time.perf_counter() - start
                 logger.info("로컬 모델 로딩 완료")
+                
+                if self.draft_model_path:
+                    start = time.perf_counter()
+                    self._load_draft_model()
+                    self.startup_timings["draft"] = time.perf_counter() - start
+                
+                # 분석 프롬프트 공통 지시문(서술형, 구조화)은 모델 로드 시 한 번만 prefill
+                if PREFIX_KV_CACHE_ENABLED:
+                    start = time.perf_counter()
+                    for prefix in PROMPT_PREFIXES:
+                        self.set_prefix_cache(prefix)
+                    self.startup_timings["prefix"] = time.perf_counter() - start
+                
+                if QWEN_WARMUP if warmup is None else warmup:
+                    self.startup_timings["first_token"] = self.warmup()
+                
+                logger.info(self.cold_start_report())
             
         except Exception as e:
             logger.error(f"모델 로딩 실패: {e}")
             raise
     
+    def _from_pretrained(self, dtype, model_path: str = None, **kwargs):
+        """
+        가중치 로드 (safetensors가 있으면 메모리 매핑으로 읽어 전체 역직렬화/복사를 피함)
+        
+        Args:
+            dtype: 가중치 dtype
+            model_path: 모델 경로 (기본값: self.model_path)
+            **kwargs: from_pretrained 추가 인자 (device_map 등)
+            
+        Returns:
+            로드된 모델
+        """
+        from transformers import AutoModelForCausalLM
+        
+        model_path = model_path or self.model_path
+        model_dir = Path(model_path)
+        if model_dir.is_dir():
+            # 로컬 디렉터리는 safetensors 파일 유무로 결정, 허브 ID는 transformers 기본 동작
+            kwargs.setdefault("use_safetensors", any(model_dir.glob("*.safetensors")))
+        
+        return AutoModelForCausalLM.from_pretrained(
+            model_path,
+            trust_remote_code=True,
+            torch_dtype=dtype,
+            low_cpu_mem_usage=True,
+            **kwargs
+        )
+    
+    def _load_draft_model(self):
+        """보조 디코딩용 초안 모델 로드 (본 모델과 같은 디바이스/부동소수점 dtype)"""
+        import torch
+        
+        logger.info(f"초안 모델 로딩 중: {self.draft_model_path}")
+        if self.device == "cuda":
+            self.draft_model = self._from_pretrained(
+                torch.float16, model_path=self.draft_model_path, device_map="auto"
+            )
+        else:
+            # int8 본 모델도 초안은 fp32로 로드 (작은 모델이라 양자화 이득이 적음)
+            dtype = torch.bfloat16 if self.cpu_mode == "bf16" else torch.float32
+            self.draft_model = self._from_pretrained(
+                dtype, model_path=self.draft_model_path
+            ).to("cpu")
+        self.draft_model.eval()
+        
+        if self.draft_model.config.vocab_size != self.model.config.vocab_size:
+            logger.warning(
+                f"초안 모델 어휘 크기({self.draft_model.config.vocab_size})가 "
+                f"본 모델({self.model.config.vocab_size})과 다릅니다"
+            )
+        logger.info("초안 모델 로딩 완료")
+    
+    @staticmethod
+    def _first_token_timer(marks: Dict):
+        """첫 토큰이 생성된 시각을 marks["first_token"]에 기록하는 StoppingCriteria (생성은 멈추지 않음)"""
+        from transformers import StoppingCriteria
+        
+        class FirstTokenTimer(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                marks.setdefault("first_token", time.perf_counter())
+                return False
+        
+        return FirstTokenTimer()
+    
+    @staticmethod
+    def _record_metrics(metrics: Dict, start: float, first_token_at: Optional[float],
+                        prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """
+        생성 지표 기록
+        
+        tokens_per_sec은 첫 토큰 이후 구간(decode) 기준이며,
+        첫 토큰 시각을 알 수 없으면(비스트리밍 API) 전체 시간 기준으로 계산한다.
+        """
+        latency = time.perf_counter() - start
+        ttft = first_token_at - start if first_token_at is not None else None
+        decode_seconds = latency - (ttft or 0.0)
+        metrics.update(
+            cached=False,
+            ttft=ttft,
+            latency=latency,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_per_sec=(
+                completion_tokens / decode_seconds
+                if completion_tokens and decode_seconds > 0 else None
+            )
+        )
+    
+    @staticmethod
+    def _sampling_kwargs(temperature: float) -> Dict:
+        """로컬 generate의 샘플링 인자 (온도가 0 이하면 탐욕적 디코딩)"""
+        if temperature is None or temperature <= 0:
+            return {"do_sample": False}
+        return {"do_sample": True, "temperature": temperature}
+    
+    def _stop_kwargs(self, stop: List[str] = None) -> Dict:
+        """로컬 generate의 중단 문자열 인자 (토크나이저로 토큰 경계를 넘는 문자열도 검사)"""
+        if not stop:
+            return {}
+        return {"stop_strings": stop, "tokenizer": self.tokenizer}
+    
+    @contextmanager
+    def _count_forwards(self):
+        """
+        생성 중 본 모델/초안 모델의 forward 호출 수와 소요 시간 측정 (forward hook)
+        
+        Yields:
+            {"target": [호출 수, 초], "draft": [호출 수, 초]} 딕셔너리
+        """
+        counters = {"target": [0, 0.0], "draft": [0, 0.0]}
+        handles = []
+        for name, module in (("target", self.model), ("draft", self.draft_model)):
+            if module is None:
+                continue
+            started = {}
+            
+            def pre_hook(_module, _args, started=started):
+                started["t"] = time.perf_counter()
+            
+            def hook(_module, _args, _output, name=name, started=started):
+                counters[name][0] += 1
+                counters[name][1] += time.perf_counter() - started.pop("t", time.perf_counter())
+            
+            handles.append(module.register_forward_pre_hook(pre_hook))
+            handles.append(module.register_forward_hook(hook))
+        try:
+            yield counters
+        finally:
+            for handle in handles:
+                handle.remove()
+    
+    def _record_assist_stats(self, counters: Dict, new_tokens: int, seconds: float):
+        """
+        보조 디코딩 지표 계산 후 로그 기록
+        
+        본 모델은 검증 1회마다 채택된 초안 토큰 + 자체 토큰 1개를 내므로
+        채택 토큰 수 = 새 토큰 수 - 본 모델 호출 수. 초안 없이 생성했을 때의 시간은
+        새 토큰 수 x 본 모델 평균 forward 시간으로 추정한다.
+        """
+        target_calls, target_seconds = counters["target"]
+        draft_calls, _ = counters["draft"]
+        if target_calls == 0 or new_tokens <= 0:
+            return
+        
+        accepted = max(0, new_tokens - target_calls)
+        baseline_seconds = new_tokens * target_seconds / target_calls
+        self.assist_stats = {
+            "new_tokens": new_tokens,
+            "target_calls": target_calls,
+            "draft_tokens": draft_calls,
+            "accepted_tokens": accepted,
+            "acceptance_rate": accepted / draft_calls if draft_calls else 0.0,
+            "tokens_per_target_call": new_tokens / target_calls,
+            "tokens_per_sec": new_tokens / seconds if seconds > 0 else 0.0,
+            "estimated_speedup": baseline_seconds / seconds if seconds > 0 else 0.0
+        }
+        logger.info(
+            f"보조 디코딩: 새 토큰 {new_tokens}개, 초안 채택률 "
+            f"{self.assist_stats['acceptance_rate']:.0%} ({accepted}/{draft_calls}), "
+            f"본 모델 호출당 {self.assist_stats['tokens_per_target_call']:.2f} 토큰, "
+            f"{self.assist_stats['tokens_per_sec']:.2f} tokens/sec, "
+            f"추정 속도 향상 x{self.assist_stats['estimated_speedup']:.2f}"
+        )
+    
+    def warmup(self, prompt: str = WARMUP_PROMPT) -> float:
+        """
+        토큰 하나를 생성해 커널 초기화/메모리 할당을 미리 수행
+        
+        Args:
+            prompt: 워밍업 프롬프트
+            
+        Returns:
+            첫 토큰 생성까지 걸린 시간 (초)
+        """
+        if self.model is None or self.tokenizer is None:
+            raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        import torch
+        
+        start = time.perf_counter()
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            self.model.generate(
+                **inputs,
+                max_new_tokens=1,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id
+            )
+        return time.perf_counter() - start
+    
+    def cold_start_report(self) -> str:
+        """
+        콜드 스타트 구간별 소요 시간 요약
+        
+        Returns:
+            "import 1.20초, tokenizer 0.10초, ..." 형식 문자열
+        """
+        if not self.startup_timings:
+            return "콜드 스타트 측정값 없음"
+        labels = {
+            "import": "import",
+            "tokenizer": "토크나이저",
+            "weights": "가중치",
+            "draft": "초안 모델",
+            "prefix": "접두어 prefill",
+            "first_token": "첫 토큰"
+        }
+        parts = [
+            f"{labels.get(name, name)} {seconds:.2f}초"
+            for name, seconds in self.startup_timings.items()
+        ]
+        total = sum(self.startup_timings.values())
+        return f"콜드 스타트 {total:.2f}초 ({', '.join(parts)})"
+    
+    def _weights_fingerprint(self) -> str:
+        """
+        int8 캐시 키: 설정 파일 내용, 가중치 파일(이름, 크기, 수정 시각), torch 버전의 해시
+        (같은 디렉터리의 가중치를 교체하면 다시 양자화)
+        """
+        import torch
+        
+        digest = hashlib.sha256(f"{self.model_path}|{torch.__version__}".encode("utf-8"))
+        model_dir = Path(self.model_path)
+        if model_dir.is_dir():
+            for path in sorted(model_dir.iterdir()):
+                if path.name == "config.json":
+                    digest.update(path.read_bytes())
+                elif path.suffix in (".safetensors", ".bin", ".pt"):
+                    stat = path.stat()
+                    digest.update(f"{path.name}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+    
+    def _load_cpu_model(self):
+        """CPU 모드에 맞춰 모델 로드 (스레드 수 설정, int8 양자화 또는 bf16)"""
+        import torch
+        
+        if QWEN_INTRA_OP_THREADS > 0:
+            torch.set_num_threads(QWEN_INTRA_OP_THREADS)
+        if QWEN_INTER_OP_THREADS > 0:
+            try:
+                torch.set_num_interop_threads(QWEN_INTER_OP_THREADS)
+            except RuntimeError:
+                # 병렬 작업이 이미 시작된 프로세스에서는 변경 불가
+                logger.warning("inter-op 스레드 수는 프로세스 시작 직후에만 설정할 수 있습니다")
+        logger.info(
+            f"CPU 모드: {self.cpu_mode}, intra-op 스레드 {torch.get_num_threads()}개, "
+            f"inter-op 스레드 {torch.get_num_interop_threads()}개"
+        )
+        
+        if self.cpu_mode == "int8":
+            quantized_path = (
+                Path(QWEN_QUANTIZED_DIR)
+                / f"{Path(self.model_path).name}-{self._weights_fingerprint()}-int8.pt"
+            )
+            if quantized_path.exists():
+                from transformers import AutoConfig, AutoModelForCausalLM
+                
+                # 같은 구조로 양자화한 빈 모델에 저장된 state_dict만 로드 (임의 객체 역직렬화 없음)
+                logger.info(f"저장된 int8 모델 로드: {quantized_path}")
+                config = AutoConfig.from_pretrained(self.model_path, trust_remote_code=True)
+                model = AutoModelForCausalLM.from_config(config, trust_remote_code=True, torch_dtype=torch.float32)
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                model.load_state_dict(torch.load(quantized_path, weights_only=True))
+                return model.eval()
+            
+            model = self._from_pretrained(torch.float32)
+            # Linear 레이어 가중치를 int8로 변환 (활성값은 실행 시 동적 양자화)
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            quantized_path.parent.mkdir(parents=True, exist_ok=True)
+            torch.save(model.state_dict(), quantized_path)
+            logger.info(f"int8 양자화 모델 저장: {quantized_path}")
+            # 이전 가중치로 만든 같은 모델의 int8 파일 삭제
+            stale_name = re.compile(re.escape(Path(self.model_path).name) + r"-[0-9a-f]{16}-int8\.pt")
+            for stale in quantized_path.parent.iterdir():
+                if stale != quantized_path and stale_name.fullmatch(stale.name):
+                    stale.unlink()
+            return model
+        
+        dtype = torch.bfloat16 if self.cpu_mode == "bf16" else torch.float32
+        return self._from_pretrained(dtype).to("cpu")
+    
+    def benchmark(self, prompt: str = "비트코인 시장 상황을 설명해주세요.",
+                  max_new_tokens: int = 64) -> Dict:
+        """
+        로컬 모델 생성 속도 측정
+        
+        Args:
+            prompt: 측정용 프롬프트
+            max_new_tokens: 생성할 토큰 수
+            
+        Returns:
+            {"mode", "new_tokens", "seconds", "tokens_per_sec"} 딕셔너리
+        """
+        if self.model is None or self.tokenizer is None:
+            raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        import torch
+        
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id
+            )
+        seconds = time.perf_counter() - start
+        new_tokens = outputs.shape[1] - inputs["input_ids"].shape[1]
+        
+        result = {
+            "mode": self.cpu_mode if self.device == "cpu" else self.device,
+            "new_tokens": new_tokens,
+            "seconds": seconds,
+            "tokens_per_sec": new_tokens / seconds if seconds > 0 else 0.0
+        }
+        logger.info(f"생성 속도 ({result['mode']}): {result['tokens_per_sec']:.2f} tokens/sec")
+        return result
+    
+    def set_prefix_cache(self, prefix: str):
+        """
+        고정 프롬프트 접두어의 KV 캐시(past_key_values)를 미리 계산 (로컬 모델 전용)
+        이후 이 접두어로 시작하는 프롬프트는 접두어 부분의 prefill을 건너뜀 (접두어 여러 개 등록 가능)
+        
+        Args:
+            prefix: 고정 프롬프트 접두어
+        """
+        if self.use_lmstudio:
+            return
+        if self.model is None or self.tokenizer is None:
+            raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        import torch
+        
+        start = time.perf_counter()
+        prefix_ids = self.tokenizer(
+            prefix, return_tensors="pt", add_special_tokens=False
+        ).input_ids.to(self.device)
+        with torch.no_grad():
+            outputs = self.model(input_ids=prefix_ids, use_cache=True)
+        
+        self._prefix_caches[prefix] = (prefix_ids, outputs.past_key_values)
+        logger.info(
+            f"접두어 KV 캐시 생성: {prefix_ids.shape[1]} 토큰 ({time.perf_counter() - start:.2f}초)"
+        )
+    
+    def _prepare_inputs(self, prompt: str) -> Dict:
+        """로컬 생성 입력 구성 (고정 접두어로 시작하면 캐시된 KV 재사용)"""
+        matches = [prefix for prefix in self._prefix_caches if prompt.startswith(prefix)]
+        if not matches:
+            return dict(self.tokenizer(prompt, return_tensors="pt").to(self.device))
+        
+        import torch
+        
+        prefix = max(matches, key=len)
+        prefix_ids, prefix_cache = self._prefix_caches[prefix]
+        # 접두어와 나머지를 따로 토크나이징해야 토큰 경계가 캐시와 일치
+        suffix_ids = self.tokenizer(
+            prompt[len(prefix):], return_tensors="pt", add_special_tokens=False
+        ).input_ids.to(self.device)
+        if suffix_ids.shape[1] == 0:
+            return dict(self.tokenizer(prompt, return_tensors="pt").to(self.device))
+        
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            # generate가 캐시를 제자리에서 확장하므로 호출마다 복사본 사용
+            "past_key_values": copy.deepcopy(prefix_cache)
+        }
+    
+    def count_tokens(self, text: str) -> int:
+        """
+        토큰 수 계산
+        로컬 모델은 로드된 토크나이저를, LM Studio API는 추정값을 사용
+        
+        Args:
+            text: 입력 텍스트
+            
+        Returns:
+            토큰 수
+        """
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return estimate_tokens(text)
+    
+    def _cache_key(self, prompt: str, max_length: int, temperature: float, model_name: str,
+                   stop: List[str] = None) -> str:
+        """응답 캐시 키 (로컬 모델은 모델 경로를 모델 이름으로 사용)"""
+        model = model_name if self.use_lmstudio else self.model_path
+        if stop:
+            model = f"{model}|stop={json.dumps(stop, ensure_ascii=False)}"
+        return LLMCache.make_key(model, prompt, temperature, max_length)
+    
+    @staticmethod
+    def _truncate_at_stop(text: str, stop: List[str] = None) -> str:
+        """첫 번째 중단 문자열 앞까지 자르기 (LM Studio API와 같이 중단 문자열은 제외)"""
+        for stop_string in stop or []:
+            index = text.find(stop_string)
+            if index != -1:
+                text = text[:index]
+        return text
+    
     def generate(self, prompt: str, max_length: int = 512, temperature: float = 0.7, 
-                 model_name: str = "local-model") -> str:
+                 model_name: str = "local-model", use_cache: bool = True,
+                 stop: List[str] = None, metrics: Dict = None) -> str:
         """
-        텍스트 생성
+        텍스트 생성 (캐시에 같은 요청이 있으면 저장된 응답 반환)
         
         Args:
             prompt: 입력 프롬프트
-            max_length: 최대 생성 길이
+            max_length: 최대 생성 토큰 수 (프롬프트 제외)
             temperature: 생성 온도
             model_name: LM Studio에서 사용할 모델 이름 (기본값: "local-model")
+            use_cache: 응답 캐시 사용 여부 (False면 항상 새로 생성)
+            stop: 생성을 멈출 문자열 목록 (결과에는 포함하지 않음)
+            metrics: 지정 시 생성 지표를 채워 넣을 딕셔너리
+                (cached, ttft, latency, prompt_tokens, completion_tokens, tokens_per_sec)
             
         Returns:
             생성된 텍스트
         """
+        metrics = metrics if metrics is not None else {}
+        if self.cache is None or not use_cache:
+            return self._generate(prompt, max_length, temperature, model_name, stop, metrics)
+        
+        key = self._cache_key(prompt, max_length, temperature, model_name, stop)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("LLM 캐시 적중")
+            metrics.update(cached=True)
+            return cached
+        
+        result = self._generate(prompt, max_length, temperature, model_name, stop, metrics)
+        self.cache.set(key, result)
+        return result
+    
+    def _generate(self, prompt: str, max_length: int, temperature: float, model_name: str,
+                  stop: List[str] = None, metrics: Dict = None) -> str:
+        """캐시를 거치지 않는 실제 텍스트 생성"""
+        metrics = metrics if metrics is not None else {}
+        start = time.perf_counter()
         if self.use_lmstudio:
             # LM Studio API 사용
             try:
@@ -106,21 +598,36 @@ class QwenModel:
                     "temperature": temperature,
                     "max_tokens": max_length
                 }
+                if stop:
+                    payload["stop"] = stop
                 
-                response = requests.post(
-                    f"{self.api_url}/chat/completions",
-                    json=payload,
-                    timeout=60
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and len(result['choices']) > 0:
-                        return result['choices'][0]['message']['content']
+                def send(url: str) -> str:
+                    response = requests.post(
+                        f"{url}/chat/completions",
+                        json=payload,
+                        timeout=60
+                    )
+                    
+                    if response.status_code == 200:
+                        result = response.json()
+                        if 'choices' in result and len(result['choices']) > 0:
+                            content = result['choices'][0]['message']['content']
+                            # 토큰 수는 서버의 usage 값 사용 (없으면 추정)
+                            usage = result.get('usage') or {}
+                            self._record_metrics(
+                                metrics, start, None,
+                                usage.get('prompt_tokens', estimate_tokens(prompt)),
+                                usage.get('completion_tokens', estimate_tokens(content))
+                            )
+                            return content
+                        else:
+                            raise ValueError("응답에 choices가 없습니다")
+                    elif response.status_code >= 500:
+                        raise EndpointUnavailable(f"API 요청 실패: {response.status_code} - {response.text}")
                     else:
-                        raise ValueError("응답에 choices가 없습니다")
-                else:
-                    raise Exception(f"API 요청 실패: {response.status_code} - {response.text}")
+                        raise Exception(f"API 요청 실패: {response.status_code} - {response.text}")
+                
+                return self.router.call(send)
                     
             except requests.exceptions.ConnectionError:
                 raise ConnectionError("LM Studio API 서버에 연결할 수 없습니다")
@@ -133,29 +640,352 @@ class QwenModel:
                 raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
             
             try:
-                # 토크나이징
-                inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+                import torch
+                
+                # 토크나이징 (고정 접두어는 캐시된 KV 재사용)
+                inputs = self._prepare_inputs(prompt)
+                
+                # 생성 (초안 모델이 있으면 보조 디코딩)
+                from transformers import StoppingCriteriaList
                 
-                # 생성
-                with torch.no_grad():
+                marks = {}
+                with torch.no_grad(), self._count_forwards() as counters:
                     outputs = self.model.generate(
                         **inputs,
-                        max_length=max_length,
-                        temperature=temperature,
-                        do_sample=True,
-                        pad_token_id=self.tokenizer.eos_token_id
+                        max_new_tokens=max_length,
+                        **self._sampling_kwargs(temperature),
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        assistant_model=self.draft_model,
+                        stopping_criteria=StoppingCriteriaList([self._first_token_timer(marks)]),
+                        **self._stop_kwargs(stop)
                     )
+                prompt_tokens = inputs["input_ids"].shape[1]
+                self._record_metrics(
+                    metrics, start, marks.get("first_token"),
+                    prompt_tokens, outputs.shape[1] - prompt_tokens
+                )
+                if self.draft_model is not None:
+                    self._record_assist_stats(
+                        counters,
+                        outputs.shape[1] - prompt_tokens,
+                        time.perf_counter() - start
+                    )
+                
+                # 프롬프트를 제외한 생성 토큰만 디코딩
+                generated_text = self.tokenizer.decode(
+                    outputs[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True
+                )
+                return self._truncate_at_stop(generated_text, stop).strip()
+                
+            except Exception as e:
+                logger.error(f"텍스트 생성 실패: {e}")
+                raise
+    
+    def generate_stream(self, prompt: str, max_length: int = 512, temperature: float = 0.7,
+                        model_name: str = "local-model", use_cache: bool = True,
+                        stop: List[str] = None, metrics: Dict = None) -> Iterator[str]:
+        """
+        텍스트 스트리밍 생성 (토큰이 생성되는 대로 조각 단위로 반환)
+        캐시 적중 시 저장된 응답을 한 번에 반환하고, 끝까지 생성된 응답은 캐시에 저장
+        
+        Args:
+            prompt: 입력 프롬프트
+            max_length: 최대 생성 토큰 수 (프롬프트 제외)
+            temperature: 생성 온도
+            model_name: LM Studio에서 사용할 모델 이름 (기본값: "local-model")
+            use_cache: 응답 캐시 사용 여부 (False면 항상 새로 생성)
+            stop: 생성을 멈출 문자열 목록 (결과에는 포함하지 않음)
+            metrics: 지정 시 스트림이 끝난 뒤 생성 지표를 채워 넣을 딕셔너리 (generate와 동일)
+            
+        Yields:
+            생성된 텍스트 조각
+        """
+        metrics = metrics if metrics is not None else {}
+        if self.cache is None or not use_cache:
+            yield from self._generate_stream(prompt, max_length, temperature, model_name, stop, metrics)
+            return
+        
+        key = self._cache_key(prompt, max_length, temperature, model_name, stop)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("LLM 캐시 적중")
+            metrics.update(cached=True)
+            yield cached
+            return
+        
+        chunks = []
+        for chunk in self._generate_stream(prompt, max_length, temperature, model_name, stop, metrics):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
+    
+    def _generate_stream(self, prompt: str, max_length: int, temperature: float,
+                         model_name: str, stop: List[str] = None, metrics: Dict = None) -> Iterator[str]:
+        """캐시를 거치지 않는 실제 스트리밍 생성"""
+        metrics = metrics if metrics is not None else {}
+        start = time.perf_counter()
+        if self.use_lmstudio:
+            # LM Studio API SSE 스트리밍
+            try:
+                payload = {
+                    "model": model_name,
+                    "messages": [
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": temperature,
+                    "max_tokens": max_length,
+                    "stream": True,
+                    # 마지막 조각으로 토큰 사용량 수신
+                    "stream_options": {"include_usage": True}
+                }
+                if stop:
+                    payload["stop"] = stop
+                
+                def open_stream(url: str) -> Iterator[str]:
+                    with requests.post(
+                        f"{url}/chat/completions",
+                        json=payload,
+                        stream=True,
+                        timeout=60
+                    ) as response:
+                        if response.status_code >= 500:
+                            raise EndpointUnavailable(f"API 요청 실패: {response.status_code} - {response.text}")
+                        if response.status_code != 200:
+                            raise Exception(f"API 요청 실패: {response.status_code} - {response.text}")
+                        
+                        for raw_line in response.iter_lines():
+                            line = raw_line.decode("utf-8")
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            
+                            chunk = json.loads(data)
+                            if chunk.get("usage"):
+                                usage.update(chunk["usage"])
+                            choices = chunk.get("choices") or []
+                            if choices:
+                                content = choices[0].get("delta", {}).get("content")
+                                if content:
+                                    yield content
+                
+                usage = {}
+                marks = {}
+                contents = []
+                for content in self.router.stream(open_stream):
+                    marks.setdefault("first_token", time.perf_counter())
+                    contents.append(content)
+                    yield content
+                self._record_metrics(
+                    metrics, start, marks.get("first_token"),
+                    usage.get("prompt_tokens", estimate_tokens(prompt)),
+                    usage.get("completion_tokens", estimate_tokens("".join(contents)))
+                )
+                    
+            except requests.exceptions.ConnectionError:
+                raise ConnectionError("LM Studio API 서버에 연결할 수 없습니다")
+            except Exception as e:
+                logger.error(f"스트리밍 생성 실패: {e}")
+                raise
+        else:
+            # 로컬 모델: 생성은 별도 스레드에서, 토큰은 TextIteratorStreamer로 수신
+            if self.model is None or self.tokenizer is None:
+                raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+            
+            import torch
+            from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+            
+            # 소비자가 반복을 중단하면(취소) 생성 스레드도 다음 토큰에서 멈춤
+            stop_event = Event()
+            
+            class StopOnEvent(StoppingCriteria):
+                def __call__(self, input_ids, scores, **kwargs):
+                    return stop_event.is_set()
+            
+            try:
+                inputs = self._prepare_inputs(prompt)
+                streamer = TextIteratorStreamer(
+                    self.tokenizer,
+                    skip_prompt=True,
+                    skip_special_tokens=True
+                )
+                
+                marks = {}
+                # 생성 스레드에서 발생한 예외 (소비자 쪽에서 다시 발생시킴)
+                errors: List[BaseException] = []
                 
-                # 디코딩
-                generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+                def run_generate():
+                    try:
+                        # no_grad는 스레드별로 적용되므로 생성 스레드 안에서 설정
+                        with torch.no_grad(), self._count_forwards() as counters:
+                            outputs = self.model.generate(
+                                **inputs,
+                                max_new_tokens=max_length,
+                                **self._sampling_kwargs(temperature),
+                                pad_token_id=self.tokenizer.eos_token_id,
+                                streamer=streamer,
+                                stopping_criteria=StoppingCriteriaList(
+                                    [StopOnEvent(), self._first_token_timer(marks)]
+                                ),
+                                assistant_model=self.draft_model,
+                                **self._stop_kwargs(stop)
+                            )
+                        prompt_tokens = inputs["input_ids"].shape[1]
+                        self._record_metrics(
+                            metrics, start, marks.get("first_token"),
+                            prompt_tokens, outputs.shape[1] - prompt_tokens
+                        )
+                        if self.draft_model is not None:
+                            self._record_assist_stats(
+                                counters,
+                                outputs.shape[1] - prompt_tokens,
+                                time.perf_counter() - start
+                            )
+                    except BaseException as e:
+                        errors.append(e)
+                    finally:
+                        # 생성이 실패해도 소비자의 streamer 반복이 끝나도록 종료 신호 전송
+                        streamer.end()
                 
-                # 프롬프트 제거하고 생성된 부분만 반환
-                if generated_text.startswith(prompt):
-                    generated_text = generated_text[len(prompt):].strip()
+                thread = Thread(target=run_generate, daemon=True)
+                thread.start()
                 
-                return generated_text
+                try:
+                    # 중단 문자열이 조각 경계에 걸칠 수 있으므로 그 길이만큼은 보류했다가 내보냄
+                    hold = max((len(s) for s in stop or []), default=1) - 1
+                    pending = ""
+                    for text in streamer:
+                        pending += text
+                        truncated = self._truncate_at_stop(pending, stop)
+                        if len(truncated) < len(pending):
+                            pending = truncated
+                            break
+                        if len(pending) > hold:
+                            yield pending[:len(pending) - hold]
+                            pending = pending[len(pending) - hold:]
+                    if pending:
+                        yield pending
+                finally:
+                    stop_event.set()
+                    thread.join()
+                
+                if errors:
+                    raise errors[0]
                 
             except Exception as e:
-                logger.error(f"텍스트 생성 실패: {e}")
+                logger.error(f"스트리밍 생성 실패: {e}")
                 raise
-
+    
+    def generate_batch(self, prompts: List[str], max_length: int = 512, temperature: float = 0.7,
+                       model_name: str = "local-model", use_cache: bool = True,
+                       max_in_flight: int = None) -> List[Dict]:
+        """
+        여러 프롬프트 일괄 생성
+        로컬 모델은 왼쪽 패딩 배치 디코딩, LM Studio API는 동시 요청 수를 제한한 병렬 요청
+        (로컬 배치 생성은 초안 모델(보조 디코딩은 배치 크기 1만 지원)과 고정 접두어 KV 캐시를 쓰지 않음)
+        
+        Args:
+            prompts: 입력 프롬프트 목록
+            max_length: 프롬프트별 최대 생성 토큰 수
+            temperature: 생성 온도
+            model_name: LM Studio에서 사용할 모델 이름 (기본값: "local-model")
+            use_cache: 응답 캐시 사용 여부
+            max_in_flight: LM Studio 동시 요청 수 (기본값: 엔드포인트 수 x LM_STUDIO_MAX_IN_FLIGHT)
+            
+        Returns:
+            프롬프트 순서대로 {"prompt", "text", "elapsed", "cached", "error"} 딕셔너리 목록
+        """
+        results = [
+            {"prompt": prompt, "text": None, "elapsed": 0.0, "cached": False, "error": None}
+            for prompt in prompts
+        ]
+        
+        # 캐시에 있는 프롬프트는 생성하지 않음
+        pending = []
+        for i, prompt in enumerate(prompts):
+            if self.cache is not None and use_cache:
+                cached = self.cache.get(self._cache_key(prompt, max_length, temperature, model_name))
+                if cached is not None:
+                    results[i].update(text=cached, cached=True)
+                    continue
+            pending.append(i)
+        
+        if not pending:
+            return results
+        
+        if self.use_lmstudio:
+            def run(i: int):
+                start = time.perf_counter()
+                try:
+                    results[i]["text"] = self._generate(prompts[i], max_length, temperature, model_name)
+                except Exception as e:
+                    results[i]["error"] = str(e)
+                results[i]["elapsed"] = time.perf_counter() - start
+            
+            # 기본 동시 요청 수는 엔드포인트마다 LM_STUDIO_MAX_IN_FLIGHT
+            max_in_flight = max_in_flight or LM_STUDIO_MAX_IN_FLIGHT * len(self.router.endpoints)
+            workers = max(1, min(max_in_flight, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run, pending))
+        else:
+            start = time.perf_counter()
+            try:
+                texts = self._generate_padded_batch([prompts[i] for i in pending], max_length, temperature)
+                for i, text in zip(pending, texts):
+                    results[i]["text"] = text
+            except Exception as e:
+                logger.error(f"배치 생성 실패: {e}")
+                for i in pending:
+                    results[i]["error"] = str(e)
+            # 배치 디코딩은 모든 프롬프트가 같은 시간을 공유
+            elapsed = time.perf_counter() - start
+            for i in pending:
+                results[i]["elapsed"] = elapsed
+        
+        for i in pending:
+            if results[i]["error"] is None and self.cache is not None and use_cache:
+                self.cache.set(self._cache_key(prompts[i], max_length, temperature, model_name),
+                               results[i]["text"])
+        
+        logger.info(f"배치 생성 완료: {len(prompts)}개 (캐시 {len(prompts) - len(pending)}개)")
+        return results
+    
+    def _generate_padded_batch(self, prompts: List[str], max_new_tokens: int,
+                               temperature: float) -> List[str]:
+        """
+        왼쪽 패딩으로 여러 프롬프트를 한 번에 디코딩 (로컬 모델)
+        
+        단일 프롬프트 생성과 달리 고정 접두어 KV 캐시와 초안 모델(보조 디코딩)은 쓰지 않는다.
+        공유 토크나이저의 패딩 설정은 바꾸지 않고 여기서 직접 패딩한다.
+        """
+        if self.model is None or self.tokenizer is None:
+            raise ValueError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        import torch
+        
+        # 디코더 전용 모델은 마지막 토큰 위치가 맞도록 왼쪽 패딩 필요
+        encoded = [self.tokenizer(prompt)["input_ids"] for prompt in prompts]
+        width = max(len(ids) for ids in encoded)
+        pad_token_id = (
+            self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None
+            else self.tokenizer.eos_token_id
+        )
+        input_ids = torch.tensor([[pad_token_id] * (width - len(ids)) + ids for ids in encoded])
+        attention_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in encoded])
+        
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids.to(self.device),
+                attention_mask=attention_mask.to(self.device),
+                max_new_tokens=max_new_tokens,
+                **self._sampling_kwargs(temperature),
+                pad_token_id=pad_token_id
+            )
+        
+        # 패딩된 프롬프트 길이 이후가 생성 부분
+        generated = outputs[:, width:]
+        return [
+            text.strip()
+            for text in self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        ]
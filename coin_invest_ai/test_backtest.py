@@ -0,0 +1,118 @@
+"""
+백테스트(utils.backtest) 테스트: 자산 곡선/비용 계산, 전략 파라미터 검증, 파라미터 탐색
+"""
+
+from datetime import datetime
+import numpy as np
+from utils.backtest import (ai_recommendations, attach_recommendations, depth_slippage, run_backtest,
+                            simulate, sweep)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+def make_candles(count: int = 300, seed: int = 3) -> dict:
+    """무작위 보행 가격의 1시간봉 캔들 배열"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    return {
+        "timestamp": 1_700_000_000_000 + np.arange(count, dtype=np.int64) * 3_600_000,
+        "open": close,
+        "high": close * 1.005,
+        "low": close * 0.995,
+        "close": close,
+        "volume": rng.uniform(1.0, 10.0, count),
+    }
+
+
+def test_simulate_equity_and_costs():
+    """보유 구간 수익, 비중 변경 비용, 거래 수, 벤치마크 수익률"""
+    close = np.array([100.0, 110.0, 121.0, 108.9])
+    metrics, equity = simulate(close, [1.0, 1.0, 0.0, 0.0], cost_rate=0.01, interval="1h")
+    # 0번 봉 매수(비용 1%), 1~2번 봉 보유(+10%씩), 2번 봉 매도(비용 1%)
+    assert np.allclose(equity, [0.99, 0.99 * 1.1, 0.99 * 1.1 * 1.09, 0.99 * 1.1 * 1.09])
+    assert metrics["trades"] == 2
+    assert np.isclose(metrics["costs"], 0.02)
+    assert np.isclose(metrics["benchmark_return"], 0.089)
+    assert np.isclose(metrics["exposure"], 0.5)
+    assert metrics["max_drawdown"] == 0.0
+
+    # 항상 미보유면 수익과 비용 모두 0
+    metrics, equity = simulate(close, np.zeros(4), cost_rate=0.01, interval="1h")
+    assert (metrics["total_return"], metrics["trades"], metrics["sharpe"]) == (0.0, 0, 0.0)
+    assert (equity == 1.0).all()
+
+
+def test_simulate_rejects_short_series():
+    """봉이 2개 미만이면 ValueError"""
+    try:
+        simulate(np.array([100.0]), np.array([1.0]), cost_rate=0.0)
+        assert False, "ValueError가 발생해야 합니다"
+    except ValueError:
+        pass
+
+
+def test_strategies_reject_invalid_params():
+    """의미 없는 파라미터 조합은 ValueError"""
+    data = make_candles()
+    for strategy, params in (("sma_cross", {"fast": 30, "slow": 10}),
+                             ("macd_cross", {"fast": 26, "slow": 12}),
+                             ("rsi_reversion", {"lower": 70, "upper": 30})):
+        try:
+            run_backtest(data, strategy, params, interval="1h")
+            assert False, f"{strategy}: ValueError가 발생해야 합니다"
+        except ValueError:
+            pass
+
+
+def test_ai_recommendations_apply_after_bar_close():
+    """추천은 생성 시각 이후 처음 마감되는 봉부터 반영되고 hold는 직전 비중 유지"""
+    candles = make_candles(count=10)
+
+    def at(index: int, action: str, confidence: float = 0.9) -> dict:
+        # index번 봉이 진행 중일 때 생성된 추천 (로컬 시각 ISO 문자열)
+        seconds = (candles["timestamp"][index] + 1_800_000) / 1000
+        return {"timestamp": datetime.fromtimestamp(seconds).isoformat(), "action": action, "confidence": confidence}
+
+    data = attach_recommendations(candles, [at(2, "buy"), at(4, "hold"), at(6, "sell"), at(7, "buy", 0.3)],
+                                  interval="1h")
+    assert list(data["rec_index"]) == [2, 4, 6, 7]
+
+    assert list(ai_recommendations(data)) == [0, 0, 1, 1, 1, 1, 0, 1, 1, 1]
+    assert list(ai_recommendations(data, min_confidence=0.5)) == [0, 0, 1, 1, 1, 1, 0, 0, 0, 0]
+
+
+def test_depth_slippage():
+    """호가 잔량을 넘는 주문일수록 슬리피지가 커짐"""
+    orderbook = {
+        "asks": [{"price": "101", "qty": "1"}, {"price": "102", "qty": "10"}],
+        "bids": [{"price": "99", "qty": "1"}, {"price": "98", "qty": "10"}],
+    }
+    small, large = depth_slippage(orderbook, 50), depth_slippage(orderbook, 1000)
+    assert np.isclose(small, 0.01)
+    assert large > small
+    assert depth_slippage({"asks": [], "bids": []}, 1000) == 0.0
+
+
+def test_sweep_workers_give_same_result():
+    """한 프로세스와 여러 프로세스의 탐색 결과가 같고, 의미 없는 조합은 제외"""
+    data = make_candles()
+    grid = {"fast": [5, 10, 20], "slow": [10, 30]}
+    single = sweep(data, "sma_cross", grid, fee_rate=0.001, interval="1h", workers=1)
+    multi = sweep(data, "sma_cross", grid, fee_rate=0.001, interval="1h", workers=2)
+
+    assert len(single) == 4  # (10, 10), (20, 10) 제외
+    assert single.equals(multi)
+    assert list(single["sharpe"]) == sorted(single["sharpe"], reverse=True)
+
+    metrics, _ = run_backtest(data, "sma_cross", {"fast": 5, "slow": 30}, fee_rate=0.001, interval="1h")
+    row = single[(single["fast"] == 5) & (single["slow"] == 30)].iloc[0]
+    assert np.isclose(row["total_return"], metrics["total_return"])
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
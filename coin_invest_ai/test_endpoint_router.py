@@ -0,0 +1,227 @@
+"""
+LLM 엔드포인트 라우터(EndpointRouter) 테스트: http.server로 띄운 가짜 OpenAI 호환 서버 사용
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from models.endpoint_router import EndpointRouter, EndpointUnavailable
+from models.qwen_local import QwenModel
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+class FakeServer:
+    """
+    /v1/chat/completions에 응답하는 가짜 서버
+
+    status가 200이 아니면 그 상태 코드로 응답하고, gate가 있으면 gate.set()까지 응답을 미룬다.
+    """
+
+    def __init__(self, status: int = 200, content: str = "ok", gate: threading.Event = None):
+        self.status = status
+        self.content = content
+        self.gate = gate
+        self.hits = 0
+        self.received = threading.Event()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.hits += 1
+                server.received.set()
+                if server.gate is not None:
+                    server.gate.wait(5)
+                if server.status != 200:
+                    self.send_response(server.status)
+                    self.end_headers()
+                    self.wfile.write(b"error")
+                    return
+
+                self.send_response(200)
+                if body.get("stream"):
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for piece in server.content:
+                        chunk = {"choices": [{"delta": {"content": piece}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                else:
+                    payload = json.dumps({"choices": [{"message": {"content": server.content}}]}).encode("utf-8")
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def refused_url() -> str:
+    """연결이 거부되는 (아무도 듣지 않는) 포트의 URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def api_model(urls, cooldown_seconds: int = 15) -> QwenModel:
+    """가짜 서버로 요청하는 LM Studio 모드 모델 (응답 캐시, 헬스 체크 없음)"""
+    model = QwenModel(use_lmstudio=True, api_urls=urls, cache=None)
+    model.router.health_check_interval = 0
+    model.router.cooldown_seconds = cooldown_seconds
+    return model
+
+
+def by_url(router: EndpointRouter) -> dict:
+    return {stats["url"]: stats for stats in router.stats()}
+
+
+def test_least_outstanding_selection():
+    """응답 대기 중인 엔드포인트가 있으면 다음 요청은 다른 엔드포인트로"""
+    gate = threading.Event()
+    first, second = FakeServer(gate=gate), FakeServer(gate=gate)
+    model = api_model([first.url, second.url])
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(model.generate("hi"))) for _ in range(2)]
+        threads[0].start()
+        assert first.received.wait(5)
+        assert by_url(model.router)[first.url]["outstanding"] == 1
+        threads[1].start()
+        assert second.received.wait(5)
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["ok", "ok"]
+        assert (first.hits, second.hits) == (1, 1)
+        assert all(stats["outstanding"] == 0 for stats in model.router.stats())
+    finally:
+        gate.set()
+        first.close()
+        second.close()
+
+
+def test_failover_and_cooldown():
+    """연결 거부/5xx 엔드포인트는 건너뛰고, 대기 시간이 지나기 전에는 다시 시도하지 않음"""
+    refused, broken, live = refused_url(), FakeServer(status=503), FakeServer()
+    model = api_model([refused, broken.url, live.url], cooldown_seconds=1)
+    try:
+        assert model.generate("hi") == "ok"
+        stats = by_url(model.router)
+        assert stats[refused]["failures"] == 1 and not stats[refused]["healthy"]
+        assert stats[broken.url]["failures"] == 1 and broken.hits == 1
+        assert stats[live.url]["requests"] == 1
+
+        # 대기 시간 중에는 정상 엔드포인트만 사용
+        assert model.generate("hi") == "ok"
+        stats = by_url(model.router)
+        assert stats[refused]["failures"] == 1 and broken.hits == 1
+        assert stats[live.url]["requests"] == 2
+
+        # 대기 시간이 지나면 실패했던 엔드포인트도 다시 시도
+        time.sleep(1.1)
+        broken.status = 200
+        assert model.generate("hi") == "ok"
+        stats = by_url(model.router)
+        assert broken.hits == 2 and stats[broken.url]["healthy"]
+    finally:
+        broken.close()
+        live.close()
+
+
+def test_client_error_is_not_retried():
+    """4xx 응답은 요청 자체의 문제이므로 다른 엔드포인트로 넘어가지 않음"""
+    bad_request, live = FakeServer(status=400), FakeServer()
+    model = api_model([bad_request.url, live.url])
+    try:
+        try:
+            model.generate("hi")
+            assert False, "4xx 응답은 호출 측에 전달되어야 합니다"
+        except Exception as e:
+            assert "400" in str(e)
+        assert live.hits == 0
+        assert by_url(model.router)[bad_request.url]["failures"] == 0
+    finally:
+        bad_request.close()
+        live.close()
+
+
+def test_stream_retries_only_before_first_chunk():
+    """첫 조각 전 실패는 다른 엔드포인트로 재시도, 첫 조각 이후 실패는 그대로 전달"""
+    broken, live = FakeServer(status=500), FakeServer(content="abc")
+    model = api_model([broken.url, live.url])
+    try:
+        assert "".join(model.generate_stream("hi")) == "abc"
+        assert broken.hits == 1 and live.hits == 1
+    finally:
+        broken.close()
+        live.close()
+
+    router = EndpointRouter(["http://a/v1", "http://b/v1"], health_check_interval=0)
+    opened = []
+
+    def open_stream(url: str):
+        opened.append(url)
+        yield "first"
+        raise EndpointUnavailable("connection reset")
+
+    received = []
+    try:
+        for chunk in router.stream(open_stream):
+            received.append(chunk)
+        assert False, "첫 조각 이후 실패는 호출 측에 전달되어야 합니다"
+    except EndpointUnavailable:
+        pass
+    assert received == ["first"]
+    assert opened == ["http://a/v1"]
+    assert by_url(router)["http://a/v1"]["failures"] == 1
+
+
+def test_stats_counters_and_percentiles():
+    """요청/실패 수와 지연 시간 백분위 집계"""
+    router = EndpointRouter(["http://a/v1"], health_check_interval=0)
+    [endpoint] = router.endpoints
+    for seconds in range(1, 101):
+        endpoint.record_success(float(seconds))
+    endpoint.record_failure(RuntimeError("boom"), cooldown=0)
+
+    [stats] = router.stats()
+    assert stats["requests"] == 101
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "boom"
+    assert stats["mean_latency"] == 50.5
+    assert stats["p50_latency"] == 50.0
+    assert stats["p95_latency"] == 95.0
+
+    live = FakeServer()
+    try:
+        model = api_model([live.url])
+        for _ in range(3):
+            model.generate("hi")
+        [stats] = model.router.stats()
+        assert (stats["requests"], stats["failures"], stats["outstanding"]) == (3, 0, 0)
+        assert 0 < stats["p50_latency"] <= stats["p95_latency"]
+    finally:
+        live.close()
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
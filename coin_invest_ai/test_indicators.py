@@ -0,0 +1,100 @@
+"""
+기술 지표(utils.indicators) 테스트: 증분 계산(IndicatorEngine)과 배열 계산(compute_indicators) 비교
+"""
+
+import math
+import numpy as np
+from utils.indicators import MACD_SIGNAL, MACD_SLOW, IndicatorEngine, compute_indicators, macd, rsi, sma
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+KEYS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def make_candles(count: int = 120, seed: int = 7) -> dict:
+    """무작위 보행 가격의 1분봉 캔들 배열"""
+    rng = np.random.default_rng(seed)
+    close = 50_000_000 + np.cumsum(rng.normal(0, 100_000, count))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = rng.uniform(10_000, 200_000, count)
+    return {
+        "timestamp": 1_700_000_000_000 + np.arange(count) * 60_000,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(0.1, 5.0, count),
+    }
+
+
+def head(candles: dict, count: int) -> dict:
+    return {key: values[:count] for key, values in candles.items()}
+
+
+def bar(candles: dict, index: int) -> dict:
+    return {key: candles[key][index] for key in KEYS}
+
+
+def assert_matches(engine: IndicatorEngine, expected: dict, index: int):
+    """엔진의 최신 값이 배열 계산의 index번째 값과 같은지 확인 (둘 다 NaN인 경우 포함)"""
+    for name, values in expected.items():
+        actual, want = engine.values[name], float(values[index])
+        if math.isnan(want):
+            assert math.isnan(actual), f"{name}[{index}]: {actual} != NaN"
+        else:
+            assert math.isclose(actual, want, rel_tol=1e-9, abs_tol=1e-6), f"{name}[{index}]: {actual} != {want}"
+
+
+def test_engine_matches_vectorized():
+    """앞부분으로 만든 엔진을 봉 하나씩 갱신해도 매 봉 전체 배열 계산과 같은 값"""
+    candles = make_candles()
+    expected = compute_indicators(candles)
+    # 0: 빈 엔진, 5: 모든 지표가 시작값 이전, 40: MACD 시그널만 시작값 이전, 80: 모든 지표 계산 가능
+    for prefix in (0, 5, 40, 80):
+        engine = IndicatorEngine(head(candles, prefix))
+        if prefix:
+            assert_matches(engine, expected, prefix - 1)
+        for index in range(prefix, len(candles["close"])):
+            assert engine.update(bar(candles, index))
+            assert_matches(engine, expected, index)
+        assert engine.bars == len(candles["close"])
+
+
+def test_engine_ignores_old_bars():
+    """이미 반영한 시각 이하의 봉은 무시"""
+    candles = make_candles(count=30)
+    engine = IndicatorEngine(candles)
+    before = dict(engine.values)
+    assert not engine.update(bar(candles, 29))
+    assert not engine.update(bar(candles, 10))
+    assert engine.values == before
+    assert engine.bars == 30
+
+
+def test_basic_indicators():
+    """SMA, RSI, MACD의 기본 성질"""
+    values = np.arange(1.0, 31.0)
+    result = sma(values, 5)
+    assert np.isnan(result[:4]).all()
+    assert result[4] == 3.0 and result[-1] == 28.0
+
+    assert rsi(values)[-1] == 100.0
+    assert rsi(values[::-1])[-1] == 0.0
+    assert rsi(np.full(30, 5.0))[-1] == 50.0
+    assert np.isnan(rsi(values)[:14]).all()
+
+    # 상승 추세에서는 MACD 선이 양수, 히스토그램 = 선 - 시그널
+    line, signal, hist = macd(np.exp(np.linspace(0, 1, 60)))
+    assert line[-1] > 0
+    assert math.isclose(hist[-1], line[-1] - signal[-1])
+    first_signal = MACD_SLOW + MACD_SIGNAL - 2
+    assert np.isnan(signal[:first_signal]).all() and not np.isnan(signal[first_signal])
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
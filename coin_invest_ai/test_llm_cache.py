@@ -0,0 +1,109 @@
+"""
+LLM 응답 캐시(LLMCache) 테스트
+"""
+
+import os
+import tempfile
+import types
+from models import llm_cache
+from models.llm_cache import LLMCache
+from models.qwen_local import QwenModel
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+class FakeClock:
+    """llm_cache 모듈의 time.time()을 대신하는 시계"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.original = llm_cache.time
+
+    def __enter__(self):
+        llm_cache.time = types.SimpleNamespace(time=lambda: self.now)
+        return self
+
+    def __exit__(self, *exc):
+        llm_cache.time = self.original
+
+
+def new_cache(**kwargs) -> LLMCache:
+    """테스트용 임시 캐시"""
+    return LLMCache(os.path.join(tempfile.mkdtemp(), "llm_cache.db"), **kwargs)
+
+
+class CountingModel(QwenModel):
+    """실제 생성 대신 호출 횟수만 세는 LM Studio 모드 모델"""
+
+    def __init__(self, **kwargs):
+        super().__init__(use_lmstudio=True, api_url="http://127.0.0.1:1/v1", **kwargs)
+        self.calls = 0
+
+    def _generate(self, prompt, max_length, temperature, model_name, stop=None, metrics=None):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+def test_make_key():
+    """공백 차이는 같은 키, 모델/온도/길이가 다르면 다른 키"""
+    key = LLMCache.make_key("m", "hello  world\n", 0.7, 100)
+    assert key == LLMCache.make_key("m", " hello world", 0.7, 100)
+    assert key != LLMCache.make_key("other", "hello world", 0.7, 100)
+    assert key != LLMCache.make_key("m", "hello world", 0.2, 100)
+    assert key != LLMCache.make_key("m", "hello world", 0.7, 200)
+
+
+def test_ttl_expiry():
+    """유효 시간이 지난 항목은 조회되지 않고 다음 저장 때 삭제"""
+    cache = new_cache(ttl_seconds=60)
+    with FakeClock() as clock:
+        cache.set("a", "first")
+        clock.now += 59
+        assert cache.get("a") == "first"
+        clock.now += 2
+        assert cache.get("a") is None
+        cache.set("b", "second")
+        assert cache.stats()["entries"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    """최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제"""
+    cache = new_cache(max_entries=2)
+    with FakeClock() as clock:
+        cache.set("a", "A")
+        clock.now += 1
+        cache.set("b", "B")
+        clock.now += 1
+        assert cache.get("a") == "A"
+        clock.now += 1
+        cache.set("c", "C")
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.get("c") == "C"
+
+
+def test_model_uses_cache():
+    """같은 요청은 캐시에서 응답하고, use_cache=False나 cache=None이면 매번 생성"""
+    model = CountingModel(cache=new_cache())
+    metrics = {}
+    assert model.generate("prompt", max_length=10) == "answer 1"
+    assert model.generate("prompt", max_length=10, metrics=metrics) == "answer 1"
+    assert metrics == {"cached": True}
+    assert model.generate("prompt", max_length=10, use_cache=False) == "answer 2"
+    assert model.generate("prompt", max_length=20) == "answer 3"
+
+    uncached = CountingModel(cache=None)
+    assert uncached.cache is None
+    uncached.generate("prompt", max_length=10)
+    uncached.generate("prompt", max_length=10)
+    assert uncached.calls == 2
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
@@ -0,0 +1,59 @@
+"""
+뉴스 색인(NewsIndex, NewsVectorIndex) 테스트
+"""
+
+from utils.news_scraper import NewsScraper
+from utils.news_vectors import NewsVectorIndex
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+def article(i: int, topic: str = "bitcoin") -> dict:
+    """서로 겹치지 않는 단어로 만든 기사 (유사 기사로 걸러지지 않음)"""
+    return {
+        "title": f"{topic} story{i} alpha{i} beta{i}",
+        "description": f"gamma{i} delta{i} epsilon{i}",
+        "url": f"https://example.com/{topic}/{i}",
+    }
+
+
+def test_vector_index_evicts_oldest():
+    """최대 기사 수를 넘으면 오래 색인된 기사부터 제거하고 행렬/문서 빈도도 함께 줄임"""
+    index = NewsVectorIndex(max_articles=3, initial_capacity=2)
+    for i in range(5):
+        index.add_many([article(i)])
+
+    assert [news["url"] for news in index.documents] == [article(i)["url"] for i in (2, 3, 4)]
+    assert len(index._matrix) <= 4
+    assert index._keys == {article(i)["url"]: row for row, i in enumerate((2, 3, 4))}
+
+    [(news, _)] = index.search("story4 alpha4", top_k=1)
+    assert news["url"] == article(4)["url"]
+    assert not [n for n, _ in index.search("story0 alpha0", top_k=3) if n["url"] == article(0)["url"]]
+
+    fresh = NewsVectorIndex(max_articles=3)
+    fresh.add_many([article(i) for i in (2, 3, 4)])
+    assert (index._doc_freq == fresh._doc_freq).all()
+
+
+def test_indexes_keep_the_same_articles():
+    """관련도 색인과 벡터 색인이 같은 기사만 유지 (유사 검색이 빠진 기사를 돌려주지 않음)"""
+    scraper = NewsScraper(rss_urls=["http://localhost/unused"])
+    scraper.index.max_articles = scraper.vectors.max_articles = 4
+    for i in range(10):
+        news_list = scraper.vectors.add_many([article(i)])
+        scraper.index.add_many(news_list)
+
+    relevant = {news["url"] for news in scraper.get_relevant_news("BTC", top_k=10)}
+    vectors = {news["url"] for news in scraper.vectors.documents}
+    assert relevant == vectors == {article(i)["url"] for i in range(6, 10)}
+    assert all(news["url"] in relevant for news in scraper.search_similar_news("bitcoin story", top_k=10))
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
@@ -0,0 +1,177 @@
+"""
+주문 동기화(OrderReconciler) 테스트: 거래소 API는 체결 내역 페이지 조회를 흉내 내는 스텁으로 대체
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+from data.coinone_api import CoinoneAPI
+from data.order_reconciler import OrderReconciler, sync_key
+from db.database import TradingDatabase
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+class StubResponse:
+    def __init__(self, data: dict):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> dict:
+        return self.data
+
+
+class StubExchange(CoinoneAPI):
+    """미체결 목록과 체결 내역을 메모리에 두고 completed_orders 페이지 응답을 만드는 스텁"""
+
+    def __init__(self):
+        super().__init__(access_token="test", secret_key="test")
+        self.session = self
+        self.open_ids = set()
+        self.fills = []
+        self.requests = []
+        # 미체결 목록 응답 직후 실행할 콜백 (조회 이후 접수된 주문 재현용)
+        self.after_get_orders = None
+
+    def add_fill(self, trade_id: int, order_id: str, price: float, qty: float, timestamp: int):
+        self.fills.append({
+            "trade_id": f"{trade_id:06d}", "order_id": order_id, "price": str(price),
+            "qty": str(qty), "is_ask": False, "timestamp": str(timestamp)
+        })
+
+    def get_orders(self, currency: str = "BTC") -> dict:
+        response = {"result": "success", "limitOrders": [{"orderId": i} for i in sorted(self.open_ids)]}
+        if self.after_get_orders:
+            self.after_get_orders()
+        return response
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        payload = json.loads(base64.b64decode(data))
+        self.requests.append(payload)
+        # 최신순, to_trade_id가 있으면 그 체결보다 오래된 체결만
+        cursor = (payload["to_ts"], payload.get("to_trade_id", "~"))
+        items = sorted(
+            (f for f in self.fills
+             if payload["from_ts"] <= int(f["timestamp"])
+             and (int(f["timestamp"]), f["trade_id"]) < cursor),
+            key=lambda f: (int(f["timestamp"]), f["trade_id"]),
+            reverse=True
+        )
+        return StubResponse({"result": "success", "completed_orders": items[:payload["size"]]})
+
+
+def new_database() -> TradingDatabase:
+    """테스트용 임시 DB"""
+    return TradingDatabase(os.path.join(tempfile.mkdtemp(), "trading.db"))
+
+
+def recent_ms() -> int:
+    """조회 시점(to_ts)보다 앞선 체결 시각 (ms)"""
+    return int(time.time() * 1000) - 5000
+
+
+def trade_by_order(db: TradingDatabase, order_id: str) -> dict:
+    [trade] = [t for t in db.get_trades() if t["order_id"] == order_id]
+    return trade
+
+
+def test_incremental_sync():
+    """두 번째 동기화는 기준점 이후만 조회하고, 이미 받은 체결은 다시 반영하지 않음"""
+    db, api = new_database(), StubExchange()
+    db.add_trade("BTC", "buy", 100, 2.0, order_id="A", status="pending")
+    api.open_ids.add("A")
+    first = recent_ms()
+    api.add_fill(1, "A", 100, 1.0, first)
+
+    reconciler = OrderReconciler(db, api)
+    assert reconciler.reconcile() == {"fills": 1, "filled": 1, "cancelled": 0}
+    assert trade_by_order(db, "A")["filled_quantity"] == 1.0
+    assert db.get_sync_state(sync_key("BTC"))["last_timestamp"] == first
+
+    api.add_fill(2, "A", 110, 1.0, first + 1000)
+    api.open_ids.clear()
+    assert reconciler.reconcile() == {"fills": 1, "filled": 1, "cancelled": 0}
+    assert api.requests[-1]["from_ts"] == first
+
+    trade = trade_by_order(db, "A")
+    assert trade["status"] == "completed"
+    assert trade["price"] == 105
+    assert db.get_portfolio()[0]["quantity"] == 2.0
+    assert db.get_sync_state(sync_key("BTC"))["last_timestamp"] == first + 1000
+
+
+def test_paging_across_same_timestamp():
+    """같은 시각의 체결이 페이지 경계에 걸쳐도 빠짐없이 한 번씩만 받음"""
+    api = StubExchange()
+    ts = recent_ms()
+    for i in range(250):
+        api.add_fill(i, "A", 100, 0.01, ts + i // 100)
+
+    fills, complete = api.get_completed_orders("BTC", from_ts=ts)
+    assert complete
+    assert len(api.requests) == 3
+    assert sorted(f["trade_id"] for f in fills) == [f"{i:06d}" for i in range(250)]
+
+
+def test_truncated_fetch_defers_cancel_and_high_water():
+    """페이지 한도로 체결 내역을 일부만 받으면 취소 판단과 기준점 갱신을 미룸"""
+    db, api = new_database(), StubExchange()
+    db.add_trade("BTC", "buy", 100, 2.0, order_id="D", status="pending")
+    ts = recent_ms()
+    for i in range(150):
+        api.add_fill(i, "D", 100, 0.01, ts + i)
+
+    result = OrderReconciler(db, api, max_pages=1).reconcile()
+    assert result == {"fills": 100, "filled": 1, "cancelled": 0}
+    assert trade_by_order(db, "D")["status"] == "pending"
+    assert db.get_sync_state(sync_key("BTC")) == {}
+
+    result = OrderReconciler(db, api).reconcile()
+    assert result == {"fills": 50, "filled": 1, "cancelled": 1}
+    trade = trade_by_order(db, "D")
+    assert trade["status"] == "cancelled"
+    assert abs(trade["filled_quantity"] - 1.5) < 1e-9
+    assert abs(db.get_portfolio()[0]["quantity"] - 1.5) < 1e-9
+    assert db.get_sync_state(sync_key("BTC"))["last_timestamp"] == ts + 149
+
+
+def test_cancel_decision():
+    """미체결 목록에 없고 전량 체결되지 않은 주문만 취소, 목록 조회 이후 접수된 주문은 유지"""
+    db, api = new_database(), StubExchange()
+    db.add_trade("BTC", "buy", 100, 1.0, order_id="B", status="pending")
+    db.add_trade("BTC", "buy", 100, 1.0, order_id="F", status="pending")
+    db.add_trade("BTC", "buy", 100, 1.0, order_id="O", status="pending")
+    api.open_ids.add("O")
+    ts = recent_ms()
+    api.add_fill(1, "B", 100, 0.5, ts)
+    api.add_fill(2, "F", 100, 1.0, ts)
+    api.after_get_orders = lambda: db.add_trade("BTC", "sell", 120, 1.0, order_id="C", status="pending")
+
+    result = OrderReconciler(db, api).reconcile()
+    assert result == {"fills": 2, "filled": 2, "cancelled": 1}
+    assert trade_by_order(db, "B")["status"] == "cancelled"
+    assert trade_by_order(db, "B")["filled_quantity"] == 0.5
+    assert trade_by_order(db, "F")["status"] == "completed"
+    assert trade_by_order(db, "O")["status"] == "pending"
+    assert trade_by_order(db, "C")["status"] == "pending"
+
+
+def test_no_pending_orders_skips_api():
+    """로컬 미체결 거래소 주문이 없으면 API를 호출하지 않음"""
+    db, api = new_database(), StubExchange()
+    db.add_trade("BTC", "buy", 100, 1.0, order_id="paper-1", status="pending")
+    assert OrderReconciler(db, api).reconcile() == {"fills": 0, "filled": 0, "cancelled": 0}
+    assert api.requests == []
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
\ No newline at end of file
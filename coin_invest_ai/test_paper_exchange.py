@@ -0,0 +1,148 @@
+"""
+모의 체결 엔진(PaperExchange) 테스트
+"""
+
+import os
+import tempfile
+from data.paper_exchange import PaperExchange
+from db.database import TradingDatabase
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+def new_database() -> TradingDatabase:
+    """테스트용 임시 DB"""
+    return TradingDatabase(os.path.join(tempfile.mkdtemp(), "trading.db"))
+
+
+def orderbook(bids=(), asks=()) -> dict:
+    """CoinoneAPI.get_orderbook() 형식의 호가 스냅샷"""
+    return {
+        "bids": [{"price": price, "qty": qty} for price, qty in bids],
+        "asks": [{"price": price, "qty": qty} for price, qty in asks],
+    }
+
+
+def test_price_time_priority():
+    """더 좋은 가격이 먼저, 같은 가격은 먼저 들어온 주문이 먼저 체결"""
+    exchange = PaperExchange(new_database(), restore=False)
+    worse = exchange.submit("BTC", "sell", 1.0, price=101)
+    first = exchange.submit("BTC", "sell", 1.0, price=100)
+    second = exchange.submit("BTC", "sell", 1.0, price=100)
+
+    buy = exchange.submit("BTC", "buy", 1.5, price=101)
+    assert buy["status"] == "completed"
+    assert buy["price"] == 100
+
+    open_orders = {order["order_id"]: order for order in exchange.open_orders("BTC")}
+    assert first["order_id"] not in open_orders
+    assert open_orders[second["order_id"]]["filled_quantity"] == 0.5
+    assert open_orders[worse["order_id"]]["filled_quantity"] == 0.0
+
+
+def test_partial_fill_rests_on_book():
+    """지정가 주문은 체결되지 않은 잔량이 호가창에 남음"""
+    exchange = PaperExchange(new_database(), restore=False)
+    exchange.seed_orderbook("BTC", orderbook(asks=[(100, 0.5), (101, 1.0)]))
+
+    order = exchange.submit("BTC", "buy", 2.0, price=100)
+    assert order["status"] == "pending"
+    assert order["filled_quantity"] == 0.5
+    assert exchange.depth("BTC")["bids"] == [(100, 1.5)]
+    assert exchange.depth("BTC")["asks"] == [(101, 1.0)]
+
+
+def test_market_order_against_seeded_book():
+    """시장가 주문은 호가를 차례로 소진하고, 남은 수량은 취소"""
+    exchange = PaperExchange(new_database(), restore=False)
+    exchange.seed_orderbook("BTC", orderbook(bids=[(99, 1.0)], asks=[(100, 1.0), (102, 1.0)]))
+
+    order = exchange.submit("BTC", "buy", 1.5)
+    assert order["status"] == "completed"
+    assert abs(order["price"] - (100 * 1.0 + 102 * 0.5) / 1.5) < 1e-9
+
+    order = exchange.submit("BTC", "buy", 1.0)
+    assert order["status"] == "cancelled"
+    assert order["filled_quantity"] == 0.5
+    assert order["price"] == 102
+    assert exchange.open_orders() == []
+
+
+def test_on_tick_crossing():
+    """현재가가 지정가를 넘으면 먼저 들어온 내 주문의 지정가로 체결"""
+    exchange = PaperExchange(new_database(), restore=False)
+    buy = exchange.submit("BTC", "buy", 1.0, price=100)
+    sell = exchange.submit("BTC", "sell", 1.0, price=110)
+
+    assert exchange.on_tick("BTC", 105) == 0
+    assert exchange.on_tick("BTC", 99) == 1
+    assert exchange.on_tick("BTC", 111) == 1
+
+    assert exchange.open_orders() == []
+    exchange.flush()
+    trades = {trade["order_id"]: trade for trade in exchange.db.get_trades()}
+    assert trades[buy["order_id"]]["price"] == 100
+    assert trades[sell["order_id"]]["price"] == 110
+
+
+def test_restore_keeps_average_fill_price():
+    """재시작 후 복원한 부분 체결 주문의 평균 체결가가 실제 체결가와 일치"""
+    db = new_database()
+    exchange = PaperExchange(db, restore=False)
+    exchange.seed_orderbook("BTC", orderbook(asks=[(99, 0.5)]))
+    order = exchange.submit("BTC", "buy", 2.0, price=100)
+    exchange.flush()
+
+    restored = PaperExchange(db)
+    [pending] = restored.open_orders("BTC")
+    assert pending["order_id"] == order["order_id"]
+    assert pending["filled_quantity"] == 0.5
+    assert restored._orders[order["order_id"]].average_price == 99
+
+    restored.on_tick("BTC", 98)
+    restored.flush()
+    [trade] = [t for t in db.get_trades() if t["order_id"] == order["order_id"]]
+    assert trade["status"] == "completed"
+    assert abs(trade["price"] - (0.5 * 99 + 1.5 * 100) / 2) < 1e-9
+    [position] = db.get_portfolio()
+    assert position["quantity"] == 2.0
+
+
+def test_flush_failure_keeps_pending_changes():
+    """저장이 실패하면 변경 사항을 버리지 않고 다음 flush()에서 다시 저장"""
+
+    class FlakyDatabase(TradingDatabase):
+        fail = True
+
+        def save_order_batch(self, new_orders, updates, fills):
+            if self.fail:
+                self.fail = False
+                raise RuntimeError("disk full")
+            return super().save_order_batch(new_orders, updates, fills)
+
+    db = FlakyDatabase(os.path.join(tempfile.mkdtemp(), "trading.db"))
+    exchange = PaperExchange(db, restore=False)
+    exchange.seed_orderbook("BTC", orderbook(asks=[(100, 1.0)]))
+    order = exchange.submit("BTC", "buy", 1.0)
+
+    try:
+        exchange.flush()
+        assert False, "flush()가 저장 실패를 전달해야 합니다"
+    except RuntimeError:
+        pass
+    assert db.get_trades() == []
+
+    assert exchange.flush() == 1
+    [trade] = db.get_trades()
+    assert trade["order_id"] == order["order_id"]
+    assert trade["status"] == "completed"
+    assert db.get_portfolio()[0]["quantity"] == 1.0
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
@@ -0,0 +1,85 @@
+"""
+프롬프트 빌더(PromptBuilder)와 뉴스 감성 요약(SentimentScorer) 테스트
+"""
+
+import os
+import tempfile
+from db.database import TradingDatabase
+from utils.prompt_builder import PromptBuilder
+from utils.sentiment import SentimentScorer
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+def new_database() -> TradingDatabase:
+    """테스트용 임시 DB"""
+    return TradingDatabase(os.path.join(tempfile.mkdtemp(), "trading.db"))
+
+
+def sample_news(count: int = 10) -> list:
+    """설명이 긴 BTC 관련 뉴스 목록"""
+    return [
+        {
+            "title": f"Bitcoin price rallies as ETF inflows hit record {i}",
+            "description": "Bitcoin traders watched spot ETF flows and macro data closely. " * 8,
+            "url": f"https://example.com/btc-{i}",
+            "source": "Example",
+            "published_at": "2026-01-01T00:00:00Z",
+        }
+        for i in range(count)
+    ]
+
+
+def test_summary_replaces_raw_news():
+    """감성 요약이 있으면 원문 뉴스를 작은 예산만큼만 넣어 프롬프트가 크게 줄어듦"""
+    news_list = sample_news()
+    summary = SentimentScorer(new_database()).summarize("BTC", news_list)
+    builder = PromptBuilder(token_budget=2048)
+
+    _, without_summary = builder.build_analysis_prompt("BTC", 100_000_000, news_list)
+    prompt, with_summary = builder.build_analysis_prompt(
+        "BTC", 100_000_000, news_list, sentiment_summary=summary
+    )
+    assert without_summary > 1000
+    assert with_summary * 3 < without_summary
+    assert summary in prompt
+
+
+def test_fixed_sections_over_budget():
+    """고정 섹션만으로 예산을 넘으면 뉴스 없이 구성 (예산이 음수가 되지 않음)"""
+    builder = PromptBuilder(token_budget=50)
+    prompt, _ = builder.build_analysis_prompt(
+        "BTC", 100_000_000, sample_news(), sentiment_summary="뉴스 감성: 데이터 없음"
+    )
+    assert "최근 암호화폐 뉴스" not in prompt
+    assert "뉴스 감성: 데이터 없음" in prompt
+
+
+def test_unknown_currency_uses_code():
+    """별칭 사전에 없는 통화도 통화 코드가 나온 기사를 관련 기사로 집계"""
+    news_list = [
+        {"title": "SOL surges after network upgrade", "description": "", "url": "https://example.com/sol"},
+        {"title": "Markets drift sideways", "description": "", "url": "https://example.com/market"},
+    ]
+    summary = SentimentScorer(new_database()).summarize("SOL", news_list)
+    assert summary.startswith("뉴스 감성 (SOL 관련 1건)")
+
+
+def test_relevance_follows_current_aliases():
+    """감성 점수가 캐시된 기사도 관련도는 현재 별칭 사전으로 다시 계산"""
+    db = new_database()
+    news_list = [{"title": "비트코인 급등", "description": "", "url": "https://example.com/kr"}]
+
+    summary = SentimentScorer(db, aliases={"ETH": ["ethereum"]}).summarize("BTC", news_list)
+    assert "시장 전체" in summary
+    summary = SentimentScorer(db, aliases={"BTC": ["비트코인"]}).summarize("BTC", news_list)
+    assert "BTC 관련 1건" in summary
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
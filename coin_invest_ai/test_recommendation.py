@@ -0,0 +1,76 @@
+"""
+구조화된 추천 파싱(parse_recommendation, generate_recommendation) 테스트
+"""
+
+from utils.recommendation import MAX_REASONS, RECOMMENDATION_STOP, generate_recommendation, parse_recommendation
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+def expect_error(text: str):
+    try:
+        parse_recommendation(text)
+    except ValueError:
+        return
+    assert False, f"ValueError가 발생해야 합니다: {text!r}"
+
+
+def test_parse_valid_json():
+    """앞뒤 설명이 붙은 응답에서도 첫 JSON 객체를 찾아 검증"""
+    result = parse_recommendation(
+        '추천: {"action": "BUY", "confidence": 0.8, "reasons": ["ETF 유입", " ", "거래량 증가"]} 끝'
+    )
+    assert result == {"action": "buy", "confidence": 0.8, "reasons": ["ETF 유입", "거래량 증가"]}
+
+
+def test_parse_truncated_at_stop():
+    """중단 문자열("}")에서 잘린 응답도 객체를 닫아 파싱"""
+    result = parse_recommendation('{"action": "hold", "confidence": 0.5, "reasons": ["횡보"]')
+    assert result["action"] == "hold"
+    assert result["reasons"] == ["횡보"]
+
+
+def test_parse_normalizes_fields():
+    """한국어 행동, 백분율 확신도, 문자열 근거, 근거 개수 제한"""
+    result = parse_recommendation('{"action": "매도", "confidence": 75, "reasons": "하락 추세"}')
+    assert result == {"action": "sell", "confidence": 0.75, "reasons": ["하락 추세"]}
+
+    many = ", ".join(f'"근거 {i}"' for i in range(MAX_REASONS + 2))
+    result = parse_recommendation(f'{{"action": "관망", "confidence": 0.1, "reasons": [{many}]}}')
+    assert result["action"] == "hold"
+    assert len(result["reasons"]) == MAX_REASONS
+
+
+def test_parse_rejects_invalid():
+    """JSON이 없거나 필드가 유효하지 않으면 ValueError"""
+    expect_error("매수를 추천합니다")
+    expect_error('{"action": "buy", "confidence": }')
+    expect_error('{"action": "short", "confidence": 0.5}')
+    expect_error('{"action": "buy", "confidence": "high"}')
+    expect_error('{"action": "buy", "confidence": -0.2}')
+    expect_error('{"action": "buy", "confidence": 0.5, "reasons": {"a": 1}}')
+
+
+def test_generate_recommendation_uses_stop():
+    """생성 요청에 중단 문자열을 넘기고 원문을 함께 반환"""
+
+    class FakeModel:
+        def generate(self, **kwargs):
+            self.kwargs = kwargs
+            return '{"action": "buy", "confidence": 0.9, "reasons": ["반등"]'
+
+    model = FakeModel()
+    result = generate_recommendation(model, "prompt", max_new_tokens=32)
+    assert model.kwargs["stop"] == RECOMMENDATION_STOP
+    assert model.kwargs["max_length"] == 32
+    assert result["action"] == "buy"
+    assert result["raw"].startswith('{"action"')
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n{len(tests)}개 테스트 통과")
@@ -0,0 +1,299 @@
+"""
+백테스트 모듈: 저장된 캔들 이력 위에서 전략의 포지션/손익을 배열 연산으로 재현
+
+- 전략은 봉마다 목표 보유 비중(0~1, 현물 롱 전용)을 배열로 돌려주는 함수
+  (규칙 기반: sma_cross, macd_cross, rsi_reversion / 저장된 AI 추천: ai)
+- 목표 비중은 해당 봉 종가에 체결되고 다음 봉부터 수익에 반영 (미래 정보 사용 없음)
+- 비중이 바뀔 때마다 (수수료율 + 호가 잔량 기반 슬리피지) x 변경 비중만큼 비용 차감
+- sweep()은 파라미터 조합을 여러 프로세스에 나눠 실행
+"""
+
+import itertools
+import math
+import multiprocessing as mp
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from config import BACKTEST_FEE_RATE, BACKTEST_WORKERS, INDICATOR_INTERVAL
+from utils.indicators import INTERVAL_SECONDS, macd, rsi, sma
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 수를 자동으로 정할 때 프로세스 하나에 맡길 최소 조합 수 (작은 탐색은 프로세스 시작 비용이 더 큼)
+MIN_COMBOS_PER_WORKER = 50
+
+# 추천 행동별 목표 비중 (hold는 직전 비중 유지)
+ACTION_POSITIONS = {"buy": 1.0, "sell": 0.0}
+
+
+def sma_cross(data: Dict[str, np.ndarray], fast: int = 10, slow: int = 30) -> np.ndarray:
+    """단기 SMA가 장기 SMA 위에 있으면 보유"""
+    if fast >= slow:
+        raise ValueError("fast는 slow보다 작아야 합니다")
+    fast_line, slow_line = sma(data["close"], fast), sma(data["close"], slow)
+    return (fast_line > slow_line).astype(float)
+
+
+def macd_cross(data: Dict[str, np.ndarray], fast: int = 12, slow: int = 26,
+               signal: int = 9) -> np.ndarray:
+    """MACD 선이 시그널 선 위에 있으면 보유"""
+    if fast >= slow:
+        raise ValueError("fast는 slow보다 작아야 합니다")
+    line, signal_line, _ = macd(data["close"], fast, slow, signal)
+    return (line > signal_line).astype(float)
+
+
+def rsi_reversion(data: Dict[str, np.ndarray], period: int = 14, lower: float = 30,
+                  upper: float = 70) -> np.ndarray:
+    """RSI가 lower 아래로 내려가면 매수, upper 위로 올라가면 매도 (그 사이는 유지)"""
+    if lower >= upper:
+        raise ValueError("lower는 upper보다 작아야 합니다")
+    value = rsi(data["close"], period)
+    targets = np.where(value < lower, 1.0, np.where(value > upper, 0.0, np.nan))
+    return _hold_between(targets)
+
+
+def ai_recommendations(data: Dict[str, np.ndarray], min_confidence: float = 0.0) -> np.ndarray:
+    """
+    저장된 AI 추천 재현: buy는 전량 보유, sell은 전량 매도, hold나 확신도 미달은 유지
+
+    추천은 생성 시각 이후 처음 마감되는 봉의 종가에 반영한다 (attach_recommendations() 필요).
+    """
+    targets = np.full(len(data["close"]), np.nan)
+    index = data["rec_index"]
+    mask = (index < len(targets)) & ~np.isnan(data["rec_position"]) & (data["rec_confidence"] >= min_confidence)
+    # 같은 봉에 추천이 여러 개면 마지막(최신) 추천이 남음
+    targets[index[mask]] = data["rec_position"][mask]
+    return _hold_between(targets)
+
+
+STRATEGIES: Dict[str, Callable[..., np.ndarray]] = {
+    "sma_cross": sma_cross,
+    "macd_cross": macd_cross,
+    "rsi_reversion": rsi_reversion,
+    "ai": ai_recommendations,
+}
+
+# 기본 파라미터 탐색 범위
+DEFAULT_GRIDS: Dict[str, Dict[str, list]] = {
+    "sma_cross": {"fast": list(range(3, 31)), "slow": list(range(20, 121, 5))},
+    "macd_cross": {"fast": list(range(6, 19, 2)), "slow": list(range(20, 41, 2)), "signal": [5, 7, 9, 12]},
+    "rsi_reversion": {"period": [7, 10, 14, 21], "lower": list(range(15, 41, 5)), "upper": list(range(60, 86, 5))},
+    "ai": {"min_confidence": [0.0, 0.5, 0.6, 0.7, 0.8, 0.9]},
+}
+
+
+def _hold_between(targets: np.ndarray) -> np.ndarray:
+    """NaN(신호 없음)은 직전 목표 비중 유지, 첫 신호 전에는 미보유"""
+    return pd.Series(targets).ffill().fillna(0.0).to_numpy()
+
+
+def attach_recommendations(candles: Dict[str, np.ndarray], recommendations: List[Dict],
+                           interval: str = None) -> Dict[str, np.ndarray]:
+    """
+    캔들 배열에 AI 추천을 봉 위치로 매핑하여 추가 (ai 전략 입력)
+
+    Args:
+        candles: TradingDatabase.get_candles() 결과
+        recommendations: TradingDatabase.get_recommendations() 결과
+        interval: 봉 간격 (기본값: INDICATOR_INTERVAL)
+
+    Returns:
+        "rec_index", "rec_position", "rec_confidence" 배열이 추가된 딕셔너리
+    """
+    interval = interval or INDICATOR_INTERVAL
+    close_times = np.asarray(candles["timestamp"], dtype=np.int64) + INTERVAL_SECONDS[interval] * 1000
+    # analysis.timestamp는 로컬 시각 ISO 문자열
+    rec_times = np.array(
+        [int(datetime.fromisoformat(rec["timestamp"]).timestamp() * 1000) for rec in recommendations],
+        dtype=np.int64
+    )
+    data = dict(candles)
+    data["rec_index"] = np.searchsorted(close_times, rec_times, side="left")
+    data["rec_position"] = np.array(
+        [ACTION_POSITIONS.get(rec["action"], np.nan) for rec in recommendations], dtype=float
+    )
+    data["rec_confidence"] = np.array(
+        [rec["confidence"] if rec.get("confidence") is not None else 0.0 for rec in recommendations], dtype=float
+    )
+    return data
+
+
+def _book_levels(orderbook: Dict, side: str) -> List[Tuple[float, float]]:
+    """호가 응답에서 (가격, 수량) 목록 추출 (매도 호가는 낮은 순, 매수 호가는 높은 순)"""
+    levels = orderbook.get(side) or orderbook.get(f"{side}s") or []
+    parsed = [(float(level["price"]), float(level["qty"])) for level in levels]
+    return sorted(parsed, reverse=(side == "bid"))
+
+
+def depth_slippage(orderbook: Dict, notional: float) -> float:
+    """
+    호가 잔량을 따라 notional원어치를 시장가로 매수/매도할 때 중간가 대비 평균 체결가 차이
+
+    호가 잔량을 넘는 부분은 마지막 호가에 체결된다고 가정한다.
+
+    Args:
+        orderbook: CoinoneAPI.get_orderbook() 결과 ("ask"/"bid" 목록의 "price", "qty")
+        notional: 주문 금액 (원)
+
+    Returns:
+        매수/매도 평균 슬리피지 비율 (호가가 없으면 0.0)
+    """
+    asks, bids = _book_levels(orderbook, "ask"), _book_levels(orderbook, "bid")
+    if not asks or not bids or notional <= 0:
+        return 0.0
+    mid = (asks[0][0] + bids[0][0]) / 2
+
+    def average_price(levels: List[Tuple[float, float]]) -> float:
+        prices = np.array([price for price, _ in levels])
+        amounts = prices * np.array([qty for _, qty in levels])
+        filled = np.minimum(amounts, np.maximum(notional - (np.cumsum(amounts) - amounts), 0.0))
+        remaining = notional - filled.sum()
+        quantity = (filled / prices).sum() + remaining / prices[-1]
+        return notional / quantity
+
+    buy = average_price(asks) / mid - 1
+    sell = 1 - average_price(bids) / mid
+    return max(0.0, (buy + sell) / 2)
+
+
+def _bars_per_year(interval: str) -> float:
+    return 365 * 86400 / INTERVAL_SECONDS[interval]
+
+
+def simulate(close: np.ndarray, positions: np.ndarray, cost_rate: float,
+             interval: str = None) -> Tuple[Dict[str, float], np.ndarray]:
+    """
+    목표 비중 배열의 자산 곡선과 성과 지표 계산
+
+    Args:
+        close: 종가 배열
+        positions: 봉별 목표 비중 (해당 봉 종가에 체결)
+        cost_rate: 비중 1만큼 바꿀 때 비용 비율 (수수료 + 슬리피지)
+        interval: 봉 간격 (샤프 비율 연율화, 기본값: INDICATOR_INTERVAL)
+
+    Returns:
+        (지표 딕셔너리, 자산 곡선 배열(시작 1.0)) 튜플
+    """
+    close = np.asarray(close, dtype=float)
+    positions = np.clip(np.nan_to_num(np.asarray(positions, dtype=float)), 0.0, 1.0)
+    if len(close) < 2:
+        raise ValueError("봉이 2개 이상 필요합니다")
+
+    bar_returns = np.concatenate(([0.0], close[1:] / close[:-1] - 1))
+    held = np.concatenate(([0.0], positions[:-1]))
+    turnover = np.abs(np.diff(positions, prepend=0.0))
+    costs = turnover * cost_rate
+    returns = held * bar_returns - costs
+    equity = np.cumprod(1 + returns)
+
+    std = returns[1:].std()
+    metrics = {
+        "total_return": float(equity[-1] - 1),
+        "benchmark_return": float(close[-1] / close[0] - 1),
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()),
+        "sharpe": float(returns[1:].mean() / std * math.sqrt(_bars_per_year(interval or INDICATOR_INTERVAL)))
+        if std > 0 else 0.0,
+        "trades": int(np.count_nonzero(turnover)),
+        "exposure": float(held.mean()),
+        "costs": float(costs.sum()),
+    }
+    return metrics, equity
+
+
+def run_backtest(data: Dict[str, np.ndarray], strategy: str, params: Dict = None,
+                 fee_rate: float = None, slippage: float = 0.0,
+                 interval: str = None) -> Tuple[Dict[str, float], np.ndarray]:
+    """
+    전략 하나를 백테스트
+
+    Args:
+        data: 캔들 배열 딕셔너리 (ai 전략은 attach_recommendations() 결과)
+        strategy: STRATEGIES 이름
+        params: 전략 파라미터 (기본값: 함수 기본값)
+        fee_rate: 거래 수수료율 (기본값: BACKTEST_FEE_RATE)
+        slippage: 슬리피지 비율 (depth_slippage() 결과)
+        interval: 봉 간격 (기본값: INDICATOR_INTERVAL)
+
+    Returns:
+        (지표 딕셔너리, 자산 곡선 배열) 튜플
+    """
+    fee_rate = BACKTEST_FEE_RATE if fee_rate is None else fee_rate
+    positions = STRATEGIES[strategy](data, **(params or {}))
+    return simulate(data["close"], positions, fee_rate + slippage, interval)
+
+
+# 파라미터 탐색 워커 프로세스 상태 (initializer에서 한 번만 전달받음)
+_sweep_state: Dict = {}
+
+
+def _init_sweep_worker(data: Dict[str, np.ndarray], strategy: str, cost_rate: float, interval: str):
+    _sweep_state.update(data=data, strategy=strategy, cost_rate=cost_rate, interval=interval)
+
+
+def _run_sweep_chunk(chunk: List[Dict]) -> List[Dict]:
+    state = _sweep_state
+    results = []
+    for params in chunk:
+        try:
+            positions = STRATEGIES[state["strategy"]](state["data"], **params)
+        except ValueError:
+            # 의미 없는 조합 (예: fast >= slow)
+            continue
+        metrics, _ = simulate(state["data"]["close"], positions, state["cost_rate"], state["interval"])
+        results.append({**params, **metrics})
+    return results
+
+
+def sweep(data: Dict[str, np.ndarray], strategy: str, grid: Dict[str, list] = None,
+          fee_rate: float = None, slippage: float = 0.0, interval: str = None,
+          workers: int = None) -> pd.DataFrame:
+    """
+    파라미터 조합별 백테스트 (여러 프로세스)
+
+    캔들 배열은 워커마다 한 번만 전달하고, 조합은 묶음 단위로 나눠 보낸다.
+    프로세스 수를 지정하지 않으면(workers와 BACKTEST_WORKERS가 0) CPU 수만큼 쓰되
+    프로세스당 조합이 MIN_COMBOS_PER_WORKER 이상이 되도록 줄인다. 지정한 프로세스 수는 조합 수까지 그대로 쓴다.
+
+    Args:
+        data: 캔들 배열 딕셔너리
+        strategy: STRATEGIES 이름
+        grid: 파라미터별 후보 값 (기본값: DEFAULT_GRIDS[strategy])
+        fee_rate: 거래 수수료율 (기본값: BACKTEST_FEE_RATE)
+        slippage: 슬리피지 비율
+        interval: 봉 간격 (기본값: INDICATOR_INTERVAL)
+        workers: 프로세스 수 (기본값: BACKTEST_WORKERS, 0이면 자동, 1이면 현재 프로세스)
+
+    Returns:
+        조합별 파라미터와 지표 DataFrame (샤프 비율 높은 순)
+    """
+    grid = grid or DEFAULT_GRIDS[strategy]
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    cost_rate = (BACKTEST_FEE_RATE if fee_rate is None else fee_rate) + slippage
+    interval = interval or INDICATOR_INTERVAL
+    workers = workers or BACKTEST_WORKERS
+    if not workers:
+        workers = min(os.cpu_count() or 1, len(combos) // MIN_COMBOS_PER_WORKER)
+    workers = max(1, min(workers, len(combos)))
+
+    # 프로세스당 몇 개의 묶음으로 나눠 부하를 고르게 분산
+    chunk_size = max(1, math.ceil(len(combos) / (workers * 4)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    if workers == 1:
+        _init_sweep_worker(data, strategy, cost_rate, interval)
+        results = [_run_sweep_chunk(chunk) for chunk in chunks]
+    else:
+        # inference_service와 같이 spawn 사용 (부모의 스레드 상태를 복제하지 않음)
+        context = mp.get_context("spawn")
+        with context.Pool(workers, initializer=_init_sweep_worker,
+                          initargs=(data, strategy, cost_rate, interval)) as pool:
+            results = pool.map(_run_sweep_chunk, chunks)
+
+    rows = [row for chunk in results for row in chunk]
+    logger.info(f"{strategy} 파라미터 탐색 완료: {len(rows)}/{len(combos)}개 조합, 프로세스 {workers}개")
+    frame = pd.DataFrame(rows)
+    return frame.sort_values("sharpe", ascending=False, ignore_index=True) if rows else frame
@@ -0,0 +1,25 @@
+"""
+HTTP 세션 모듈: 연결 풀을 공유하는 requests 세션 생성 (요청마다 TCP/TLS 연결을 새로 맺지 않음)
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE
+
+
+def create_session(pool_size: int = None) -> requests.Session:
+    """
+    호스트별 연결 풀을 유지하는 세션 생성
+
+    Args:
+        pool_size: 호스트당 유지할 최대 연결 수 (기본값: HTTP_POOL_SIZE)
+
+    Returns:
+        requests.Session 인스턴스
+    """
+    pool_size = pool_size or HTTP_POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
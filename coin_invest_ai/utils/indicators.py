@@ -0,0 +1,478 @@
+"""
+기술적 지표 모듈: 저장된 캔들 배열 전체를 벡터화 계산하고, 새 봉이 들어오면 증분 갱신
+
+지표: SMA, EMA, RSI, MACD, 볼린저 밴드, ATR, VWAP
+- 배열 함수(sma, ema, rsi, ...)는 NumPy/pandas 벡터 연산으로 전체 구간을 한 번에 계산
+- IndicatorEngine은 마지막 상태만 들고 있다가 새 봉마다 O(1)로 갱신
+  (EMA 계열은 직전 값, 이동 창 지표는 창 합계만 사용)
+- get_indicators()는 (통화, 봉 간격)별 IndicatorEngine을 캐시하고 DB에 새로 저장된 봉만 반영
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import INDICATOR_CANDLES, INDICATOR_INTERVAL
+import logging
+
+logger = logging.getLogger(__name__)
+
+SMA_PERIOD = 20
+EMA_PERIOD = 50
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_WIDTH = 2.0
+ATR_PERIOD = 14
+VWAP_PERIOD = 20
+
+# 봉 간격별 길이 (초, 아직 끝나지 않은 봉을 걸러낼 때 사용)
+INTERVAL_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "10m": 600, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "1d": 86400, "1w": 604800,
+}
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def sma(values, period: int = SMA_PERIOD) -> np.ndarray:
+    """단순 이동평균 (처음 period-1개는 NaN)"""
+    values = _as_float(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        csum = np.cumsum(np.insert(values, 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def _smoothed(values, alpha: float, period: int) -> np.ndarray:
+    """
+    지수 평활 (첫 유효값부터 period개의 단순 평균을 시작값으로 사용)
+
+    EMA는 alpha=2/(period+1), Wilder 평활(RSI, ATR)은 alpha=1/period.
+    앞쪽 NaN(예: MACD 선의 초기 구간)은 건너뛴다.
+    """
+    values = _as_float(values)
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0 or len(values) - valid[0] < period:
+        return out
+
+    start = valid[0]
+    seed = values[start:start + period].mean()
+    series = pd.Series(np.concatenate(([seed], values[start + period:])))
+    out[start + period - 1:] = series.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def ema(values, period: int = EMA_PERIOD) -> np.ndarray:
+    """지수 이동평균 (처음 period개의 SMA로 시작)"""
+    return _smoothed(values, 2.0 / (period + 1), period)
+
+
+def _rsi_averages(close, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder 평균 상승폭/하락폭 (close와 같은 길이, 첫 봉은 NaN)"""
+    change = np.diff(_as_float(close))
+    avg_gain = np.concatenate(([np.nan], _smoothed(np.maximum(change, 0.0), 1.0 / period, period)))
+    avg_loss = np.concatenate(([np.nan], _smoothed(np.maximum(-change, 0.0), 1.0 / period, period)))
+    return avg_gain, avg_loss
+
+
+def _rsi_from_averages(avg_gain, avg_loss) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # 하락폭이 0이면 100, 상승폭도 0이면 50
+    value = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), value)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, value)
+
+
+def rsi(close, period: int = RSI_PERIOD) -> np.ndarray:
+    """상대강도지수 (Wilder, 0~100)"""
+    if len(close) == 0:
+        return np.array([])
+    return _rsi_from_averages(*_rsi_averages(close, period))
+
+
+def macd(close, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+         signal: int = MACD_SIGNAL) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD
+
+    Returns:
+        (MACD 선, 시그널 선, 히스토그램) 튜플
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, period: int = BOLLINGER_PERIOD,
+              width: float = BOLLINGER_WIDTH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    볼린저 밴드 (모표준편차 사용)
+
+    Returns:
+        (상단, 중심선, 하단) 튜플
+    """
+    close = _as_float(close)
+    mid = sma(close, period)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        std[period - 1:] = np.lib.stride_tricks.sliding_window_view(close, period).std(axis=1)
+    return mid + width * std, mid, mid - width * std
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True Range (첫 봉은 고가-저가)"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    ranges = np.vstack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    return np.nanmax(ranges, axis=0) if len(close) else np.array([])
+
+
+def atr(high, low, close, period: int = ATR_PERIOD) -> np.ndarray:
+    """평균 진폭 (Wilder)"""
+    return _smoothed(true_range(high, low, close), 1.0 / period, period)
+
+
+def vwap(high, low, close, volume, period: int = VWAP_PERIOD) -> np.ndarray:
+    """최근 period개 봉의 거래량 가중 평균가 (대표가 = (고가+저가+종가)/3)"""
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    volume = _as_float(volume)
+    out = np.full(len(typical), np.nan)
+    if len(typical) >= period:
+        pv = np.cumsum(np.insert(typical * volume, 0, 0.0))
+        vol = np.cumsum(np.insert(volume, 0, 0.0))
+        window_pv = pv[period:] - pv[:-period]
+        window_vol = vol[period:] - vol[:-period]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[period - 1:] = np.where(window_vol > 0, window_pv / window_vol, np.nan)
+    return out
+
+
+def compute_indicators(candles: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    캔들 배열 전체에 대한 지표 계산
+
+    Args:
+        candles: {"open", "high", "low", "close", "volume"} 배열 딕셔너리 (오래된 순)
+
+    Returns:
+        지표 이름별 배열 (캔들과 같은 길이, 계산 불가 구간은 NaN)
+    """
+    high, low, close, volume = (candles[k] for k in ("high", "low", "close", "volume"))
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_upper, bb_mid, bb_lower = bollinger(close)
+    return {
+        "close": _as_float(close),
+        "sma": sma(close),
+        "ema": ema(close),
+        "rsi": rsi(close),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_hist": macd_hist,
+        "bb_upper": bb_upper,
+        "bb_mid": bb_mid,
+        "bb_lower": bb_lower,
+        "atr": atr(high, low, close),
+        "vwap": vwap(high, low, close, volume),
+    }
+
+
+class _Smoother:
+    """_smoothed()의 증분 버전 (시작값이 정해진 뒤로는 값 하나당 O(1))"""
+
+    def __init__(self, alpha: float, period: int):
+        self.alpha = alpha
+        self.period = period
+        self.value = math.nan
+        self._seed: List[float] = []
+
+    @classmethod
+    def resume(cls, alpha: float, period: int, inputs, outputs) -> "_Smoother":
+        """배열 계산 결과의 마지막 값에서 이어감 (아직 시작값이 없으면 입력을 다시 누적)"""
+        smoother = cls(alpha, period)
+        if len(outputs) and not math.isnan(outputs[-1]):
+            smoother.value = float(outputs[-1])
+        else:
+            for value in inputs:
+                smoother.push(value)
+        return smoother
+
+    def push(self, value: float) -> float:
+        if math.isnan(value):
+            return self.value
+        if math.isnan(self.value):
+            self._seed.append(value)
+            if len(self._seed) == self.period:
+                self.value = sum(self._seed) / self.period
+                self._seed = []
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class _RollingWindow:
+    """최근 period개 값과 합계 (값 추가 O(1))"""
+
+    def __init__(self, period: int, values=()):
+        self.period = period
+        self.items = deque(maxlen=period)
+        self.total = 0.0
+        for value in list(values)[-period:]:
+            self.push(value)
+
+    @property
+    def full(self) -> bool:
+        return len(self.items) == self.period
+
+    def push(self, value: float):
+        if self.full:
+            self.total -= self.items[0]
+        self.items.append(value)
+        self.total += value
+
+    def mean(self) -> float:
+        return self.total / self.period if self.full else math.nan
+
+    def std(self) -> float:
+        return float(np.std(self.items)) if self.full else math.nan
+
+
+class IndicatorEngine:
+    """
+    한 (통화, 봉 간격)의 최신 지표 값
+
+    처음에는 저장된 캔들 전체를 벡터화 계산하고, 이후에는 update()로 새로 완성된 봉만 반영한다.
+    """
+
+    def __init__(self, candles: Dict[str, np.ndarray] = None):
+        """
+        Args:
+            candles: {"timestamp", "open", "high", "low", "close", "volume"} 배열 딕셔너리 (오래된 순)
+        """
+        candles = candles or {k: np.array([]) for k in ("timestamp", "open", "high", "low", "close", "volume")}
+        close = _as_float(candles["close"])
+        high, low, volume = _as_float(candles["high"]), _as_float(candles["low"]), _as_float(candles["volume"])
+        arrays = compute_indicators(candles)
+
+        self.bars = len(close)
+        self.timestamp: Optional[int] = int(candles["timestamp"][-1]) if self.bars else None
+        self.values: Dict[str, float] = {name: float(arr[-1]) if self.bars else math.nan
+                                         for name, arr in arrays.items()}
+
+        # 증분 갱신 상태: 배열 계산의 마지막 값에서 이어감
+        self._prev_close = float(close[-1]) if self.bars else math.nan
+        self._ema = _Smoother.resume(2.0 / (EMA_PERIOD + 1), EMA_PERIOD, close, arrays["ema"])
+        self._macd_fast = _Smoother.resume(2.0 / (MACD_FAST + 1), MACD_FAST, close, ema(close, MACD_FAST))
+        self._macd_slow = _Smoother.resume(2.0 / (MACD_SLOW + 1), MACD_SLOW, close, ema(close, MACD_SLOW))
+        self._macd_signal = _Smoother.resume(
+            2.0 / (MACD_SIGNAL + 1), MACD_SIGNAL, arrays["macd"], arrays["macd_signal"]
+        )
+        change = np.diff(close)
+        avg_gain, avg_loss = _rsi_averages(close, RSI_PERIOD) if self.bars else ([], [])
+        self._rsi_gain = _Smoother.resume(1.0 / RSI_PERIOD, RSI_PERIOD, np.maximum(change, 0.0), avg_gain)
+        self._rsi_loss = _Smoother.resume(1.0 / RSI_PERIOD, RSI_PERIOD, np.maximum(-change, 0.0), avg_loss)
+        self._atr = _Smoother.resume(1.0 / ATR_PERIOD, ATR_PERIOD, true_range(high, low, close), arrays["atr"])
+        self._sma_window = _RollingWindow(SMA_PERIOD, close)
+        self._bb_window = _RollingWindow(BOLLINGER_PERIOD, close)
+        typical = (high + low + close) / 3.0
+        self._vwap_pv = _RollingWindow(VWAP_PERIOD, typical * volume)
+        self._vwap_volume = _RollingWindow(VWAP_PERIOD, volume)
+
+    def update(self, candle: Dict[str, float]) -> bool:
+        """
+        새로 완성된 봉 하나 반영
+
+        Args:
+            candle: {"timestamp", "high", "low", "close", "volume"} 딕셔너리
+
+        Returns:
+            반영 여부 (이미 반영한 시각 이전의 봉이면 False)
+        """
+        timestamp = int(candle["timestamp"])
+        if self.timestamp is not None and timestamp <= self.timestamp:
+            return False
+
+        high, low, close = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        volume = float(candle["volume"])
+
+        self._sma_window.push(close)
+        self._bb_window.push(close)
+        ema_value = self._ema.push(close)
+        macd_line = self._macd_fast.push(close) - self._macd_slow.push(close)
+        macd_signal = self._macd_signal.push(macd_line)
+
+        prev_close = self._prev_close
+        if math.isnan(prev_close):
+            true_range_value = high - low
+            avg_gain, avg_loss = math.nan, math.nan
+        else:
+            true_range_value = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            avg_gain = self._rsi_gain.push(max(close - prev_close, 0.0))
+            avg_loss = self._rsi_loss.push(max(prev_close - close, 0.0))
+        atr_value = self._atr.push(true_range_value)
+
+        self._vwap_pv.push((high + low + close) / 3.0 * volume)
+        self._vwap_volume.push(volume)
+        vwap_volume = self._vwap_volume.total if self._vwap_volume.full else math.nan
+
+        bb_mid = self._bb_window.mean()
+        bb_std = self._bb_window.std()
+        self.values = {
+            "close": close,
+            "sma": self._sma_window.mean(),
+            "ema": ema_value,
+            "rsi": float(_rsi_from_averages(np.float64(avg_gain), np.float64(avg_loss))),
+            "macd": macd_line,
+            "macd_signal": macd_signal,
+            "macd_hist": macd_line - macd_signal,
+            "bb_upper": bb_mid + BOLLINGER_WIDTH * bb_std,
+            "bb_mid": bb_mid,
+            "bb_lower": bb_mid - BOLLINGER_WIDTH * bb_std,
+            "atr": atr_value,
+            "vwap": self._vwap_pv.total / vwap_volume if vwap_volume > 0 else math.nan,
+        }
+        self._prev_close = close
+        self.timestamp = timestamp
+        self.bars += 1
+        return True
+
+
+# (통화, 봉 간격)별 지표 계산기 (프로세스 공유)
+_engines: Dict[Tuple[str, str], IndicatorEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_indicators(db, currency: str, interval: str = None) -> Dict[str, float]:
+    """
+    저장된 캔들 기준 최신 지표 값
+
+    처음 호출하면 최근 INDICATOR_CANDLES개 봉으로 계산기를 만들고,
+    이후에는 마지막으로 반영한 봉 이후에 저장된 봉만 읽어 증분 갱신한다.
+
+    Args:
+        db: TradingDatabase 인스턴스
+        currency: 통화 코드
+        interval: 봉 간격 (기본값: INDICATOR_INTERVAL)
+
+    Returns:
+        지표 이름별 값 딕셔너리 ("bars": 반영한 봉 수, "timestamp": 마지막 봉 시각 포함)
+    """
+    interval = interval or INDICATOR_INTERVAL
+    key = (currency.upper(), interval)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine.timestamp is None:
+            engine = IndicatorEngine(db.get_candles(currency, interval, limit=INDICATOR_CANDLES))
+            _engines[key] = engine
+        else:
+            new = db.get_candles(currency, interval, since=engine.timestamp)
+            for i in range(len(new["timestamp"])):
+                engine.update({name: values[i] for name, values in new.items()})
+        return dict(engine.values, bars=engine.bars, timestamp=engine.timestamp)
+
+
+def refresh_candles(api, db, currency: str, interval: str = None, size: int = None) -> int:
+    """
+    거래소에서 최근 캔들을 받아 완성된 봉만 저장
+
+    Args:
+        api: CoinoneAPI 인스턴스
+        db: TradingDatabase 인스턴스
+        currency: 통화 코드
+        interval: 봉 간격 (기본값: INDICATOR_INTERVAL)
+        size: 조회할 봉 개수 (기본값: INDICATOR_CANDLES)
+
+    Returns:
+        저장한 봉 수
+    """
+    interval = interval or INDICATOR_INTERVAL
+    candles = api.get_candles(currency, interval=interval, size=size or INDICATOR_CANDLES)
+    # 진행 중인 봉은 값이 계속 바뀌므로 증분 계산에 넣지 않음
+    now_ms = int(time.time() * 1000)
+    length_ms = INTERVAL_SECONDS.get(interval, 0) * 1000
+    closed = [c for c in candles if c["timestamp"] + length_ms <= now_ms]
+    return db.add_candles(currency, interval, closed)
+
+
+def _format_price(value: float, sign: bool = False) -> str:
+    spec = "+" if sign else ""
+    return f"{value:{spec},.0f}" if abs(value) >= 100 else f"{value:{spec},.4g}"
+
+
+def _format_gap(value: float, base: float) -> str:
+    return f"{(base - value) / value:+.1%}" if value else "-"
+
+
+def summarize_indicators(values: Dict[str, float], interval: str = None) -> str:
+    """
+    프롬프트용 지표 요약 (원시 캔들 대신 몇 줄로 압축)
+
+    Args:
+        values: get_indicators() 결과
+        interval: 봉 간격 (표시용, 기본값: INDICATOR_INTERVAL)
+
+    Returns:
+        요약 문자열 (계산된 지표가 없으면 빈 문자열)
+    """
+    def ok(*names: str) -> bool:
+        return all(not math.isnan(values.get(name, math.nan)) for name in names)
+
+    if not values.get("bars") or not ok("close"):
+        return ""
+
+    close = values["close"]
+    lines = [f"기술적 지표 ({interval or INDICATOR_INTERVAL}봉 {values['bars']}개 기준, 종가 {_format_price(close)}원):"]
+
+    trend = []
+    if ok("sma"):
+        trend.append(f"SMA{SMA_PERIOD} {_format_price(values['sma'])} (종가 {_format_gap(values['sma'], close)})")
+    if ok("ema"):
+        trend.append(f"EMA{EMA_PERIOD} {_format_price(values['ema'])} (종가 {_format_gap(values['ema'], close)})")
+    if ok("vwap"):
+        trend.append(f"VWAP{VWAP_PERIOD} {_format_price(values['vwap'])} (종가 {_format_gap(values['vwap'], close)})")
+    if trend:
+        lines.append("- 추세: " + ", ".join(trend))
+
+    momentum = []
+    if ok("rsi"):
+        state = " 과매수" if values["rsi"] >= 70 else " 과매도" if values["rsi"] <= 30 else ""
+        momentum.append(f"RSI{RSI_PERIOD} {values['rsi']:.1f}{state}")
+    if ok("macd", "macd_signal"):
+        momentum.append(
+            f"MACD {_format_price(values['macd'])} / 시그널 {_format_price(values['macd_signal'])} "
+            f"(히스토그램 {_format_price(values['macd_hist'], sign=True)})"
+        )
+    if momentum:
+        lines.append("- 모멘텀: " + ", ".join(momentum))
+
+    volatility = []
+    if ok("bb_upper", "bb_lower", "bb_mid"):
+        band = values["bb_upper"] - values["bb_lower"]
+        percent_b = (close - values["bb_lower"]) / band if band else 0.5
+        volatility.append(f"볼린저 %B {percent_b:.2f} (밴드폭 {band / values['bb_mid']:.1%})")
+    if ok("atr"):
+        volatility.append(f"ATR{ATR_PERIOD} {_format_price(values['atr'])} (종가 대비 {values['atr'] / close:.1%})")
+    if volatility:
+        lines.append("- 변동성: " + ", ".join(volatility))
+
+    if len(lines) == 1:
+        return ""
+    return "\n".join(lines) + "\n"
+
+
+def indicator_summary(db, currency: str, interval: str = None) -> str:
+    """저장된 캔들 기준 지표 요약 (캔들이 없거나 계산 실패 시 빈 문자열)"""
+    try:
+        return summarize_indicators(get_indicators(db, currency, interval), interval)
+    except Exception as e:
+        logger.error(f"{currency} 기술적 지표 계산 실패: {e}")
+        return ""
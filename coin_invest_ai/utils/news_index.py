@@ -0,0 +1,188 @@
+"""
+뉴스 역색인 모듈: 통화별 별칭 사전을 이용한 관련 뉴스 검색
+"""
+
+import hashlib
+import math
+import re
+import threading
+from typing import Dict, List, Set
+from config import CURRENCY_ALIASES, NEWS_INDEX_MAX_ARTICLES
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 영문/숫자 단어 또는 한글 어절
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[가-힣]+")
+_HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+# 제목에 등장한 용어 가중치 (설명 대비)
+TITLE_WEIGHT = 2.0
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    텍스트를 소문자 토큰 목록으로 분리
+
+    Args:
+        text: 입력 텍스트
+
+    Returns:
+        토큰 목록
+    """
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def article_key(news: Dict) -> str:
+    """뉴스 중복 판별 키 (URL, 없으면 제목)"""
+    return news.get("url") or news.get("title", "")
+
+
+def article_hash(news: Dict) -> str:
+    """기사 식별용 SHA-256 해시 (점수 캐시 키)"""
+    return hashlib.sha256(article_key(news).encode("utf-8")).hexdigest()
+
+
+class NewsIndex:
+    """뉴스 제목/설명 역색인 (여러 스레드에서 공유 가능, 오래 색인된 기사부터 제거)"""
+
+    def __init__(self, aliases: Dict[str, List[str]] = None, max_articles: int = None):
+        """
+        Args:
+            aliases: 통화 코드별 별칭 목록 (기본값: CURRENCY_ALIASES)
+            max_articles: 최대 색인 기사 수 (기본값: NEWS_INDEX_MAX_ARTICLES)
+        """
+        self.max_articles = max_articles or NEWS_INDEX_MAX_ARTICLES
+        self.aliases = {
+            currency.upper(): sorted({currency.lower(), *(a.lower() for a in names)})
+            for currency, names in (aliases or CURRENCY_ALIASES).items()
+        }
+        # 한글 별칭은 조사가 붙은 어절("비트코인이")도 매칭되도록 접두어로 비교
+        self._hangul_aliases = sorted(
+            {a for names in self.aliases.values() for a in names if _HANGUL_PATTERN.search(a)},
+            key=len,
+            reverse=True
+        )
+        # 문서 ID는 색인 순서대로 증가하므로 documents의 첫 항목이 가장 오래된 기사
+        self.documents: Dict[int, Dict] = {}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self._keys: Dict[str, int] = {}
+        self._terms: Dict[int, List[str]] = {}
+        self._next_id = 0
+        # 통화별 정렬된 검색 결과 캐시 (색인 변경 시 초기화)
+        self._ranked: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _normalize(self, token: str) -> str:
+        """한글 어절이 별칭으로 시작하면 별칭으로 정규화"""
+        if _HANGUL_PATTERN.match(token):
+            for alias in self._hangul_aliases:
+                if token.startswith(alias):
+                    return alias
+        return token
+
+    def add(self, news: Dict) -> bool:
+        """
+        뉴스 한 건 색인
+
+        Args:
+            news: 뉴스 딕셔너리 (title, description, url 등)
+
+        Returns:
+            새로 색인되었으면 True, 이미 있으면 False
+        """
+        key = article_key(news)
+        weights: Dict[str, float] = {}
+        for token in tokenize(news.get("title", "")):
+            term = self._normalize(token)
+            weights[term] = weights.get(term, 0.0) + TITLE_WEIGHT
+        for token in tokenize(news.get("description", "")):
+            term = self._normalize(token)
+            weights[term] = weights.get(term, 0.0) + 1.0
+
+        with self._lock:
+            if key in self._keys:
+                return False
+
+            doc_id = self._next_id
+            self._next_id += 1
+            self._keys[key] = doc_id
+            self.documents[doc_id] = news
+            self._terms[doc_id] = list(weights)
+            for term, weight in weights.items():
+                self.postings.setdefault(term, {})[doc_id] = weight
+
+            while len(self.documents) > self.max_articles:
+                self._evict_oldest()
+            self._ranked.clear()
+        return True
+
+    def _evict_oldest(self):
+        """가장 먼저 색인된 기사 제거 (호출 측에서 잠금 보유)"""
+        doc_id = next(iter(self.documents))
+        news = self.documents.pop(doc_id)
+        self._keys.pop(article_key(news), None)
+        for term in self._terms.pop(doc_id):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+
+    def add_many(self, news_list: List[Dict]) -> int:
+        """
+        뉴스 여러 건 색인
+
+        Args:
+            news_list: 뉴스 목록
+
+        Returns:
+            새로 색인된 뉴스 수
+        """
+        added = sum(1 for news in news_list if self.add(news))
+        logger.info(f"뉴스 색인: {added}건 추가 (전체 {len(self)}건)")
+        return added
+
+    def terms_for(self, currency: str) -> Set[str]:
+        """통화 코드에 해당하는 검색 용어 (별칭 사전에 없으면 코드 자체)"""
+        currency = currency.upper()
+        return set(self.aliases.get(currency, [currency.lower()]))
+
+    def _rank(self, currency: str) -> List[int]:
+        """통화 관련 문서 ID를 점수 내림차순으로 정렬 (같은 점수는 최근 색인된 순)"""
+        total = len(self.documents)
+        scores: Dict[int, float] = {}
+
+        for term in self.terms_for(currency):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            for doc_id, weight in postings.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [doc_id for doc_id, _ in ranked]
+
+    def search(self, currency: str, top_k: int = 5) -> List[Dict]:
+        """
+        통화 관련도가 높은 뉴스 검색
+        정렬 결과는 다음 색인 변경 전까지 캐시되므로 반복 검색은 O(top_k)
+
+        Args:
+            currency: 통화 코드 (BTC, ETH, XRP 등)
+            top_k: 최대 결과 수
+
+        Returns:
+            관련도 내림차순 뉴스 목록
+        """
+        currency = currency.upper()
+        with self._lock:
+            ranked = self._ranked.get(currency)
+            if ranked is None:
+                ranked = self._ranked[currency] = self._rank(currency)
+            return [self.documents[doc_id] for doc_id in ranked[:top_k]]
@@ -2,11 +2,14 @@
 뉴스 수집 모듈: 뉴스 API 또는 RSS 피드에서 암호화폐 뉴스 수집
 """
 
-import requests
+import threading
 import feedparser
 from typing import List, Dict
 from datetime import datetime
 from config import NEWS_API_KEY, RSS_FEED_URLS
+from utils.news_index import NewsIndex
+from utils.news_vectors import NewsVectorIndex
+from utils.http_session import create_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,14 +18,22 @@ logger = logging.getLogger(__name__)
 class NewsScraper:
     """뉴스 수집 클래스"""
     
-    def __init__(self, news_api_key: str = None, rss_urls: List[str] = None):
+    def __init__(self, news_api_key: str = None, rss_urls: List[str] = None,
+                 aliases: Dict[str, List[str]] = None):
         """
         Args:
             news_api_key: News API 키 (옵션)
             rss_urls: RSS 피드 URL 목록 (옵션)
+            aliases: 통화별 뉴스 검색 별칭 (옵션, 기본값: CURRENCY_ALIASES)
         """
         self.news_api_key = news_api_key or NEWS_API_KEY
         self.rss_urls = rss_urls or RSS_FEED_URLS
+        self.index = NewsIndex(aliases)
+        # 두 색인이 같은 기사를 같은 순서로 넣고 같은 수만 유지 (유사 검색이 관련도 색인에서 빠진 기사를 돌려주지 않음)
+        self.vectors = NewsVectorIndex(max_articles=self.index.max_articles)
+        self.session = create_session()
+        # 앱에서는 여러 세션이 하나의 인스턴스(색인)를 공유
+        self._lock = threading.RLock()
     
     def fetch_news_api(self, query: str = "cryptocurrency", 
                       language: str = "en", max_results: int = 10) -> List[Dict]:
@@ -51,7 +62,7 @@ class NewsScraper:
                 "apiKey": self.news_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -92,7 +103,9 @@ class NewsScraper:
         
         for rss_url in self.rss_urls:
             try:
-                feed = feedparser.parse(rss_url)
+                response = self.session.get(rss_url, timeout=10)
+                response.raise_for_status()
+                feed = feedparser.parse(response.content)
                 
                 for entry in feed.entries[:max_results]:
                     news_list.append({
@@ -123,17 +136,74 @@ class NewsScraper:
             뉴스 목록
         """
         if method == "api":
-            return self.fetch_news_api(query="cryptocurrency OR bitcoin OR ethereum", 
-                                     max_results=max_results)
+            news_list = self.fetch_news_api(query="cryptocurrency OR bitcoin OR ethereum", 
+                                            max_results=max_results)
         else:
-            return self.fetch_rss_feeds(max_results=max_results)
+            news_list = self.fetch_rss_feeds(max_results=max_results)
+        
+        # 여러 피드에 반복된 유사 기사를 제거한 뒤 통화 관련도 색인에 저장
+        with self._lock:
+            news_list = self.vectors.add_many(news_list)
+            self.index.add_many(news_list)
+        return news_list
+    
+    def load_stored_news(self, db, limit: int = None) -> int:
+        """
+        DB에 저장된 최근 뉴스를 색인에 추가 (프로세스 시작 시 한 번 호출)
+        
+        Args:
+            db: TradingDatabase 인스턴스
+            limit: 불러올 기사 수 (기본값: 관련 뉴스 색인 최대 기사 수)
+            
+        Returns:
+            새로 색인된 뉴스 수
+        """
+        # 오래된 기사부터 넣어야 색인 용량 초과 시 오래된 기사가 먼저 제거됨
+        stored = list(reversed(db.get_recent_news(limit=limit or self.index.max_articles)))
+        with self._lock:
+            stored = self.vectors.add_many(stored)
+            return self.index.add_many(stored)
+    
+    def get_relevant_news(self, currency: str, top_k: int = 5) -> List[Dict]:
+        """
+        수집된 뉴스 중 통화와 관련된 뉴스만 반환
+        
+        Args:
+            currency: 통화 코드 (BTC, ETH, XRP 등)
+            top_k: 최대 결과 수
+            
+        Returns:
+            관련도 순 뉴스 목록
+        """
+        with self._lock:
+            return self.index.search(currency, top_k=top_k)
+    
+    def search_similar_news(self, query: str, top_k: int = 5, min_similarity: float = 0.0) -> List[Dict]:
+        """
+        수집된 뉴스 중 질의와 의미가 유사한 뉴스 검색
+        
+        Args:
+            query: 검색 질의
+            top_k: 최대 결과 수
+            min_similarity: 최소 코사인 유사도 (미만인 기사는 제외)
+            
+        Returns:
+            유사도 순 뉴스 목록
+        """
+        with self._lock:
+            return [
+                news for news, similarity in self.vectors.search(query, top_k=top_k)
+                if similarity >= min_similarity
+            ]
     
-    def format_news_for_ai(self, news_list: List[Dict]) -> str:
+    def format_news_for_ai(self, news_list: List[Dict], max_description_chars: int = 200) -> str:
         """
         AI 분석을 위한 뉴스 포맷팅
+        토큰 예산에 맞춘 프롬프트 구성은 utils.prompt_builder.PromptBuilder 사용
         
         Args:
             news_list: 뉴스 목록
+            max_description_chars: 뉴스 설명 최대 길이 (문자 수)
             
         Returns:
             포맷팅된 뉴스 텍스트
@@ -141,14 +211,14 @@ class NewsScraper:
         if not news_list:
             return "뉴스가 없습니다."
         
-        formatted_text = "최근 암호화폐 뉴스:\n\n"
+        parts = ["최근 암호화폐 뉴스:\n\n"]
         
         for i, news in enumerate(news_list, 1):
-            formatted_text += f"{i}. {news['title']}\n"
+            parts.append(f"{i}. {news['title']}\n")
             if news.get('description'):
-                formatted_text += f"   {news['description'][:200]}...\n"
-            formatted_text += f"   출처: {news.get('source', 'Unknown')}\n"
-            formatted_text += f"   발행일: {news.get('published_at', 'Unknown')}\n\n"
+                parts.append(f"   {news['description'][:max_description_chars]}...\n")
+            parts.append(f"   출처: {news.get('source', 'Unknown')}\n")
+            parts.append(f"   발행일: {news.get('published_at', 'Unknown')}\n\n")
         
-        return formatted_text
+        return "".join(parts)
 
@@ -0,0 +1,192 @@
+"""
+뉴스 벡터 색인 모듈: 해시 TF-IDF 임베딩 기반 중복 제거 및 유사 뉴스 검색 (CPU 전용)
+"""
+
+import math
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+from config import NEWS_DEDUP_THRESHOLD, NEWS_INDEX_MAX_ARTICLES, NEWS_VECTOR_DIM
+from utils.news_index import article_key, tokenize
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 기존 기사와 유사도를 계산할 때 한 번에 처리할 행 수 (메모리 사용량 제한)
+SIMILARITY_CHUNK_ROWS = 16384
+
+
+@lru_cache(maxsize=65536)
+def _bucket(term: str, n_features: int) -> Tuple[int, float]:
+    """용어의 해시 버킷과 부호 (프로세스 간 동일한 crc32 사용, 자주 쓰는 용어만 캐시)"""
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % n_features, 1.0 if h & 0x80000000 else -1.0
+
+
+class NewsVectorIndex:
+    """NumPy 행렬에 저장하는 뉴스 벡터 색인 (NewsIndex와 같은 기사 수 제한, 오래 색인된 기사부터 제거)"""
+
+    def __init__(self, n_features: int = None, dedup_threshold: float = None,
+                 initial_capacity: int = 1024, max_articles: int = None):
+        """
+        Args:
+            n_features: 해시 임베딩 차원 (기본값: NEWS_VECTOR_DIM)
+            dedup_threshold: 중복으로 판단할 코사인 유사도 (기본값: NEWS_DEDUP_THRESHOLD)
+            initial_capacity: 초기 행렬 크기 (부족하면 2배씩 확장, 최대 기사 수까지)
+            max_articles: 최대 색인 기사 수 (기본값: NEWS_INDEX_MAX_ARTICLES)
+        """
+        self.max_articles = max_articles or NEWS_INDEX_MAX_ARTICLES
+        self.n_features = n_features or NEWS_VECTOR_DIM
+        self.dedup_threshold = NEWS_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+        self.documents: List[Dict] = []
+        self._keys: Dict[str, int] = {}
+        self._matrix = np.zeros((min(initial_capacity, self.max_articles), self.n_features), dtype=np.float32)
+        self._doc_freq = np.zeros(self.n_features, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        텍스트 목록을 L2 정규화된 해시 벡터로 변환 (unigram + bigram, sublinear TF)
+
+        Args:
+            texts: 텍스트 목록
+
+        Returns:
+            (len(texts), n_features) float32 행렬
+        """
+        rows: List[int] = []
+        columns: List[int] = []
+        weights: List[float] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            counts = Counter(tokens)
+            counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for term, count in counts.items():
+                index, sign = _bucket(term, self.n_features)
+                rows.append(row)
+                columns.append(index)
+                weights.append(sign * (1.0 + math.log(count)))
+
+        vectors = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+                  np.array(weights, dtype=np.float32))
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _article_text(news: Dict) -> str:
+        return f"{news.get('title', '')} {news.get('description', '')}"
+
+    def _max_similarity(self, vectors: np.ndarray) -> np.ndarray:
+        """저장된 기사들과의 최대 코사인 유사도 (기사별)"""
+        best = np.full(len(vectors), -1.0, dtype=np.float32)
+        size = len(self.documents)
+        for start in range(0, size, SIMILARITY_CHUNK_ROWS):
+            chunk = self._matrix[start:min(start + SIMILARITY_CHUNK_ROWS, size)]
+            np.maximum(best, (chunk @ vectors.T).max(axis=0), out=best)
+        return best
+
+    def _append(self, vectors: np.ndarray):
+        """행렬 뒤에 벡터 추가 (용량 부족 시 2배 확장)"""
+        size = len(self.documents)
+        needed = size + len(vectors)
+        if needed > len(self._matrix):
+            capacity = max(needed, min(2 * len(self._matrix), self.max_articles))
+            grown = np.zeros((capacity, self.n_features), dtype=np.float32)
+            grown[:size] = self._matrix[:size]
+            self._matrix = grown
+        self._matrix[size:needed] = vectors
+        self._doc_freq += (vectors != 0).sum(axis=0)
+
+    def _evict_oldest(self, count: int):
+        """가장 먼저 색인된 기사 count건 제거 (행렬 행을 앞으로 당김)"""
+        size = len(self.documents)
+        count = min(count, size)
+        if count <= 0:
+            return
+        self._doc_freq -= (self._matrix[:count] != 0).sum(axis=0)
+        self._matrix[:size - count] = self._matrix[count:size]
+        self._matrix[size - count:size] = 0
+        del self.documents[:count]
+        self._keys = {article_key(news): row for row, news in enumerate(self.documents)}
+
+    def add_many(self, news_list: List[Dict]) -> List[Dict]:
+        """
+        뉴스를 일괄 임베딩하여 색인 (유사 기사는 제외)
+
+        이미 색인된 기사(같은 URL)는 그대로 결과에 포함하고,
+        다른 기사와 유사도가 dedup_threshold 이상인 기사는 버린다.
+
+        Args:
+            news_list: 뉴스 목록
+
+        Returns:
+            중복이 제거된 뉴스 목록 (입력 순서 유지)
+        """
+        known = [article_key(news) in self._keys for news in news_list]
+        candidates = [i for i, is_known in enumerate(known) if not is_known]
+        if not candidates:
+            return list(news_list)
+
+        vectors = self.embed([self._article_text(news_list[i]) for i in candidates])
+        existing_similarity = self._max_similarity(vectors)
+        batch_similarity = vectors @ vectors.T
+
+        accepted: List[int] = []
+        for row in range(len(candidates)):
+            if existing_similarity[row] >= self.dedup_threshold:
+                continue
+            if accepted and batch_similarity[row, accepted].max() >= self.dedup_threshold:
+                continue
+            accepted.append(row)
+
+        self._append(vectors[accepted])
+        start = len(self.documents)
+        for offset, row in enumerate(accepted):
+            news = news_list[candidates[row]]
+            self._keys[article_key(news)] = start + offset
+            self.documents.append(news)
+        self._evict_oldest(len(self.documents) - self.max_articles)
+
+        accepted_indexes = {candidates[row] for row in accepted}
+        dropped = len(candidates) - len(accepted)
+        if dropped:
+            logger.info(f"유사 뉴스 {dropped}건 제외 (전체 {len(self.documents)}건)")
+        return [
+            news for i, news in enumerate(news_list)
+            if known[i] or i in accepted_indexes
+        ]
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[Dict, float]]:
+        """
+        질의와 유사한 뉴스 검색 (질의 쪽에 IDF 가중치 적용)
+
+        Args:
+            query: 검색 질의
+            top_k: 최대 결과 수
+
+        Returns:
+            (뉴스, 유사도) 튜플 목록 (유사도 내림차순)
+        """
+        size = len(self.documents)
+        if size == 0:
+            return []
+
+        idf = np.log((1.0 + size) / (1.0 + self._doc_freq)) + 1.0
+        query_vector = self.embed([query])[0] * idf
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        query_vector /= norm
+
+        scores = self._matrix[:size] @ query_vector
+        top_k = min(top_k, size)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[i], float(scores[i])) for i in top]
@@ -0,0 +1,331 @@
+"""
+프롬프트 빌더 모듈: 토큰 예산에 맞춰 AI 분석 프롬프트 구성
+"""
+
+import math
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from config import CURRENCY_ALIASES, PROMPT_TOKEN_BUDGET, SENTIMENT_NEWS_BUDGET, SENTIMENT_SCORER
+from utils.indicators import indicator_summary
+from utils.news_index import article_key, tokenize
+from utils.recommendation import RECOMMENDATION_INSTRUCTION
+from utils.sentiment import SentimentScorer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 한글/한자/가나 문자 (Qwen 토크나이저 기준 대략 1문자 = 1토큰)
+_CJK_PATTERN = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af]")
+
+# 뉴스 설명 최대 길이 (문자 수, 예산이 허용하는 경우)
+MAX_DESCRIPTION_CHARS = 400
+
+# 통화별 관련 뉴스 후보 수
+RELEVANT_NEWS_COUNT = 10
+
+# 관련 뉴스와 내용이 유사한 기사로 보충할 때 최소 코사인 유사도
+SIMILAR_NEWS_MIN_SIMILARITY = 0.2
+
+# 모든 분석 요청에 공통인 지시문 (로컬 모델은 이 부분의 KV 캐시를 재사용하므로
+# 통화/가격/뉴스 등 바뀌는 정보는 반드시 이 뒤에 붙인다)
+ANALYSIS_PROMPT_PREFIX = (
+    "당신은 암호화폐 투자 분석가입니다. "
+    "아래에 주어지는 시장 정보를 바탕으로 해당 통화에 대한 투자 의견을 제시해주세요.\n\n"
+    "분석 요청사항:\n"
+    "1. 현재 시장 상황 분석\n"
+    "2. 기술적 분석\n"
+    "3. 투자 추천 (매수/매도/보유)\n"
+    "4. 이유 설명\n\n"
+    "분석 결과를 한국어로 작성해주세요.\n\n"
+)
+
+# 구조화(JSON 추천) 모드 고정 지시문 (서술형 작성 요청 없이 판단만 요청)
+STRUCTURED_PROMPT_PREFIX = (
+    "당신은 암호화폐 투자 분석가입니다. "
+    "아래에 주어지는 시장 정보를 바탕으로 해당 통화의 투자 추천(매수/매도/보유)을 판단해주세요.\n\n"
+)
+
+# 로컬 모델이 KV 캐시를 미리 계산해 두는 고정 지시문
+PROMPT_PREFIXES = (ANALYSIS_PROMPT_PREFIX, STRUCTURED_PROMPT_PREFIX)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수 추정 (LM Studio API 모드용)
+
+    Args:
+        text: 입력 텍스트
+
+    Returns:
+        추정 토큰 수
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + math.ceil(other_count / 4)
+
+
+def parse_published_at(value: str) -> Optional[datetime]:
+    """
+    뉴스 발행일 문자열 파싱 (RSS의 RFC 2822, News API의 ISO 8601)
+
+    Args:
+        value: 발행일 문자열
+
+    Returns:
+        timezone 정보가 포함된 datetime (파싱 실패 시 None)
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class PromptBuilder:
+    """토큰 예산 기반 AI 분석 프롬프트 빌더"""
+
+    def __init__(self, token_counter: Callable[[str], int] = None, token_budget: int = None,
+                 sentiment_news_budget: int = None):
+        """
+        Args:
+            token_counter: 토큰 수 계산 함수 (기본값: estimate_tokens)
+            token_budget: 프롬프트 최대 토큰 수 (기본값: PROMPT_TOKEN_BUDGET)
+            sentiment_news_budget: 감성 요약이 있을 때 원문 뉴스 최대 토큰 수 (기본값: SENTIMENT_NEWS_BUDGET)
+        """
+        self.count_tokens = token_counter or estimate_tokens
+        self.token_budget = token_budget or PROMPT_TOKEN_BUDGET
+        self.sentiment_news_budget = (
+            SENTIMENT_NEWS_BUDGET if sentiment_news_budget is None else sentiment_news_budget
+        )
+
+    def _relevance(self, news: Dict, currency: str = None) -> float:
+        """통화 코드/별칭 등장 횟수 기반 관련도 (제목 가중치 2)"""
+        if not currency:
+            return 0.0
+
+        keywords = {currency.lower(), *(a.lower() for a in CURRENCY_ALIASES.get(currency.upper(), []))}
+        title_hits = sum(1 for token in tokenize(news.get("title", "")) if token in keywords)
+        description_hits = sum(1 for token in tokenize(news.get("description", "")) if token in keywords)
+        return 2.0 * title_hits + description_hits
+
+    def rank_news(self, news_list: List[Dict], currency: str = None) -> List[Dict]:
+        """
+        최신성과 관련도 기준으로 뉴스 정렬
+
+        Args:
+            news_list: 뉴스 목록
+            currency: 분석 대상 통화 코드
+
+        Returns:
+            점수 내림차순으로 정렬된 뉴스 목록
+        """
+        now = datetime.now(timezone.utc)
+
+        def score(news: Dict) -> float:
+            published = parse_published_at(news.get("published_at", ""))
+            if published is None:
+                recency = 0.0
+            else:
+                age_hours = max((now - published).total_seconds() / 3600, 0.0)
+                recency = math.exp(-age_hours / 24)
+            return self._relevance(news, currency) + recency
+
+        return sorted(news_list, key=score, reverse=True)
+
+    def _format_news_item(self, index: int, news: Dict, description_chars: int) -> str:
+        """뉴스 한 건 포맷팅 (description_chars가 0이면 설명 생략)"""
+        lines = [f"{index}. {news.get('title', '')}"]
+        description = (news.get("description") or "").strip()
+        if description and description_chars > 0:
+            if len(description) > description_chars:
+                description = description[:description_chars].rstrip() + "..."
+            lines.append(f"   {description}")
+        lines.append(f"   출처: {news.get('source', 'Unknown')} | 발행일: {news.get('published_at', 'Unknown')}")
+        return "\n".join(lines) + "\n"
+
+    def pack_news(self, news_list: List[Dict], budget: int) -> Tuple[str, int, int]:
+        """
+        정렬된 뉴스를 토큰 예산 안에 채워 넣기
+
+        예산이 부족하면 설명을 줄이고, 그래도 부족하면 제목만 넣는다.
+
+        Args:
+            news_list: 정렬된 뉴스 목록
+            budget: 뉴스 섹션에 허용된 토큰 수
+
+        Returns:
+            (뉴스 텍스트, 사용한 토큰 수, 포함된 뉴스 수) 튜플
+        """
+        header = "최근 암호화폐 뉴스:\n"
+        used = self.count_tokens(header)
+        if not news_list or used >= budget:
+            return "", 0, 0
+
+        # 항목 사이 구분자("\n")도 예산에 포함
+        separator_tokens = self.count_tokens("\n")
+        parts = [header]
+        for news in news_list:
+            index = len(parts)
+            for description_chars in (MAX_DESCRIPTION_CHARS, MAX_DESCRIPTION_CHARS // 4, 0):
+                item = self._format_news_item(index, news, description_chars)
+                item_tokens = self.count_tokens(item) + separator_tokens
+                if used + item_tokens <= budget:
+                    parts.append(item)
+                    used += item_tokens
+                    break
+            else:
+                # 제목만으로도 들어가지 않으면 이후 뉴스도 생략
+                break
+
+        if len(parts) == 1:
+            return "", 0, 0
+        return "\n".join(parts), used, len(parts) - 1
+
+    def build_analysis_prompt(self, currency: str, current_price, news_list: List[Dict],
+                              sentiment_summary: str = None, structured: bool = False,
+                              indicators_summary: str = None) -> Tuple[str, int]:
+        """
+        AI 투자 분석 프롬프트 구성
+
+        고정 지시문(ANALYSIS_PROMPT_PREFIX, 구조화 모드는 STRUCTURED_PROMPT_PREFIX)을 맨 앞에 두고
+        바뀌는 정보를 뒤에 붙인다.
+        sentiment_summary가 주어지면 원문 뉴스 대신 요약을 넣고, 요약에 없는 기사만
+        sentiment_news_budget 토큰까지 덧붙인다 (요약이 없으면 남은 예산 전체를 뉴스로 채움).
+        고정 섹션만으로 예산을 넘으면 뉴스는 넣지 않고 경고를 남긴다.
+        indicators_summary가 주어지면 가격 아래에 기술적 지표 요약을 넣는다 (원시 캔들은 넣지 않음).
+        structured이면 서술형 작성 지시가 없는 접두어와 JSON 추천 형식 요청을 사용한다.
+
+        Args:
+            currency: 분석 대상 통화 코드
+            current_price: 현재 가격
+            news_list: 뉴스 목록
+            sentiment_summary: SentimentScorer.summarize() 결과 (옵션)
+            structured: JSON 추천(action, confidence, reasons) 형식 요청 여부
+            indicators_summary: summarize_indicators() 결과 (옵션)
+
+        Returns:
+            (프롬프트, 프롬프트 토큰 수) 튜플
+        """
+        header = (
+            f"분석 대상: {currency}\n"
+            f"현재 가격: {current_price}원\n"
+        )
+        if indicators_summary:
+            header += indicators_summary
+        if structured:
+            prefix = STRUCTURED_PROMPT_PREFIX
+            footer = f"위 정보를 바탕으로 {currency} 투자 추천을 판단하세요.\n" + RECOMMENDATION_INSTRUCTION
+        else:
+            prefix = ANALYSIS_PROMPT_PREFIX
+            footer = f"위 정보를 바탕으로 {currency} 투자 의견을 작성해주세요.\n"
+
+        sections = [header]
+        if sentiment_summary:
+            sections.append(sentiment_summary + "\n")
+
+        # 섹션 사이 구분자 포함 (뉴스 섹션과 footer 앞 구분자까지)
+        fixed_tokens = sum(self.count_tokens(part) for part in (prefix, *sections, footer))
+        news_budget = self.token_budget - fixed_tokens - (len(sections) + 1) * self.count_tokens("\n")
+        if news_budget < 0:
+            logger.warning(
+                f"{currency} 프롬프트 고정 섹션만으로 토큰 예산 초과: "
+                f"{self.token_budget - news_budget}/{self.token_budget} 토큰"
+            )
+            news_budget = 0
+
+        ranked = self.rank_news(news_list, currency)
+        if sentiment_summary:
+            news_budget = min(news_budget, self.sentiment_news_budget)
+            # 요약에 이미 나온 대표 기사 제목은 다시 넣지 않음
+            ranked = [news for news in ranked if not news.get("title") or news["title"] not in sentiment_summary]
+        news_text, _, news_count = self.pack_news(ranked, news_budget)
+        if news_text:
+            sections.append(news_text)
+        elif not sentiment_summary:
+            sections.append("뉴스가 없습니다.\n")
+
+        prompt = prefix + "\n".join([*sections, footer])
+        token_count = self.count_tokens(prompt)
+        logger.info(
+            f"프롬프트 구성 완료: {token_count}/{self.token_budget} 토큰, "
+            f"뉴스 {news_count}/{len(news_list)}건 포함"
+        )
+        return prompt, token_count
+
+
+def gather_relevant_news(currency: str, scraper, top_k: int = RELEVANT_NEWS_COUNT) -> List[Dict]:
+    """
+    통화 관련 뉴스 수집: 별칭 색인 결과를 먼저 넣고, 남는 자리는 그 기사들과 내용이 유사한 기사로 보충
+
+    Args:
+        currency: 통화 코드
+        scraper: 뉴스를 색인해 둔 NewsScraper 인스턴스
+        top_k: 최대 기사 수
+
+    Returns:
+        관련 뉴스 목록 (별칭 색인 결과, 유사 기사 순)
+    """
+    relevant = scraper.get_relevant_news(currency, top_k=top_k)
+    if not relevant or len(relevant) >= top_k:
+        return relevant
+
+    # 통화명이 직접 나오지 않는 후속 기사(규제, ETF 등)를 찾기 위해 상위 기사 제목으로 질의
+    query = " ".join(news.get("title", "") for news in relevant[:3])
+    seen = {article_key(news) for news in relevant}
+    for news in scraper.search_similar_news(query, top_k=top_k, min_similarity=SIMILAR_NEWS_MIN_SIMILARITY):
+        if len(relevant) >= top_k:
+            break
+        if article_key(news) not in seen:
+            seen.add(article_key(news))
+            relevant.append(news)
+    return relevant
+
+
+def prepare_currency_prompt(currency: str, current_price, scraper, news_list: List[Dict],
+                            db, model=None, structured: bool = False) -> Tuple[str, int]:
+    """
+    통화별 분석 프롬프트 구성 (기술적 지표, 뉴스 감성 요약, 관련 뉴스, 토큰 예산) - 대시보드와 데몬 공용
+
+    기술적 지표는 DB에 저장된 캔들로 계산한다 (캔들 저장은 refresh_candles()).
+
+    Args:
+        currency: 분석 대상 통화 코드
+        current_price: 현재 가격
+        scraper: 뉴스를 색인해 둔 NewsScraper 인스턴스
+        news_list: 최근 수집한 뉴스 목록
+        db: TradingDatabase 인스턴스 (감성 점수 캐시, 캔들)
+        model: 토큰 수 계산 및 LLM 감성 채점에 사용할 모델 (옵션)
+        structured: JSON 추천(action, confidence, reasons) 형식 요청 여부
+
+    Returns:
+        (프롬프트, 프롬프트 토큰 수) 튜플
+    """
+    # 관련 뉴스가 없으면 최근 뉴스 전체(시장 분위기)로 대체
+    relevant_news = gather_relevant_news(currency, scraper) or news_list
+
+    # 프롬프트에 넣을 기사들의 감성 점수 (DB 캐시에 없는 기사만 채점)
+    scorer = SentimentScorer(db, model=model if SENTIMENT_SCORER == "llm" else None)
+    sentiment_summary = scorer.summarize(currency, relevant_news)
+
+    builder = PromptBuilder(token_counter=model.count_tokens if model is not None else None)
+    return builder.build_analysis_prompt(
+        currency=currency,
+        current_price=current_price,
+        news_list=relevant_news,
+        sentiment_summary=sentiment_summary,
+        structured=structured,
+        indicators_summary=indicator_summary(db, currency)
+    )
@@ -0,0 +1,120 @@
+"""
+구조화된 투자 추천 모듈: 짧은 JSON 응답(action, confidence, reasons)을 요청하고 검증
+"""
+
+import json
+from typing import Dict, List
+from config import RECOMMENDATION_MAX_NEW_TOKENS
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("buy", "sell", "hold")
+
+# 모델이 한국어/대문자로 답한 경우 정규화
+_ACTION_ALIASES = {
+    "buy": "buy", "매수": "buy",
+    "sell": "sell", "매도": "sell",
+    "hold": "hold", "보유": "hold", "관망": "hold",
+}
+
+MAX_REASONS = 3
+
+# 프롬프트 끝에 붙이는 응답 형식 지시 (고정 지시문 뒤에 오므로 접두어 KV 캐시는 그대로 재사용)
+RECOMMENDATION_INSTRUCTION = (
+    "설명 없이 아래 형식의 JSON 한 줄로만 답하세요.\n"
+    '{"action": "buy|sell|hold", "confidence": 0.0~1.0, '
+    f'"reasons": ["한 문장 근거", ...최대 {MAX_REASONS}개]}}\n'
+)
+
+# 객체가 닫히면 바로 생성 중단 (reasons 배열 안에는 "}"가 없음)
+RECOMMENDATION_STOP = ["}"]
+
+
+def parse_recommendation(text: str) -> Dict:
+    """
+    모델 응답에서 추천 JSON을 찾아 검증
+
+    Args:
+        text: 모델 응답 (중단 문자열 "}"이 잘린 경우도 허용)
+
+    Returns:
+        {"action", "confidence", "reasons"} 딕셔너리
+
+    Raises:
+        ValueError: JSON이 없거나 필드가 유효하지 않은 경우
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError(f"응답에 JSON이 없습니다: {text[:100]!r}")
+    end = text.find("}", start)
+    raw = text[start:end + 1] if end != -1 else text[start:].rstrip() + "}"
+
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 파싱 실패: {e} ({raw[:100]!r})")
+    if not isinstance(data, dict):
+        raise ValueError("JSON 객체가 아닙니다")
+
+    action = _ACTION_ALIASES.get(str(data.get("action", "")).strip().lower())
+    if action is None:
+        raise ValueError(f"알 수 없는 action: {data.get('action')!r}")
+
+    try:
+        confidence = float(data.get("confidence"))
+    except (TypeError, ValueError):
+        raise ValueError(f"confidence가 숫자가 아닙니다: {data.get('confidence')!r}")
+    if confidence > 1.0:
+        # 백분율로 답한 경우 (예: 75)
+        confidence /= 100.0
+    if not 0.0 <= confidence <= 1.0:
+        raise ValueError(f"confidence 범위 오류: {confidence}")
+
+    reasons = data.get("reasons") or []
+    if isinstance(reasons, str):
+        reasons = [reasons]
+    if not isinstance(reasons, list):
+        raise ValueError("reasons가 목록이 아닙니다")
+    reasons: List[str] = [str(r).strip() for r in reasons if str(r).strip()][:MAX_REASONS]
+
+    return {"action": action, "confidence": confidence, "reasons": reasons}
+
+
+def generate_recommendation(model, prompt: str, model_name: str = None,
+                            max_new_tokens: int = None, temperature: float = 0.2,
+                            use_cache: bool = True, metrics: Dict = None) -> Dict:
+    """
+    구조화된 추천 생성 후 파싱 (QwenModel, SharedModel, InferenceService 모두 사용 가능)
+
+    Args:
+        model: generate(prompt=..., stop=...)를 지원하는 모델
+        prompt: PromptBuilder.build_analysis_prompt(..., structured=True) 결과
+        model_name: LM Studio에서 사용할 모델 이름
+        max_new_tokens: 최대 생성 토큰 수 (기본값: RECOMMENDATION_MAX_NEW_TOKENS)
+        temperature: 생성 온도 (형식 안정성을 위해 낮게)
+        use_cache: 응답 캐시 사용 여부
+        metrics: 지정 시 생성 지표를 채워 넣을 딕셔너리
+
+    Returns:
+        {"action", "confidence", "reasons", "raw"} 딕셔너리
+
+    Raises:
+        ValueError: 응답이 형식에 맞지 않는 경우
+    """
+    raw = model.generate(
+        prompt=prompt,
+        max_length=max_new_tokens or RECOMMENDATION_MAX_NEW_TOKENS,
+        temperature=temperature,
+        model_name=model_name,
+        use_cache=use_cache,
+        stop=RECOMMENDATION_STOP,
+        metrics=metrics
+    )
+    try:
+        recommendation = parse_recommendation(raw)
+    except ValueError as e:
+        logger.error(f"추천 결과 검증 실패: {e}")
+        raise
+    recommendation["raw"] = raw
+    return recommendation
@@ -0,0 +1,232 @@
+"""
+뉴스 감성 분석 모듈: 기사별 감성 점수를 한 번만 계산하여 DB에 캐시
+
+통화 관련도는 별칭 사전이 바뀌어도 맞도록 캐시 값을 쓰지 않고 조회할 때마다 계산한다.
+"""
+
+import json
+import re
+from typing import Dict, List
+from config import CURRENCY_ALIASES, LM_STUDIO_MODEL_NAME, SENTIMENT_BATCH_SIZE
+from utils.news_index import article_hash, tokenize
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 간단한 감성 사전 (영문 단어는 정확히, 한글은 어절 접두어로 매칭)
+POSITIVE_TERMS = {
+    "surge", "surges", "surged", "rally", "rallies", "rallied", "gain", "gains",
+    "rise", "rises", "rising", "soar", "soars", "soared", "bullish", "record",
+    "approve", "approves", "approved", "approval", "adoption", "inflow", "inflows",
+    "upgrade", "breakout", "rebound", "rebounds", "jump", "jumps", "jumped",
+    "상승", "급등", "호재", "강세", "승인", "반등", "최고", "돌파", "유입",
+}
+NEGATIVE_TERMS = {
+    "crash", "crashes", "plunge", "plunges", "plunged", "fall", "falls", "fell",
+    "drop", "drops", "dropped", "bearish", "hack", "hacked", "exploit", "lawsuit",
+    "sue", "sues", "sued", "ban", "bans", "banned", "fraud", "outflow", "outflows",
+    "liquidation", "liquidations", "selloff", "decline", "declines", "slump",
+    "하락", "급락", "악재", "약세", "규제", "해킹", "소송", "폭락", "유출", "청산",
+}
+_HANGUL_TERMS = sorted(
+    {t for t in POSITIVE_TERMS | NEGATIVE_TERMS if re.match(r"[가-힣]", t)},
+    key=len,
+    reverse=True
+)
+
+# 감성 점수 분류 기준
+NEUTRAL_BAND = 0.15
+
+
+def _normalize_term(token: str) -> str:
+    """한글 어절이 감성 단어로 시작하면 해당 단어로 정규화"""
+    for term in _HANGUL_TERMS:
+        if token.startswith(term):
+            return term
+    return token
+
+
+def lexicon_sentiment(news: Dict) -> float:
+    """
+    감성 사전 기반 기사 감성 점수
+
+    Args:
+        news: 뉴스 딕셔너리
+
+    Returns:
+        -1.0(부정) ~ 1.0(긍정) 감성 점수
+    """
+    text = f"{news.get('title', '')} {news.get('description', '')}"
+    positive = negative = 0
+    for token in tokenize(text):
+        term = _normalize_term(token)
+        if term in POSITIVE_TERMS:
+            positive += 1
+        elif term in NEGATIVE_TERMS:
+            negative += 1
+    return (positive - negative) / (positive + negative + 1)
+
+
+def currency_relevance(news: Dict, aliases: Dict[str, List[str]] = None) -> Dict[str, float]:
+    """
+    통화별 관련도 점수 (별칭 등장 횟수 기반, 제목 가중치 2)
+
+    Args:
+        news: 뉴스 딕셔너리
+        aliases: 통화 코드별 별칭 목록 (기본값: CURRENCY_ALIASES)
+
+    Returns:
+        {통화 코드: 0.0 ~ 1.0 관련도} 딕셔너리 (관련 없는 통화는 생략)
+    """
+    title_tokens = tokenize(news.get("title", ""))
+    description_tokens = tokenize(news.get("description", ""))
+
+    def matches(token: str, terms: set) -> bool:
+        # 한글 별칭은 조사가 붙은 어절도 매칭
+        if token in terms:
+            return True
+        return bool(re.match(r"[가-힣]", token)) and any(token.startswith(t) for t in terms)
+
+    relevance = {}
+    for currency, names in (aliases or CURRENCY_ALIASES).items():
+        terms = {currency.lower(), *(n.lower() for n in names)}
+        hits = (
+            2 * sum(1 for t in title_tokens if matches(t, terms))
+            + sum(1 for t in description_tokens if matches(t, terms))
+        )
+        if hits:
+            relevance[currency.upper()] = min(1.0, hits / 4)
+    return relevance
+
+
+class SentimentScorer:
+    """기사별 감성 점수 계산 및 DB 캐시 관리"""
+
+    def __init__(self, db, model=None, aliases: Dict[str, List[str]] = None):
+        """
+        Args:
+            db: TradingDatabase 인스턴스 (점수 캐시 저장소)
+            model: QwenModel 인스턴스 (지정 시 LLM 일괄 채점, 없으면 감성 사전 사용)
+            aliases: 통화 코드별 별칭 목록 (기본값: CURRENCY_ALIASES)
+        """
+        self.db = db
+        self.model = model
+        self.aliases = aliases or CURRENCY_ALIASES
+
+    def _score_with_llm(self, news_list: List[Dict]) -> List[float]:
+        """LLM 한 번 호출로 여러 기사 감성 채점 (실패 시 감성 사전으로 대체)"""
+        headlines = "\n".join(
+            f"{i}. {news.get('title', '')}" for i, news in enumerate(news_list, 1)
+        )
+        prompt = (
+            "다음 암호화폐 뉴스 제목 각각의 시장 감성을 -1(매우 부정)부터 1(매우 긍정) 사이 숫자로 평가하세요.\n"
+            "설명 없이 제목 순서대로 숫자만 담은 JSON 배열로 답하세요. 예: [0.5, -0.2]\n\n"
+            f"{headlines}\n"
+        )
+        try:
+            response = self.model.generate(
+                prompt=prompt,
+                max_length=8 * len(news_list) + 16,
+                temperature=0.1,
+                model_name=LM_STUDIO_MODEL_NAME
+            )
+            match = re.search(r"\[.*?\]", response, re.DOTALL)
+            scores = json.loads(match.group(0)) if match else []
+            if len(scores) != len(news_list):
+                raise ValueError(f"점수 개수 불일치: {len(scores)}/{len(news_list)}")
+            return [max(-1.0, min(1.0, float(score))) for score in scores]
+        except Exception as e:
+            logger.warning(f"LLM 감성 채점 실패, 감성 사전으로 대체: {e}")
+            return [lexicon_sentiment(news) for news in news_list]
+
+    def score_articles(self, news_list: List[Dict]) -> Dict[str, Dict]:
+        """
+        기사별 감성/관련도 점수 조회 (캐시에 없는 기사만 감성을 새로 채점, 관련도는 현재 별칭으로 계산)
+
+        Args:
+            news_list: 뉴스 목록
+
+        Returns:
+            {기사 해시: {"sentiment", "relevance", "title"}} 딕셔너리
+        """
+        by_hash = {article_hash(news): news for news in news_list}
+        scores = self.db.get_news_sentiments(list(by_hash))
+
+        missing = [(h, news) for h, news in by_hash.items() if h not in scores]
+        if missing:
+            rows = []
+            for start in range(0, len(missing), SENTIMENT_BATCH_SIZE):
+                batch = missing[start:start + SENTIMENT_BATCH_SIZE]
+                batch_news = [news for _, news in batch]
+                if self.model is not None:
+                    sentiments = self._score_with_llm(batch_news)
+                    scorer = "llm"
+                else:
+                    sentiments = [lexicon_sentiment(news) for news in batch_news]
+                    scorer = "lexicon"
+
+                for (h, news), sentiment in zip(batch, sentiments):
+                    row = {
+                        "article_hash": h,
+                        "title": news.get("title", ""),
+                        "sentiment": sentiment,
+                        "relevance": currency_relevance(news, self.aliases),
+                        "scorer": scorer
+                    }
+                    rows.append(row)
+                    scores[h] = row
+
+            self.db.add_news_sentiments(rows)
+            logger.info(f"뉴스 감성 채점: 신규 {len(missing)}건, 캐시 {len(by_hash) - len(missing)}건")
+
+        for h, news in by_hash.items():
+            scores[h]["relevance"] = currency_relevance(news, self.aliases)
+        return scores
+
+    def summarize(self, currency: str, news_list: List[Dict], max_headlines: int = 3) -> str:
+        """
+        통화 관련 뉴스 감성을 프롬프트용 요약 문자열로 집계
+
+        Args:
+            currency: 통화 코드
+            news_list: 뉴스 목록
+            max_headlines: 요약에 포함할 대표 기사 제목 수
+
+        Returns:
+            감성 요약 문자열
+        """
+        currency = currency.upper()
+        scores = self.score_articles(news_list)
+
+        # 별칭 사전에 없는 통화는 통화 코드 자체로 관련도 계산
+        aliases = {currency: self.aliases.get(currency, [])}
+        weights = {article_hash(news): currency_relevance(news, aliases).get(currency, 0.0) for news in news_list}
+        relevant = [
+            (weights[h], row["sentiment"], row["title"])
+            for h, row in scores.items()
+            if weights.get(h, 0.0) > 0
+        ]
+        if not relevant:
+            # 직접 관련된 기사가 없으면 시장 전체 분위기로 대체
+            relevant = [(1.0, row["sentiment"], row["title"]) for row in scores.values()]
+            scope = "시장 전체"
+        else:
+            scope = f"{currency} 관련"
+
+        if not relevant:
+            return "뉴스 감성: 데이터 없음"
+
+        total_weight = sum(weight for weight, _, _ in relevant)
+        average = sum(weight * sentiment for weight, sentiment, _ in relevant) / total_weight
+        positive = sum(1 for _, s, _ in relevant if s > NEUTRAL_BAND)
+        negative = sum(1 for _, s, _ in relevant if s < -NEUTRAL_BAND)
+        neutral = len(relevant) - positive - negative
+
+        lines = [
+            f"뉴스 감성 ({scope} {len(relevant)}건): 평균 {average:+.2f} "
+            f"(긍정 {positive} / 중립 {neutral} / 부정 {negative})"
+        ]
+        strongest = sorted(relevant, key=lambda item: item[0] * abs(item[1]), reverse=True)
+        for _, sentiment, title in strongest[:max_headlines]:
+            lines.append(f"- [{sentiment:+.1f}] {title}")
+        return "\n".join(lines)